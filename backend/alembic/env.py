@@ -8,17 +8,23 @@ from alembic import context
 # Import your models' Base
 from app.models.base import Base
 from app.core.config import settings
+from app.core.database import sync_database_url
 
 # Import all models so Alembic can detect them
-from app.models import User, Canvas, Node, Chat, ChatMessage
+from app.models import User, Canvas, Node, NodeSummary, Chat, ChatMessage, ContextSnapshot
 from app.models.canvas import CanvasShare
+from app.models.portfolio import PortfolioAnalysis
+from app.models.usage import LLMUsage, LLMUsageDaily
+from app.models.job import Job
+from app.models.scorecard import ScorecardDimension
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
 # Override sqlalchemy.url with the one from settings
-config.set_main_option("sqlalchemy.url", settings.database_url)
+# (% is escaped for the ini parser, e.g. in URL-encoded passwords)
+config.set_main_option("sqlalchemy.url", sync_database_url(settings.database_url).replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
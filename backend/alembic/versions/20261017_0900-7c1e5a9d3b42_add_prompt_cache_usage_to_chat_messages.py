@@ -0,0 +1,29 @@
+"""Add prompt cache usage to chat messages
+
+Revision ID: 7c1e5a9d3b42
+Revises: 4905335e6c2c
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5a9d3b42'
+down_revision = '4905335e6c2c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_messages', sa.Column('input_tokens', sa.Integer(), nullable=True))
+    op.add_column('chat_messages', sa.Column('cache_read_tokens', sa.Integer(), nullable=True))
+    op.add_column('chat_messages', sa.Column('cache_write_tokens', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('chat_messages') as batch_op:
+        batch_op.drop_column('cache_write_tokens')
+        batch_op.drop_column('cache_read_tokens')
+        batch_op.drop_column('input_tokens')
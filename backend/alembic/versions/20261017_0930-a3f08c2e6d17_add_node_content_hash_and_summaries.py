@@ -0,0 +1,89 @@
+"""Add node content hash and node summaries
+
+Revision ID: a3f08c2e6d17
+Revises: 7c1e5a9d3b42
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f08c2e6d17'
+down_revision = '7c1e5a9d3b42'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def content_hash(title, node_type, data) -> str:
+    """Same digest as summarization_service.compute_content_hash at this revision"""
+    canonical = json.dumps(
+        {"title": title, "node_type": node_type, "data": data or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def backfill_content_hashes() -> None:
+    """Hash existing nodes so they are summarized and cached like new ones"""
+    nodes = sa.table(
+        'nodes',
+        sa.column('id', sa.Integer),
+        sa.column('title', sa.String),
+        sa.column('node_type', sa.String),
+        sa.column('data', sa.JSON),
+        sa.column('content_hash', sa.String),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(nodes.c.id, nodes.c.title, nodes.c.node_type, nodes.c.data)
+            .where(nodes.c.id > last_id, nodes.c.content_hash.is_(None))
+            .order_by(nodes.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+
+        bind.execute(
+            nodes.update().where(nodes.c.id == sa.bindparam('node_id')),
+            [
+                {'node_id': row.id, 'content_hash': content_hash(row.title, row.node_type, row.data)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('nodes', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    backfill_content_hashes()
+    op.create_table('node_summaries',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=False),
+    sa.Column('source_size', sa.Integer(), nullable=False),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_node_summaries_content_hash'), 'node_summaries', ['content_hash'], unique=True)
+    op.create_index(op.f('ix_node_summaries_id'), 'node_summaries', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_node_summaries_id'), table_name='node_summaries')
+    op.drop_index(op.f('ix_node_summaries_content_hash'), table_name='node_summaries')
+    op.drop_table('node_summaries')
+    with op.batch_alter_table('nodes') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,36 @@
+"""Add content-addressed context snapshots
+
+Revision ID: 5b9d2e71c4a8
+Revises: a3f08c2e6d17
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d2e71c4a8'
+down_revision = 'a3f08c2e6d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('context_snapshots',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('token_count', sa.Integer(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_context_snapshots_content_hash'), 'context_snapshots', ['content_hash'], unique=True)
+    op.create_index(op.f('ix_context_snapshots_id'), 'context_snapshots', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_context_snapshots_id'), table_name='context_snapshots')
+    op.drop_index(op.f('ix_context_snapshots_content_hash'), table_name='context_snapshots')
+    op.drop_table('context_snapshots')
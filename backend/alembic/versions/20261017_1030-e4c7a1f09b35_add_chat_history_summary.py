@@ -0,0 +1,27 @@
+"""Add rolling history summary to chats
+
+Revision ID: e4c7a1f09b35
+Revises: 5b9d2e71c4a8
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c7a1f09b35'
+down_revision = '5b9d2e71c4a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chats', sa.Column('history_summary', sa.Text(), nullable=True))
+    op.add_column('chats', sa.Column('summarized_through_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('chats') as batch_op:
+        batch_op.drop_column('summarized_through_id')
+        batch_op.drop_column('history_summary')
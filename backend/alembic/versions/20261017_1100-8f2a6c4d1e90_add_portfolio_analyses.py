@@ -0,0 +1,45 @@
+"""Add portfolio analyses
+
+Revision ID: 8f2a6c4d1e90
+Revises: e4c7a1f09b35
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2a6c4d1e90'
+down_revision = 'e4c7a1f09b35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_analyses',
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('context_hash', sa.String(length=64), nullable=False),
+    sa.Column('run_id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), nullable=True),
+    sa.Column('output_tokens', sa.Integer(), nullable=True),
+    sa.Column('analyzed_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['canvas_id'], ['canvases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_portfolio_analyses_canvas_id'), 'portfolio_analyses', ['canvas_id'], unique=True)
+    op.create_index(op.f('ix_portfolio_analyses_id'), 'portfolio_analyses', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_portfolio_analyses_id'), table_name='portfolio_analyses')
+    op.drop_index(op.f('ix_portfolio_analyses_canvas_id'), table_name='portfolio_analyses')
+    op.drop_table('portfolio_analyses')
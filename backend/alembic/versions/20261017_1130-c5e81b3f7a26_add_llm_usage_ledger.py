@@ -0,0 +1,73 @@
+"""Add LLM usage ledger and daily rollups
+
+Revision ID: c5e81b3f7a26
+Revises: 8f2a6c4d1e90
+Create Date: 2026-10-17 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e81b3f7a26'
+down_revision = '8f2a6c4d1e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_usage',
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('provider', sa.String(), nullable=False),
+    sa.Column('operation', sa.String(), nullable=False),
+    sa.Column('chat_type', sa.String(), nullable=True),
+    sa.Column('canvas_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('chat_id', sa.Integer(), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_read_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_write_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('ttft_ms', sa.Float(), nullable=True),
+    sa.Column('cost_usd', sa.Float(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_canvas_id'), 'llm_usage', ['canvas_id'], unique=False)
+    op.create_index(op.f('ix_llm_usage_id'), 'llm_usage', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_usage_user_id'), 'llm_usage', ['user_id'], unique=False)
+
+    op.create_table('llm_usage_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('call_count', sa.Integer(), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_read_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_write_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms_total', sa.Float(), nullable=False),
+    sa.Column('cost_usd', sa.Float(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'canvas_id', 'user_id', 'model', name='uq_llm_usage_daily_key')
+    )
+    op.create_index(op.f('ix_llm_usage_daily_day'), 'llm_usage_daily', ['day'], unique=False)
+    op.create_index(op.f('ix_llm_usage_daily_id'), 'llm_usage_daily', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_usage_daily_id'), table_name='llm_usage_daily')
+    op.drop_index(op.f('ix_llm_usage_daily_day'), table_name='llm_usage_daily')
+    op.drop_table('llm_usage_daily')
+    op.drop_index(op.f('ix_llm_usage_user_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_canvas_id'), table_name='llm_usage')
+    op.drop_table('llm_usage')
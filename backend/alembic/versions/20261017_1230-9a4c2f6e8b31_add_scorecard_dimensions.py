@@ -0,0 +1,48 @@
+"""Add scorecard dimensions
+
+Revision ID: 9a4c2f6e8b31
+Revises: 3d7b9e2a5f14
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2f6e8b31'
+down_revision = '3d7b9e2a5f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('scorecard_dimensions',
+    sa.Column('canvas_id', sa.Integer(), nullable=False),
+    sa.Column('dimension', sa.String(), nullable=False),
+    sa.Column('input_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('gaps', sa.JSON(), nullable=True),
+    sa.Column('evidence_node_ids', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('input_tokens', sa.Integer(), nullable=True),
+    sa.Column('output_tokens', sa.Integer(), nullable=True),
+    sa.Column('assessed_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['canvas_id'], ['canvases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('canvas_id', 'dimension', name='uq_scorecard_dimensions_canvas_dimension')
+    )
+    op.create_index(op.f('ix_scorecard_dimensions_canvas_id'), 'scorecard_dimensions', ['canvas_id'], unique=False)
+    op.create_index(op.f('ix_scorecard_dimensions_id'), 'scorecard_dimensions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_scorecard_dimensions_id'), table_name='scorecard_dimensions')
+    op.drop_index(op.f('ix_scorecard_dimensions_canvas_id'), table_name='scorecard_dimensions')
+    op.drop_table('scorecard_dimensions')
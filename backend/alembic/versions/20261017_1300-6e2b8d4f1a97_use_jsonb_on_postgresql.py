@@ -0,0 +1,55 @@
+"""Use JSONB for JSON columns on PostgreSQL
+
+Revision ID: 6e2b8d4f1a97
+Revises: 9a4c2f6e8b31
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2b8d4f1a97'
+down_revision = '9a4c2f6e8b31'
+branch_labels = None
+depends_on = None
+
+# (table, column, nullable)
+JSON_COLUMNS = [
+    ('canvases', 'viewport', True),
+    ('nodes', 'data', False),
+    ('nodes', 'status', True),
+    ('chats', 'context_snapshot', True),
+    ('jobs', 'payload', False),
+    ('jobs', 'progress', True),
+    ('jobs', 'result', True),
+    ('scorecard_dimensions', 'gaps', True),
+    ('scorecard_dimensions', 'evidence_node_ids', True),
+]
+
+
+def upgrade() -> None:
+    # SQLite stores both as text; only PostgreSQL has a separate JSONB type
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column, nullable in JSON_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.JSON(),
+                   type_=postgresql.JSONB(astext_type=sa.Text()),
+                   existing_nullable=nullable,
+                   postgresql_using=f'{column}::jsonb')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, column, nullable in JSON_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                   type_=sa.JSON(),
+                   existing_nullable=nullable,
+                   postgresql_using=f'{column}::json')
@@ -0,0 +1,42 @@
+"""Add indexes for foreign-key lookups
+
+Revision ID: b7d41e9c2a58
+Revises: 6e2b8d4f1a97
+Create Date: 2026-10-17 13:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e9c2a58'
+down_revision = '6e2b8d4f1a97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest share if a user was ever shared a canvas twice, so the
+    # unique index can be built
+    op.execute(
+        'DELETE FROM canvas_shares WHERE id NOT IN '
+        '(SELECT MIN(id) FROM canvas_shares GROUP BY canvas_id, user_id)'
+    )
+
+    op.create_index(op.f('ix_canvases_owner_id'), 'canvases', ['owner_id'], unique=False)
+    op.create_index('ix_canvas_shares_canvas_id_user_id', 'canvas_shares', ['canvas_id', 'user_id'], unique=True)
+    op.create_index(op.f('ix_canvas_shares_user_id'), 'canvas_shares', ['user_id'], unique=False)
+    op.create_index(op.f('ix_nodes_canvas_id'), 'nodes', ['canvas_id'], unique=False)
+    op.create_index(op.f('ix_chats_canvas_id'), 'chats', ['canvas_id'], unique=False)
+    op.create_index(op.f('ix_chats_node_id'), 'chats', ['node_id'], unique=False)
+    op.create_index('ix_chat_messages_chat_id_created_at', 'chat_messages', ['chat_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_chat_id_created_at', table_name='chat_messages')
+    op.drop_index(op.f('ix_chats_node_id'), table_name='chats')
+    op.drop_index(op.f('ix_chats_canvas_id'), table_name='chats')
+    op.drop_index(op.f('ix_nodes_canvas_id'), table_name='nodes')
+    op.drop_index(op.f('ix_canvas_shares_user_id'), table_name='canvas_shares')
+    op.drop_index('ix_canvas_shares_canvas_id_user_id', table_name='canvas_shares')
+    op.drop_index(op.f('ix_canvases_owner_id'), table_name='canvases')
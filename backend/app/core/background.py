@@ -0,0 +1,49 @@
+"""
+Fire-and-forget tasks.
+
+Small writes that should not delay a response (usage records) or must
+finish even though their request was cancelled (saving a streamed reply
+after the client disconnects) run as their own tasks. Cancelling the
+request does not cancel them, and the module keeps strong references so
+they are not garbage collected mid-way.
+"""
+import asyncio
+from typing import Any, Coroutine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Strong references so running tasks are not garbage collected
+_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Run a coroutine as a background task on the running loop.
+
+    Args:
+        coro: Coroutine to run (should handle its own errors)
+
+    Returns:
+        The task
+    """
+    task = asyncio.get_running_loop().create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def drain_background_tasks(timeout: float | None = None) -> None:
+    """
+    Wait for pending background tasks (on shutdown, and in tests).
+
+    Args:
+        timeout: Give up after this many seconds (None = wait for all)
+    """
+    pending = set(_tasks)
+    if not pending:
+        return
+
+    done, not_done = await asyncio.wait(pending, timeout=timeout)
+    if not_done:
+        logger.warning(f"{len(not_done)} background task(s) still running at shutdown")
@@ -21,6 +21,20 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./data/deep-thought.db"
 
+    # SQLite tuning (on-disk databases)
+    sqlite_wal_mode: bool = True  # WAL journaling with a read-only pool and one writer connection
+    sqlite_busy_timeout_ms: int = 5000  # Wait this long for another process's write lock
+    sqlite_cache_size_kib: int = 64 * 1024  # Page cache per connection
+    sqlite_mmap_size_mb: int = 256  # Memory-mapped I/O for reads (0 disables)
+    sqlite_read_pool_size: int = 8  # Read connections kept open (more are opened under load)
+
+    # Connection pool for server databases (PostgreSQL); each engine has its own
+    database_pool_size: int = 10  # Connections kept open
+    database_max_overflow: int = 20  # Extra connections opened under load
+    database_pool_timeout_seconds: float = 30.0  # Wait this long for a free connection
+    database_pool_recycle_seconds: int = 1800  # Replace connections older than this
+    database_pool_pre_ping: bool = True  # Check connections on checkout (survives server restarts)
+
     # SAML Authentication
     saml_idp_metadata_url: str
     saml_sp_entity_id: str
@@ -40,15 +54,72 @@ class Settings(BaseSettings):
     aws_profile: str = "claude"  # AWS profile name for SSO
     aws_access_key_id: Optional[str] = None
     aws_secret_access_key: Optional[str] = None
+    aws_credential_refresh_interval_seconds: int = 60  # Background expiry check
+    aws_credential_refresh_window_seconds: int = 15 * 60  # Refresh this close to expiry
+
+    # LLM gateway
+    llm_max_concurrency: int = 20  # Dedicated worker threads for model calls
+    llm_timeout_seconds: float = 120.0  # Per-call timeout (per-event for streams)
+    llm_min_concurrency: int = 1  # Floor for the adaptive limit (max is llm_max_concurrency)
+    llm_max_retries: int = 3  # Retries of throttled calls
+    llm_retry_base_seconds: float = 0.5  # Backoff base (full jitter, doubles per retry)
+    llm_queue_timeout_seconds: float = 30.0  # Max queue wait for interactive calls
 
-    # Anthropic API (future)
+    # Model provider: bedrock, anthropic or simulated
+    llm_provider: str = "bedrock"
+
+    # Anthropic API (llm_provider=anthropic)
     anthropic_api_key: Optional[str] = None
+    anthropic_model_id: str = "claude-sonnet-4-5-20250929"
+
+    # Local simulator (llm_provider=simulated)
+    llm_simulator_seed: int = 42  # Seeds injected errors (replies depend only on the request)
+    llm_simulator_ttft_ms: float = 300.0  # Delay before the first token
+    llm_simulator_tokens_per_second: float = 80.0
+    llm_simulator_output_tokens: int = 200  # Reply length (capped by max_tokens)
+    llm_simulator_throttle_rate: float = 0.0  # Fraction of calls failing with 429
+    llm_simulator_error_rate: float = 0.0  # Fraction of calls failing with 500
 
     # AI Configuration
     max_context_tokens: int = 100000  # Max tokens for context
+    node_summary_threshold_chars: int = 5000  # Summarize nodes larger than this (ADR-002)
+    context_fragment_cache_max_entries: int = 50000  # Rendered node fragments kept in memory
+    whats_next_cache_ttl_seconds: int = 15 * 60  # Reuse unchanged-canvas analyses this long
+    whats_next_cache_max_entries: int = 512
+    context_retrieval_enabled: bool = True  # Question-aware context for large canvases
+    context_retrieval_min_tokens: int = 8000  # Canvases smaller than this are sent whole
+    context_retrieval_top_k: int = 8  # Chunks retrieved per user message
+    retrieval_chunk_chars: int = 1500
+    retrieval_index_max_canvases: int = 256  # Canvas indexes kept in memory
+    portfolio_provider: str = "bedrock"  # 'bedrock', 'bedrock_batch' or 'fake' (debug only)
+    portfolio_max_concurrency: int = 4  # Online model calls in flight per portfolio run
+    portfolio_plan_batch_size: int = 50  # Canvases whose contexts are built (and held) at a time
+    portfolio_batch_s3_uri: Optional[str] = None  # s3://bucket/prefix for batch input/output
+    portfolio_batch_role_arn: Optional[str] = None  # IAM role Bedrock assumes for batch jobs
+    portfolio_batch_min_records: int = 100  # Smaller runs use online calls
+    portfolio_batch_poll_seconds: int = 60
+    portfolio_batch_timeout_seconds: int = 24 * 60 * 60
+    chat_compaction_enabled: bool = True  # Fold old turns into a running summary
+    chat_keep_recent_turns: int = 10  # Turns (user + assistant) sent verbatim
+    chat_compaction_batch_turns: int = 5  # Turns folded per compaction
+    persona_simulation_max_personas: int = 8  # Person nodes per multi-persona turn
+    scorecard_max_concurrency: int = 3  # Dimension assessments in flight per scorecard refresh
+
+    # Background jobs
+    job_workers: int = 2  # Worker coroutines per process (0 = enqueue only)
+    job_poll_interval_seconds: float = 1.0  # Idle workers check for new jobs this often
+    job_visibility_timeout_seconds: int = 300  # Lease length; expired leases are re-run
+    job_progress_interval_seconds: float = 2.0  # Lease renewal / progress save interval
+    job_max_attempts: int = 3
+    job_retry_base_seconds: float = 10.0  # Retry backoff base (doubles per attempt)
+    job_delete_batch_size: int = 500  # Rows per transaction in background deletes
+    background_drain_timeout_seconds: float = 10.0  # Shutdown wait for pending usage/reply writes
 
     # Rate Limiting
     api_rate_limit: int = 100  # requests per minute per user
+    llm_rate_limit: int = 20  # Model-calling requests per minute per user (separate bucket)
+    rate_limit_enabled: bool = True
+    rate_limit_redis_url: Optional[str] = None  # Shared buckets for multi-worker deployments
 
     # Logging
     log_level: str = "INFO"
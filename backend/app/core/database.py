@@ -1,7 +1,11 @@
 """
 Database connection and session management.
 """
+from typing import AsyncIterator
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.sql.dml import UpdateBase
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from app.core.config import settings
@@ -15,9 +19,117 @@ if settings.database_url.startswith("sqlite"):
     if db_dir and not os.path.exists(db_dir):
         os.makedirs(db_dir, exist_ok=True)
 
-# Create engine
-# Use StaticPool for SQLite to avoid threading issues
-if "sqlite" in settings.database_url:
+
+def is_file_sqlite(url: str) -> bool:
+    """Check whether a URL is an on-disk SQLite database (not in-memory)"""
+    return url.startswith("sqlite") and ":memory:" not in url and url not in ("sqlite://", "sqlite:///")
+
+
+def apply_sqlite_pragmas(dbapi_conn, read_only: bool = False) -> None:
+    """
+    Tune a new SQLite connection for concurrent use.
+
+    WAL lets readers run alongside the writer; synchronous=NORMAL is
+    durable across application crashes in WAL mode (only an OS crash can
+    lose the last commits); busy_timeout makes writers from other
+    processes wait instead of failing with "database is locked".
+
+    Args:
+        dbapi_conn: sqlite3 connection
+        read_only: Refuse writes on this connection (read pool)
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    else:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def server_pool_options() -> dict:
+    """
+    Pool settings for server databases (PostgreSQL), from settings.
+
+    Returns:
+        Keyword arguments for create_engine / create_async_engine
+    """
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout_seconds,
+        "pool_recycle": settings.database_pool_recycle_seconds,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+# Drivers for URLs that do not name one (postgresql://...). SQLAlchemy's own
+# default for PostgreSQL changed from psycopg2 to psycopg 3 in 2.1; the
+# requirements install psycopg2.
+SYNC_DRIVERS = {
+    "postgresql": "psycopg2",
+}
+
+
+def sync_database_url(url: str) -> str:
+    """
+    Pin a database URL to the installed sync driver if it does not name one.
+
+    Args:
+        url: SQLAlchemy URL, e.g. postgresql://user:pw@host/db
+
+    Returns:
+        URL with an explicit driver, e.g. postgresql+psycopg2://user:pw@host/db
+    """
+    parsed = make_url(url)
+    driver = SYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.drivername}+{driver}").render_as_string(hide_password=False)
+
+
+# Create engines
+# engine takes DDL (init_db), migrations and scripts; read_engine, when set,
+# takes their plain reads. The application itself goes through the async
+# engines below, so a running server has exactly one writer.
+read_engine = None
+
+if is_file_sqlite(settings.database_url) and settings.sqlite_wal_mode:
+    # Single writer connection: SQLite allows one writer at a time anyway,
+    # and sharing it means writes never wait on a pool checkout
+    engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        echo=settings.debug,
+    )
+
+    # Pool of read-only connections; WAL readers don't block each other or
+    # the writer. Overflow is unbounded so a burst of requests never blocks
+    # the event loop waiting for a connection.
+    read_engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=-1,
+        echo=settings.debug,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_writer_pragmas(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn)
+
+    @event.listens_for(read_engine, "connect")
+    def set_reader_pragmas(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn, read_only=True)
+
+elif "sqlite" in settings.database_url:
+    # Use StaticPool for SQLite to avoid threading issues
     engine = create_engine(
         settings.database_url,
         connect_args={"check_same_thread": False},
@@ -32,22 +144,141 @@ if "sqlite" in settings.database_url:
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 else:
-    engine = create_engine(settings.database_url, echo=settings.debug)
+    engine = create_engine(sync_database_url(settings.database_url), echo=settings.debug, **server_pool_options())
+
+
+# Async engines for AsyncSession (routers and services on the async data
+# layer), mirroring the sync setup above. They open their own connections,
+# so an in-memory SQLite database is not shared between the two layers.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Swap a database URL's driver for its asyncio counterpart.
+
+    Args:
+        url: Sync SQLAlchemy URL, e.g. sqlite:///./data/deep-thought.db
+
+    Returns:
+        Async URL, e.g. sqlite+aiosqlite:///./data/deep-thought.db
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No asyncio driver configured for {backend} databases")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+async_url = async_database_url(settings.database_url)
+async_read_engine = None
+
+if read_engine is not None:
+    # One writer connection, as above. Checkouts are awaited, so a second
+    # concurrent write transaction waits its turn without blocking the loop.
+    async_engine = create_async_engine(
+        async_url,
+        pool_size=1,
+        max_overflow=0,
+        echo=settings.debug,
+    )
+
+    async_read_engine = create_async_engine(
+        async_url,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=-1,
+        echo=settings.debug,
+    )
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_writer_pragmas(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn)
+
+    @event.listens_for(async_read_engine.sync_engine, "connect")
+    def set_async_reader_pragmas(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn, read_only=True)
+
+elif "sqlite" in settings.database_url:
+    async_engine = create_async_engine(async_url, echo=settings.debug)
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_async_sqlite_pragma(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.close()
+else:
+    async_engine = create_async_engine(async_url, echo=settings.debug, **server_pool_options())
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to read_engine and writes to engine.
+
+    Once a transaction writes (a flush or an INSERT/UPDATE/DELETE
+    statement) it stays on the writer until it ends, so its later reads see
+    its own uncommitted changes.
+    """
+
+    writer = engine
+    reader = read_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.reader is None:
+            return self.writer
+
+        if self.info.get("writing") or self._flushing or isinstance(clause, UpdateBase):
+            self.info["writing"] = True
+            return self.writer
+
+        return self.reader
+
+
+class AsyncRoutingSession(RoutingSession):
+    """Sync half of an AsyncSession: same routing over the async engines"""
+
+    writer = async_engine.sync_engine
+    reader = async_read_engine.sync_engine if async_read_engine is not None else None
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def end_write_routing(session, transaction):
+    """Route the next transaction's reads to the read pool again"""
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
 
-def get_db() -> Session:
+# Objects stay loaded after commit: attribute access must not lazily
+# reload (that would need I/O outside an await)
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=AsyncRoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
     """
-    Dependency to get database session.
-    Use with FastAPI Depends().
+    Dependency to get an async database session.
+    Use with FastAPI Depends(). Sync ORM helpers run through db.run_sync.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def dispose_async_engines() -> None:
+    """Close the async engines' pooled connections (on shutdown)"""
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
 
 
 def init_db():
@@ -56,13 +287,17 @@ def init_db():
     Creates all tables defined in models.
     """
     from app.models.base import Base
-    from app.models import User, Canvas, Node, Chat, ChatMessage
+    from app.models import User, Canvas, Node, NodeSummary, Chat, ChatMessage, ContextSnapshot
     from app.models.canvas import CanvasShare
+    from app.models.portfolio import PortfolioAnalysis
+    from app.models.usage import LLMUsage, LLMUsageDaily
+    from app.models.job import Job
+    from app.models.scorecard import ScorecardDimension
 
     Base.metadata.create_all(bind=engine)
 
 
-def check_db_connection() -> bool:
+async def check_db_connection() -> bool:
     """
     Check if database connection is healthy.
     Returns True if connection is successful.
@@ -70,9 +305,8 @@ def check_db_connection() -> bool:
     from sqlalchemy import text
 
     try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         return True
     except Exception:
         return False
@@ -0,0 +1,242 @@
+"""
+Per-user API rate limiting.
+
+Each user (JWT `sub`, or client IP when unauthenticated) gets a token bucket
+per route class: a CRUD bucket refilled at settings.api_rate_limit per
+minute and a separate, smaller LLM bucket refilled at
+settings.llm_rate_limit per minute. Requests over the limit get a 429 with
+a Retry-After header.
+
+State is kept in memory by default; idle buckets are pruned once full, so
+memory is proportional to recently active users. Set
+settings.rate_limit_redis_url to share buckets across workers.
+"""
+import json
+import math
+import re
+import threading
+import time
+from typing import Dict, Tuple
+from app.core.config import settings
+from app.services.jwt_service import verify_token
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Routes that call the model (POST only); everything else is CRUD
+LLM_ROUTE_PATTERNS = [
+    re.compile(r"^/chats/\d+/messages(/stream)?$"),
+    re.compile(r"^/chats/canvas/\d+/personas/stream$"),
+    re.compile(r"^/canvases/\d+/scorecard/refresh$"),
+    re.compile(r"^/portfolio/whats-next/runs$"),
+]
+
+# Never rate limited
+EXEMPT_PATHS = {"/health"}
+
+# Prune idle buckets at most this often (seconds)
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class MemoryBackend:
+    """In-process token buckets: key -> (tokens, last update)"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    async def acquire(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key: Bucket key
+            capacity: Bucket size (burst)
+            rate: Refill rate in tokens per second
+
+        Returns:
+            (allowed, tokens remaining)
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            self._buckets[key] = (tokens, now)
+
+            if now - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self._prune(now, capacity / rate)
+
+        return allowed, tokens
+
+    def _prune(self, now: float, max_refill_seconds: float) -> None:
+        """Drop buckets idle long enough to be full again (same as absent)"""
+        idle = [
+            key for key, (_, updated) in self._buckets.items()
+            if now - updated >= max_refill_seconds
+        ]
+        for key in idle:
+            del self._buckets[key]
+        self._last_prune = now
+
+    def size(self) -> int:
+        """Number of tracked buckets"""
+        return len(self._buckets)
+
+
+# Atomic refill-and-take using the Redis server clock
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBackend:
+    """Token buckets shared across workers in Redis (requires the redis package)"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key: Bucket key
+            capacity: Bucket size (burst)
+            rate: Refill rate in tokens per second
+
+        Returns:
+            (allowed, tokens remaining)
+        """
+        allowed, tokens = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, rate])
+        return bool(allowed), float(tokens)
+
+    def size(self) -> int | None:
+        """Buckets live in Redis (expired there)"""
+        return None
+
+
+def rate_limit_key(scope) -> str:
+    """
+    Identify the caller: JWT `sub` if a valid bearer token is present,
+    otherwise the client IP.
+
+    Args:
+        scope: ASGI scope
+
+    Returns:
+        Caller key
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = verify_token(token)
+                if payload and payload.get("sub") is not None:
+                    return f"user:{payload['sub']}"
+            break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def route_class(method: str, path: str) -> str:
+    """
+    Classify a request as 'llm' or 'crud'.
+
+    Args:
+        method: HTTP method
+        path: Path without the API prefix
+
+    Returns:
+        Route class
+    """
+    if method == "POST" and any(pattern.match(path) for pattern in LLM_ROUTE_PATTERNS):
+        return "llm"
+    return "crud"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing per-user token buckets"""
+
+    def __init__(self, app):
+        self.app = app
+        self.limits = {
+            "crud": settings.api_rate_limit,
+            "llm": settings.llm_rate_limit,
+        }
+
+        if settings.rate_limit_redis_url:
+            self.backend = RedisBackend(settings.rate_limit_redis_url)
+            logger.info("Rate limiting with shared Redis state")
+        else:
+            self.backend = MemoryBackend()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(settings.api_prefix):
+            path = path[len(settings.api_prefix):]
+        if path in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        bucket = route_class(scope["method"], path)
+        limit = self.limits[bucket]
+        rate = limit / 60.0
+        key = f"{bucket}:{rate_limit_key(scope)}"
+
+        try:
+            allowed, tokens = await self.backend.acquire(key, float(limit), rate)
+        except Exception as e:
+            # Fail open: a limiter outage should not take the API down
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = max(1, math.ceil((1.0 - tokens) / rate))
+        logger.info(f"Rate limit exceeded: {key} ({bucket}, retry in {retry_after}s)")
+
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+                (b"x-ratelimit-limit", str(limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
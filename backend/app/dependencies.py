@@ -3,8 +3,7 @@ FastAPI dependencies for dependency injection.
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
 from app.models.user import User, UserRole
 from app.services.jwt_service import verify_token
 from app.services.user_service import get_user_by_id
@@ -15,14 +14,15 @@ security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
 ) -> User:
     """
     Get current authenticated user from JWT token.
 
+    The user is loaded in its own short session, so a request doesn't hold
+    a connection for its whole lifetime (e.g. while waiting on the LLM).
+
     Args:
         credentials: HTTP Bearer credentials with JWT token
-        db: Database session
 
     Returns:
         Current user object
@@ -55,7 +55,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = get_user_by_id(db, int(user_id))
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_id(db, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
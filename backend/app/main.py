@@ -5,9 +5,14 @@ The Answer to Life, the Universe, and Enterprise Sales Deals.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.background import drain_background_tasks
 from app.core.config import settings
-from app.core.database import init_db
-from app.routers import auth, canvases, nodes, chats, admin, health, dev_auth
+from app.core.database import dispose_async_engines, init_db
+from app.core.rate_limit import RateLimitMiddleware
+from app.routers import auth, canvases, nodes, chats, admin, health, dev_auth, portfolio, jobs, scorecards
+from app.services import llm_gateway
+from app.services.bedrock_pool import bedrock_pool
+from app.services.job_service import job_workers
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,6 +27,9 @@ app = FastAPI(
     openapi_url=f"{settings.api_prefix}/openapi.json",
 )
 
+# Per-user rate limiting (added before CORS so 429s still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +46,9 @@ app.include_router(canvases.router, prefix=settings.api_prefix, tags=["canvases"
 app.include_router(nodes.router, prefix=settings.api_prefix, tags=["nodes"])
 app.include_router(chats.router, prefix=settings.api_prefix, tags=["chats"])
 app.include_router(admin.router, prefix=settings.api_prefix, tags=["admin"])
+app.include_router(portfolio.router, prefix=settings.api_prefix, tags=["portfolio"])
+app.include_router(jobs.router, prefix=settings.api_prefix, tags=["jobs"])
+app.include_router(scorecards.router, prefix=settings.api_prefix, tags=["scorecards"])
 
 # Development-only authentication (bypasses SAML)
 if settings.debug:
@@ -58,6 +69,18 @@ async def startup_event():
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+    # Warm up the shared Bedrock client so the first chat skips credential resolution
+    if settings.llm_provider == "bedrock":
+        try:
+            bedrock_pool.start()
+        except Exception as e:
+            # Chats will retry client creation on first use
+            logger.warning(f"Bedrock client pool not started: {e}")
+
+    # Background job workers (jobs left running by a dead process resume when their lease expires)
+    if settings.job_workers > 0:
+        job_workers.start()
+
     # TODO: Check SAML configuration
     # TODO: Bootstrap admin user if needed
 
@@ -67,7 +90,12 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    pass
+    await job_workers.stop()
+    bedrock_pool.stop()
+    llm_gateway.shutdown()
+    # Usage records and partial replies still being written
+    await drain_background_tasks(timeout=settings.background_drain_timeout_seconds)
+    await dispose_async_engines()
 
 
 @app.get("/")
@@ -1,7 +1,24 @@
 """Database models for Deep Thought"""
 from app.models.user import User
 from app.models.canvas import Canvas
-from app.models.node import Node
-from app.models.chat import Chat, ChatMessage
+from app.models.node import Node, NodeSummary
+from app.models.chat import Chat, ChatMessage, ContextSnapshot
+from app.models.portfolio import PortfolioAnalysis
+from app.models.usage import LLMUsage, LLMUsageDaily
+from app.models.job import Job
+from app.models.scorecard import ScorecardDimension
 
-__all__ = ["User", "Canvas", "Node", "Chat", "ChatMessage"]
+__all__ = [
+    "User",
+    "Canvas",
+    "Node",
+    "NodeSummary",
+    "Chat",
+    "ChatMessage",
+    "ContextSnapshot",
+    "PortfolioAnalysis",
+    "LLMUsage",
+    "LLMUsageDaily",
+    "Job",
+    "ScorecardDimension",
+]
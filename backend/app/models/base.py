@@ -1,10 +1,14 @@
 """Base database model with common fields"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# JSON columns: JSONB on PostgreSQL (parsed once, indexable), JSON text elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class BaseModel(Base):
     """Base model with common fields"""
@@ -1,7 +1,7 @@
 """Canvas model"""
-from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class Canvas(BaseModel):
@@ -11,11 +11,11 @@ class Canvas(BaseModel):
 
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     is_archived = Column(Boolean, default=False, nullable=False)
 
     # Canvas state (node positions, zoom, etc.)
-    viewport = Column(JSON, nullable=True)  # {x, y, zoom}
+    viewport = Column(JSONType, nullable=True)  # {x, y, zoom}
 
     # Relationships
     owner = relationship("User", backref="canvases")
@@ -33,13 +33,18 @@ class CanvasShare(BaseModel):
     __tablename__ = "canvas_shares"
 
     canvas_id = Column(Integer, ForeignKey("canvases.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)  # Shared-with-me listing
     can_write = Column(Boolean, default=False, nullable=False)  # False = read-only
 
     # Relationships
     canvas = relationship("Canvas", back_populates="shares")
     user = relationship("User")
 
+    __table_args__ = (
+        # One share per user; also serves lookups by canvas alone
+        Index("ix_canvas_shares_canvas_id_user_id", "canvas_id", "user_id", unique=True),
+    )
+
     def __repr__(self):
         access = "read-write" if self.can_write else "read-only"
         return f"<CanvasShare canvas={self.canvas_id} user={self.user_id} ({access})>"
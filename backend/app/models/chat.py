@@ -1,7 +1,7 @@
 """Chat models"""
-from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class Chat(BaseModel):
@@ -10,15 +10,20 @@ class Chat(BaseModel):
     __tablename__ = "chats"
 
     name = Column(String, nullable=False)  # User-renameable
-    canvas_id = Column(Integer, ForeignKey("canvases.id"), nullable=False)
-    node_id = Column(Integer, ForeignKey("nodes.id"), nullable=True)  # None = deal-level chat
+    canvas_id = Column(Integer, ForeignKey("canvases.id"), index=True, nullable=False)
+    node_id = Column(Integer, ForeignKey("nodes.id"), index=True, nullable=True)  # None = deal-level chat
     parent_chat_id = Column(Integer, ForeignKey("chats.id"), nullable=True)  # For "continue from"
 
     # Chat type: 'persona' (with node), 'sales_assistant', 'whats_next'
     chat_type = Column(String, nullable=False)
 
-    # Canvas context snapshot (at chat creation)
-    context_snapshot = Column(JSON, nullable=True)
+    # Canvas context pinned on first message: {mode, hash or outline_hash, built_at, token_count, ...}
+    # The compiled text (or retrieval outline) lives in context_snapshots under that hash
+    context_snapshot = Column(JSONType, nullable=True)
+
+    # Rolling summary of turns older than the verbatim window
+    history_summary = Column(Text, nullable=True)
+    summarized_through_id = Column(Integer, nullable=True)  # Last message folded into the summary
 
     # Relationships
     canvas = relationship("Canvas", back_populates="chats")
@@ -40,9 +45,32 @@ class ChatMessage(BaseModel):
     content = Column(Text, nullable=False)
     token_count = Column(Integer, nullable=True)  # For cost tracking
 
+    # Prompt usage for assistant messages (from the model response)
+    input_tokens = Column(Integer, nullable=True)  # Uncached input tokens
+    cache_read_tokens = Column(Integer, nullable=True)  # Input served from prompt cache
+    cache_write_tokens = Column(Integer, nullable=True)  # Input written to prompt cache
+
     # Relationships
     chat = relationship("Chat", back_populates="messages")
 
+    __table_args__ = (
+        # A chat's history, in order
+        Index("ix_chat_messages_chat_id_created_at", "chat_id", "created_at"),
+    )
+
     def __repr__(self):
         preview = self.content[:50] + "..." if len(self.content) > 50 else self.content
         return f"<ChatMessage {self.role}: {preview}>"
+
+
+class ContextSnapshot(BaseModel):
+    """Compiled canvas context, stored once per distinct text and shared across chats"""
+
+    __tablename__ = "context_snapshots"
+
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<ContextSnapshot {self.content_hash[:12]} ({self.token_count} tokens)>"
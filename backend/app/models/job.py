@@ -0,0 +1,37 @@
+"""Background job model"""
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, Index
+from app.models.base import BaseModel, JSONType
+
+
+class Job(BaseModel):
+    """Durable unit of background work, leased by workers (see job_service)"""
+
+    __tablename__ = "jobs"
+
+    job_type = Column(String, nullable=False)  # Handler name, e.g. 'delete_canvas'
+    payload = Column(JSONType, nullable=False, default=dict)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # 'queued', 'running', 'complete', 'failed'
+    status = Column(String, nullable=False, default='queued')
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)  # Not leased before this (retry backoff)
+
+    # Lease: a running job whose lease has expired is picked up again
+    lease_owner = Column(String, nullable=True)  # Worker ID
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    progress = Column(JSONType, nullable=True)  # Handler-defined, e.g. {"current": 3, "total": 10}
+    result = Column(JSONType, nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)  # Last lease
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index("ix_jobs_job_type_status", "job_type", "status"),
+    )
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.job_type} ({self.status})>"
@@ -1,7 +1,7 @@
 """Node model"""
-from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Float
+from sqlalchemy import Column, String, Integer, ForeignKey, Float, Text
 from sqlalchemy.orm import relationship
-from app.models.base import BaseModel
+from app.models.base import BaseModel, JSONType
 
 
 class Node(BaseModel):
@@ -9,7 +9,7 @@ class Node(BaseModel):
 
     __tablename__ = "nodes"
 
-    canvas_id = Column(Integer, ForeignKey("canvases.id"), nullable=False)
+    canvas_id = Column(Integer, ForeignKey("canvases.id"), index=True, nullable=False)
     node_type = Column(String, nullable=False)  # person, meeting, document, generic, etc.
     title = Column(String, nullable=False)
 
@@ -20,14 +20,15 @@ class Node(BaseModel):
     height = Column(Integer, nullable=True)  # null = auto
 
     # Node data (type-specific)
-    data = Column(JSON, nullable=False, default=dict)
+    data = Column(JSONType, nullable=False, default=dict)
 
     # Status indicators
-    status = Column(JSON, nullable=True)  # {warnings: [], indicators: []}
+    status = Column(JSONType, nullable=True)  # {warnings: [], indicators: []}
 
     # Context management
     exclude_from_context = Column(Integer, default=False, nullable=False)  # Boolean stored as int
     content_size = Column(Integer, nullable=True)  # Cached size in characters
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of title/type/data
 
     # Relationships
     canvas = relationship("Canvas", back_populates="nodes")
@@ -35,3 +36,17 @@ class Node(BaseModel):
 
     def __repr__(self):
         return f"<Node {self.title} ({self.node_type}) canvas={self.canvas_id}>"
+
+
+class NodeSummary(BaseModel):
+    """AI summary of large node content, shared by every node with the same content"""
+
+    __tablename__ = "node_summaries"
+
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    summary = Column(Text, nullable=False)
+    source_size = Column(Integer, nullable=False)  # Characters summarized
+    model = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<NodeSummary {self.content_hash[:12]} ({self.source_size} chars)>"
@@ -0,0 +1,30 @@
+"""Portfolio analysis model"""
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel
+
+
+class PortfolioAnalysis(BaseModel):
+    """Latest batch "What's Next" analysis of a canvas, read by the manager dashboard"""
+
+    __tablename__ = "portfolio_analyses"
+
+    canvas_id = Column(Integer, ForeignKey("canvases.id", ondelete="CASCADE"), unique=True, index=True, nullable=False)
+    context_hash = Column(String(64), nullable=False)  # Hash of the analyzed context and prompt version
+    run_id = Column(String, nullable=False)  # Batch run that produced this result
+
+    status = Column(String, nullable=False)  # 'complete' or 'failed'
+    content = Column(Text, nullable=True)  # Model recommendations (markdown)
+    error = Column(Text, nullable=True)
+
+    provider = Column(String, nullable=False)  # 'bedrock', 'bedrock_batch', 'fake'
+    model = Column(String, nullable=True)
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    analyzed_at = Column(DateTime, nullable=False)
+
+    # Relationships
+    canvas = relationship("Canvas")
+
+    def __repr__(self):
+        return f"<PortfolioAnalysis canvas={self.canvas_id} ({self.status})>"
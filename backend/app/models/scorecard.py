@@ -0,0 +1,36 @@
+"""Deal scorecard model"""
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel, JSONType
+
+
+class ScorecardDimension(BaseModel):
+    """Latest assessment of one MEDDPICC dimension of a canvas"""
+
+    __tablename__ = "scorecard_dimensions"
+
+    canvas_id = Column(Integer, ForeignKey("canvases.id", ondelete="CASCADE"), index=True, nullable=False)
+    dimension = Column(String, nullable=False)  # e.g. 'economic_buyer' (see scorecard_service.DIMENSIONS)
+    input_hash = Column(String(64), nullable=False)  # Hash of the relevant nodes' content hashes and prompt version
+
+    status = Column(String, nullable=False)  # 'complete', 'no_evidence' or 'failed'
+    score = Column(Integer, nullable=True)  # 0 (unknown) to 3 (strong)
+    summary = Column(Text, nullable=True)
+    gaps = Column(JSONType, nullable=True)  # What is still missing, as a list of strings
+    evidence_node_ids = Column(JSONType, nullable=True)  # Relevant nodes the assessment was made from
+    error = Column(Text, nullable=True)
+
+    model = Column(String, nullable=True)
+    input_tokens = Column(Integer, nullable=True)
+    output_tokens = Column(Integer, nullable=True)
+    assessed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("canvas_id", "dimension", name="uq_scorecard_dimensions_canvas_dimension"),
+    )
+
+    # Relationships
+    canvas = relationship("Canvas")
+
+    def __repr__(self):
+        return f"<ScorecardDimension canvas={self.canvas_id} {self.dimension}={self.score} ({self.status})>"
@@ -0,0 +1,55 @@
+"""LLM usage models"""
+from sqlalchemy import Column, String, Integer, Float, Date, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class LLMUsage(BaseModel):
+    """Ledger entry: one row per upstream model call"""
+
+    __tablename__ = "llm_usage"
+
+    model = Column(String, nullable=False)
+    provider = Column(String, nullable=False)  # 'bedrock', 'bedrock_batch', ...
+    operation = Column(String, nullable=False)  # 'chat', 'node_summary', 'compaction', 'portfolio'
+    chat_type = Column(String, nullable=True)
+
+    # Attribution (no foreign keys: the ledger outlives deleted canvases/chats)
+    canvas_id = Column(Integer, nullable=True, index=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    chat_id = Column(Integer, nullable=True)
+
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_tokens = Column(Integer, nullable=False, default=0)
+    cache_write_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=True)  # Whole call (or stream) duration
+    ttft_ms = Column(Float, nullable=True)  # Time to first token (streams only)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<LLMUsage {self.operation} {self.model} ${self.cost_usd:.4f}>"
+
+
+class LLMUsageDaily(BaseModel):
+    """Daily usage rollup per canvas, user and model, maintained on each ledger insert"""
+
+    __tablename__ = "llm_usage_daily"
+    __table_args__ = (
+        UniqueConstraint("day", "canvas_id", "user_id", "model", name="uq_llm_usage_daily_key"),
+    )
+
+    day = Column(Date, nullable=False, index=True)
+    canvas_id = Column(Integer, nullable=False, default=0)  # 0 = not attributed to a canvas
+    user_id = Column(Integer, nullable=False, default=0)  # 0 = not attributed to a user
+    model = Column(String, nullable=False)
+
+    call_count = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_tokens = Column(Integer, nullable=False, default=0)
+    cache_write_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms_total = Column(Float, nullable=False, default=0.0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<LLMUsageDaily {self.day} canvas={self.canvas_id} user={self.user_id} ${self.cost_usd:.2f}>"
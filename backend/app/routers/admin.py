@@ -1,5 +1,18 @@
 """Admin endpoints"""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from typing import Literal, Optional
+from app.core.database import get_async_db
+from app.dependencies import get_current_admin
+from app.models.user import User
+from app.services.bedrock_pool import bedrock_pool
+from app.services.llm_scheduler import llm_scheduler
+from app.services.context_renderer import fragment_cache
+from app.services.result_cache import whats_next_cache
+from app.services.retrieval_index import retrieval_index
+from app.services.single_flight import llm_single_flight
+from app.services.usage_service import get_cost_report, quarter_start
 
 router = APIRouter(prefix="/admin")
 
@@ -72,3 +85,38 @@ async def update_prompt(prompt_key: str):
     """Update a prompt"""
     # TODO: Implement prompt update
     return {"prompt_key": prompt_key}
+
+
+@router.get("/llm/stats")
+async def get_llm_stats(current_user: User = Depends(get_current_admin)):
+    """LLM client and call statistics for monitoring"""
+    return {
+        "bedrock_pool": bedrock_pool.stats(),
+        "scheduler": llm_scheduler.stats(),
+        "single_flight": llm_single_flight.stats(),
+        "whats_next_cache": whats_next_cache.stats(),
+        "context_fragment_cache": fragment_cache.stats(),
+        "retrieval_index": retrieval_index.stats(),
+    }
+
+
+@router.get("/llm/costs")
+async def get_llm_costs(
+    group_by: Literal["canvas", "user", "model"] = "canvas",
+    start: Optional[date] = Query(None, description="First day (default: start of this quarter)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive (default: today, UTC)"),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """LLM usage and estimated cost per deal, user or model (from daily rollups)"""
+    # Rollup days are UTC dates
+    today = datetime.utcnow().date()
+    start = start or quarter_start(today)
+    end = end or today
+
+    return {
+        "group_by": group_by,
+        "start": start,
+        "end": end,
+        "groups": await db.run_sync(get_cost_report, group_by=group_by, start=start, end=end),
+    }
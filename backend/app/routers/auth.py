@@ -1,8 +1,8 @@
 """Authentication endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from fastapi.responses import RedirectResponse, Response
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.services.saml_service import init_saml_auth, parse_saml_response, get_saml_settings
 from app.services.user_service import bootstrap_admin_if_needed, update_user_saml_info
 from app.services.jwt_service import create_access_token
@@ -90,7 +90,7 @@ async def saml_acs(
     request: Request,
     SAMLResponse: str = Form(...),
     RelayState: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     SAML Assertion Consumer Service endpoint.
@@ -145,14 +145,14 @@ async def saml_acs(
             )
 
         # Bootstrap admin or get/create user
-        user = bootstrap_admin_if_needed(
+        user = await bootstrap_admin_if_needed(
             db,
             email=user_data['email'],
             full_name=user_data.get('full_name')
         )
 
         # Update SAML session info
-        update_user_saml_info(
+        await update_user_saml_info(
             db,
             user,
             saml_name_id=user_data.get('saml_name_id'),
@@ -1,8 +1,8 @@
 """Canvas management endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.dependencies import get_current_user, get_current_manager
 from app.models.user import User, UserRole
 from app.schemas.canvas_schemas import (
@@ -14,13 +14,12 @@ from app.schemas.canvas_schemas import (
     CanvasShareInfo,
     UserInfo,
 )
+from app.schemas.job_schemas import JobResponse
 from app.services.canvas_service import (
     get_canvas_by_id,
-    get_user_canvases,
-    get_all_canvases,
+    list_accessible_canvases,
     create_canvas as create_canvas_service,
     update_canvas as update_canvas_service,
-    delete_canvas as delete_canvas_service,
     archive_canvas as archive_canvas_service,
     unarchive_canvas,
     can_user_access_canvas,
@@ -29,6 +28,7 @@ from app.services.canvas_service import (
     unshare_canvas,
     get_canvas_shares,
 )
+from app.services.job_service import enqueue_job, get_active_job, job_workers
 from app.services.user_service import get_user_by_email
 import logging
 
@@ -36,25 +36,25 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/canvases")
 
 
-def check_canvas_access(db: Session, user: User, canvas_id: int, require_write: bool = False):
+async def check_canvas_access(db: AsyncSession, user: User, canvas_id: int, require_write: bool = False):
     """
     Helper to check canvas access and return canvas.
     Raises HTTPException if access denied.
     """
-    canvas = get_canvas_by_id(db, canvas_id)
+    canvas = await get_canvas_by_id(db, canvas_id)
     if not canvas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Canvas not found"
         )
 
-    if not can_user_access_canvas(db, user, canvas):
+    if not await can_user_access_canvas(db, user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
 
-    if require_write and not can_user_write_canvas(db, user, canvas):
+    if require_write and not await can_user_write_canvas(db, user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Write access required"
@@ -67,7 +67,7 @@ def check_canvas_access(db: Session, user: User, canvas_id: int, require_write:
 async def list_canvases(
     include_archived: bool = False,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all canvases accessible to current user.
@@ -75,26 +75,21 @@ async def list_canvases(
     - Regular users see their own canvases + shared canvases
     - Sales managers and admins see all canvases
     """
-    # Sales managers and admins can see all canvases
-    if current_user.role in [UserRole.ADMIN, UserRole.SALES_MANAGER]:
-        canvases = get_all_canvases(db, include_archived=include_archived)
-    else:
-        canvases = get_user_canvases(db, current_user, include_archived=include_archived)
+    # Sales managers and admins see all canvases; one query either way
+    canvases = await list_accessible_canvases(db, current_user, include_archived=include_archived)
 
     # Build response with additional metadata
     result = []
-    for canvas in canvases:
+    for canvas, owner_email, node_count, can_write in canvases:
         is_owner = canvas.owner_id == current_user.id
         is_shared = not is_owner
-        can_write = can_user_write_canvas(db, current_user, canvas)
-        node_count = len(canvas.nodes) if hasattr(canvas, 'nodes') else 0
 
         result.append(CanvasListItem(
             id=canvas.id,
             name=canvas.name,
             description=canvas.description,
             owner_id=canvas.owner_id,
-            owner_email=canvas.owner.email,
+            owner_email=owner_email,
             is_archived=canvas.is_archived,
             created_at=canvas.created_at,
             updated_at=canvas.updated_at,
@@ -111,14 +106,14 @@ async def list_canvases(
 async def create_canvas(
     canvas_data: CanvasCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new canvas.
 
     The current user becomes the owner.
     """
-    canvas = create_canvas_service(
+    canvas = await create_canvas_service(
         db,
         owner=current_user,
         name=canvas_data.name,
@@ -144,17 +139,17 @@ async def create_canvas(
 async def get_canvas(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get canvas details.
 
     User must have access to the canvas.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     is_owner = canvas.owner_id == current_user.id
-    can_write = can_user_write_canvas(db, current_user, canvas)
+    can_write = await can_user_write_canvas(db, current_user, canvas)
 
     return CanvasResponse(
         id=canvas.id,
@@ -176,16 +171,16 @@ async def update_canvas(
     canvas_id: int,
     canvas_data: CanvasUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update canvas details.
 
     User must have write access to the canvas.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id, require_write=True)
+    canvas = await check_canvas_access(db, current_user, canvas_id, require_write=True)
 
-    canvas = update_canvas_service(
+    canvas = await update_canvas_service(
         db,
         canvas,
         name=canvas_data.name,
@@ -210,18 +205,19 @@ async def update_canvas(
     )
 
 
-@router.delete("/{canvas_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{canvas_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_canvas(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Delete a canvas.
+    Delete a canvas in the background.
 
-    Only the owner can delete a canvas.
+    Only the owner can delete a canvas. Returns the delete job; poll
+    /jobs/{id} (or stream /jobs/{id}/events) until it completes.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     # Only owner or admin can delete
     if canvas.owner_id != current_user.id and current_user.role != UserRole.ADMIN:
@@ -230,21 +226,30 @@ async def delete_canvas(
             detail="Only the owner can delete a canvas"
         )
 
-    delete_canvas_service(db, canvas)
+    # The job queue is on sync sessions; run it on this session's sync half
+    job = await db.run_sync(
+        lambda sync_db: get_active_job(sync_db, "delete_canvas", canvas_id=canvas.id) or enqueue_job(
+            sync_db, "delete_canvas", {"canvas_id": canvas.id}, created_by_id=current_user.id
+        )
+    )
+    job_workers.notify()
+
+    logger.info(f"Canvas delete requested: {canvas.id} (job {job.id})")
+    return job
 
 
 @router.post("/{canvas_id}/archive", response_model=CanvasResponse)
 async def archive_canvas(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Archive a canvas.
 
     Only the owner can archive a canvas.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     if canvas.owner_id != current_user.id:
         raise HTTPException(
@@ -252,7 +257,7 @@ async def archive_canvas(
             detail="Only the owner can archive a canvas"
         )
 
-    canvas = archive_canvas_service(db, canvas)
+    canvas = await archive_canvas_service(db, canvas)
 
     return CanvasResponse(
         id=canvas.id,
@@ -273,14 +278,14 @@ async def archive_canvas(
 async def unarchive_canvas_endpoint(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Unarchive a canvas.
 
     Only the owner can unarchive a canvas.
     """
-    canvas = get_canvas_by_id(db, canvas_id)
+    canvas = await get_canvas_by_id(db, canvas_id)
     if not canvas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -293,7 +298,7 @@ async def unarchive_canvas_endpoint(
             detail="Only the owner can unarchive a canvas"
         )
 
-    canvas = unarchive_canvas(db, canvas)
+    canvas = await unarchive_canvas(db, canvas)
 
     return CanvasResponse(
         id=canvas.id,
@@ -315,14 +320,14 @@ async def share_canvas(
     canvas_id: int,
     share_data: CanvasShareCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Share canvas with another user.
 
     Only the owner can share a canvas.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     if canvas.owner_id != current_user.id:
         raise HTTPException(
@@ -331,7 +336,7 @@ async def share_canvas(
         )
 
     # Get user to share with
-    target_user = get_user_by_email(db, share_data.user_email)
+    target_user = await get_user_by_email(db, share_data.user_email)
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -345,7 +350,7 @@ async def share_canvas(
             detail="Cannot share canvas with yourself"
         )
 
-    share = share_canvas_service(db, canvas, target_user, share_data.can_write)
+    share = await share_canvas_service(db, canvas, target_user, share_data.can_write)
 
     return CanvasShareInfo(
         id=share.id,
@@ -365,14 +370,14 @@ async def unshare_canvas_endpoint(
     canvas_id: int,
     user_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Remove canvas share for a user.
 
     Only the owner can unshare a canvas.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     if canvas.owner_id != current_user.id:
         raise HTTPException(
@@ -380,28 +385,28 @@ async def unshare_canvas_endpoint(
             detail="Only the owner can unshare a canvas"
         )
 
-    target_user = db.query(User).filter(User.id == user_id).first()
+    target_user = await db.get(User, user_id)
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    unshare_canvas(db, canvas, target_user)
+    await unshare_canvas(db, canvas, target_user)
 
 
 @router.get("/{canvas_id}/shares", response_model=List[CanvasShareInfo])
 async def list_canvas_shares(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all users the canvas is shared with.
 
     Only the owner can view shares.
     """
-    canvas = check_canvas_access(db, current_user, canvas_id)
+    canvas = await check_canvas_access(db, current_user, canvas_id)
 
     if canvas.owner_id != current_user.id:
         raise HTTPException(
@@ -409,7 +414,7 @@ async def list_canvas_shares(
             detail="Only the owner can view shares"
         )
 
-    shares = get_canvas_shares(db, canvas)
+    shares = await get_canvas_shares(db, canvas)
 
     return [
         CanvasShareInfo(
@@ -1,22 +1,38 @@
 """Chat endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.background import run_in_background
+from app.core.database import AsyncSessionLocal, get_async_db
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.chat import Chat, ChatMessage
+from app.models.node import Node
+from app.core.config import settings
 from app.services.canvas_service import get_canvas_by_id, can_user_access_canvas
-from app.services.node_service import get_canvas_nodes
 from app.services.claude_service import (
     chat_with_claude,
-    build_canvas_context,
+    stream_claude,
     create_sales_assistant_prompt,
     create_whats_next_prompt,
+    create_context_prompt,
+    add_history_summary,
+    whats_next_cache_key,
 )
+from app.services.conversation_service import build_conversation
+from app.services.context_service import get_turn_context, pin_chat_context
+from app.services.result_cache import make_cache_key, whats_next_cache
+from app.services.usage_service import UsageContext
+from app.services.llm_gateway import LLMTimeoutError, LLMThrottledError
 from datetime import datetime
+import asyncio
+import json
 import logging
+import math
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chats")
@@ -32,6 +48,12 @@ class ChatCreate(BaseModel):
 class MessageCreate(BaseModel):
     content: str
     include_canvas_context: Optional[bool] = True  # Whether to include full canvas context
+    force_refresh: Optional[bool] = False  # Bypass cached "what's next" results
+
+
+class PersonaTurnCreate(BaseModel):
+    content: str
+    node_ids: List[int]  # Person nodes to answer the prompt
 
 
 class MessageResponse(BaseModel):
@@ -39,6 +61,9 @@ class MessageResponse(BaseModel):
     content: str
     created_at: datetime
     token_count: Optional[int] = None
+    input_tokens: Optional[int] = None
+    cache_read_tokens: Optional[int] = None
+    cache_write_tokens: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -53,21 +78,31 @@ class ChatResponse(BaseModel):
     message_count: int
 
 
-@router.get("/canvas/{canvas_id}", response_model=List[ChatResponse])
-async def list_canvas_chats(
-    canvas_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """List all chats for a canvas"""
-    canvas = get_canvas_by_id(db, canvas_id)
-    if not canvas:
-        raise HTTPException(status_code=404, detail="Canvas not found")
+async def check_chat_access(db: AsyncSession, user: User, chat_id: int):
+    """
+    Helper to check chat access via canvas permissions.
+    Raises HTTPException if not found or access denied.
+    """
+    chat = await db.get(Chat, chat_id)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
 
-    if not can_user_access_canvas(db, current_user, canvas):
+    canvas = await get_canvas_by_id(db, chat.canvas_id)
+    if not await can_user_access_canvas(db, user, canvas):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    chats = db.query(Chat).filter(Chat.canvas_id == canvas_id, Chat.node_id == None).all()
+    return chat, canvas
+
+
+async def list_chats(db: AsyncSession, *criteria) -> List[ChatResponse]:
+    """List the chats matching criteria with their message counts (one query)"""
+    message_count = (
+        select(func.count(ChatMessage.id))
+        .where(ChatMessage.chat_id == Chat.id)
+        .correlate(Chat)
+        .scalar_subquery()
+    )
+    result = await db.execute(select(Chat, message_count).where(*criteria))
 
     return [
         ChatResponse(
@@ -76,56 +111,59 @@ async def list_canvas_chats(
             canvas_id=chat.canvas_id,
             chat_type=chat.chat_type,
             created_at=chat.created_at,
-            message_count=len(chat.messages),
+            message_count=count,
         )
-        for chat in chats
+        for chat, count in result.all()
     ]
 
 
+@router.get("/canvas/{canvas_id}", response_model=List[ChatResponse])
+async def list_canvas_chats(
+    canvas_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List all chats for a canvas"""
+    canvas = await get_canvas_by_id(db, canvas_id)
+    if not canvas:
+        raise HTTPException(status_code=404, detail="Canvas not found")
+
+    if not await can_user_access_canvas(db, current_user, canvas):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return await list_chats(db, Chat.canvas_id == canvas_id, Chat.node_id.is_(None))
+
+
 @router.get("/node/{node_id}", response_model=List[ChatResponse])
 async def list_node_chats(
     node_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """List all chats for a specific node"""
-    from app.models.node import Node
-
-    node = db.query(Node).filter(Node.id == node_id).first()
+    node = await db.get(Node, node_id)
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
 
-    canvas = get_canvas_by_id(db, node.canvas_id)
-    if not can_user_access_canvas(db, current_user, canvas):
+    canvas = await get_canvas_by_id(db, node.canvas_id)
+    if not await can_user_access_canvas(db, current_user, canvas):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    chats = db.query(Chat).filter(Chat.node_id == node_id).all()
-
-    return [
-        ChatResponse(
-            id=chat.id,
-            name=chat.name,
-            canvas_id=chat.canvas_id,
-            chat_type=chat.chat_type,
-            created_at=chat.created_at,
-            message_count=len(chat.messages),
-        )
-        for chat in chats
-    ]
+    return await list_chats(db, Chat.node_id == node_id)
 
 
 @router.post("/", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
 async def create_chat(
     chat_data: ChatCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new chat session"""
-    canvas = get_canvas_by_id(db, chat_data.canvas_id)
+    canvas = await get_canvas_by_id(db, chat_data.canvas_id)
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
 
-    if not can_user_access_canvas(db, current_user, canvas):
+    if not await can_user_access_canvas(db, current_user, canvas):
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Create chat
@@ -135,12 +173,12 @@ async def create_chat(
         chat_type=chat_data.chat_type,
         node_id=chat_data.node_id,
         parent_chat_id=None,
-        context_snapshot=None,  # Will be built on first message
+        context_snapshot=None,  # Built on first message (see context_service)
     )
 
     db.add(chat)
-    db.commit()
-    db.refresh(chat)
+    await db.commit()
+    await db.refresh(chat)
 
     logger.info(f"Chat created: {chat.id} for canvas {canvas.id}")
 
@@ -158,75 +196,45 @@ async def create_chat(
 async def get_chat_messages(
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get all messages in a chat"""
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
 
-    canvas = get_canvas_by_id(db, chat.canvas_id)
-    if not can_user_access_canvas(db, current_user, canvas):
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    return chat.messages
+    result = await db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.chat_id == chat.id)
+        .order_by(ChatMessage.created_at, ChatMessage.id)
+    )
+    return result.scalars().all()
 
 
-@router.post("/{chat_id}/messages", response_model=MessageResponse)
-async def send_message(
-    chat_id: int,
+async def prepare_claude_request(
+    db: AsyncSession,
+    chat: Chat,
+    canvas,
     message_data: MessageCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Send a message and get Claude's response"""
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    canvas = get_canvas_by_id(db, chat.canvas_id)
-    if not can_user_access_canvas(db, current_user, canvas):
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    # Build context from canvas or node
-    if not message_data.include_canvas_context and chat.node_id:
-        # Only include this specific node's context
-        from app.models.node import Node
-        node = db.query(Node).filter(Node.id == chat.node_id).first()
-        if node:
-            nodes_data = [
-                {
-                    'title': node.title,
-                    'node_type': node.node_type,
-                    'data': node.data,
-                    'exclude_from_context': False,
-                }
-            ]
-            canvas_data = {
-                'name': canvas.name,
-                'description': f"Focus: {node.title}",
-            }
-        else:
-            nodes_data = []
-            canvas_data = {'name': canvas.name, 'description': canvas.description}
-    else:
-        # Include full canvas context
-        nodes = get_canvas_nodes(db, canvas)
-        nodes_data = [
-            {
-                'title': n.title,
-                'node_type': n.node_type,
-                'data': n.data,
-                'exclude_from_context': n.exclude_from_context,
-            }
-            for n in nodes
-        ]
-        canvas_data = {
-            'name': canvas.name,
-            'description': canvas.description,
-        }
-
-    canvas_context = build_canvas_context(canvas_data, nodes_data)
+    user_id: Optional[int] = None,
+) -> tuple[List[dict], List[dict], dict]:
+    """
+    Build the system prompt and conversation history for a chat turn.
+    Saves the user's message as a side effect.
+
+    Full-canvas context comes from the chat's snapshot, built on the first
+    message; the returned info reports its hash and any truncated or
+    dropped nodes. Large canvases send an outline in the system prompt and
+    attach the chunks relevant to the message to it. Long chats send only their recent turns verbatim, with
+    older turns folded into a running summary in the system prompt.
+    """
+    # Build context from canvas or node (context assembly is sync ORM code;
+    # run_sync keeps its queries on the async engine)
+    canvas_context, excerpts, context_info = await db.run_sync(
+        get_turn_context,
+        chat,
+        canvas,
+        message_data.content,
+        node_only=bool(not message_data.include_canvas_context and chat.node_id),
+    )
 
     # Build system prompt based on chat type
     if chat.chat_type == 'sales_assistant':
@@ -234,7 +242,7 @@ async def send_message(
     elif chat.chat_type == 'whats_next':
         system_prompt = create_whats_next_prompt(canvas_context)
     else:
-        system_prompt = canvas_context
+        system_prompt = create_context_prompt(canvas_context)
 
     # Save user message
     user_message = ChatMessage(
@@ -244,44 +252,139 @@ async def send_message(
         token_count=None,
     )
     db.add(user_message)
-    db.commit()
-
-    # Build messages for Claude (conversation history)
-    previous_messages = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.chat_id == chat.id, ChatMessage.role.in_(['user', 'assistant']))
-        .order_by(ChatMessage.created_at)
-        .all()
+    await db.commit()
+
+    # Build messages for Claude (recent turns + running summary)
+    claude_messages, history_summary = await build_conversation(db, chat, user_id)
+    system_prompt = add_history_summary(system_prompt, history_summary)
+
+    # End the read transaction: no connection is held during the model call
+    await db.commit()
+
+    # Retrieved excerpts ride on this turn only (not saved, not cached)
+    if excerpts:
+        claude_messages[-1] = {
+            'role': 'user',
+            'content': f"{excerpts}---\n\n{message_data.content}",
+        }
+
+    return system_prompt, claude_messages, context_info
+
+
+def lookup_cached_response(
+    chat: Chat,
+    message_data: MessageCreate,
+    system_prompt: List[dict],
+    context_info: dict,
+) -> tuple[Optional[str], Optional[dict]]:
+    """
+    Look up a cached result for cacheable chat types ("what's next").
+
+    Returns:
+        (cache_key, cached_response); cache_key is None if not cacheable,
+        cached_response is None on a miss or forced refresh
+    """
+    if chat.chat_type != 'whats_next':
+        return None, None
+
+    # Node-focused turns have no stored snapshot; hash their prompt instead
+    context_hash = context_info.get('hash') or make_cache_key(system=system_prompt)
+    cache_key = whats_next_cache_key(context_hash, message_data.content, max_tokens=4096)
+    if message_data.force_refresh:
+        return cache_key, None
+
+    return cache_key, whats_next_cache.get(cache_key)
+
+
+async def replay_cached_response(response: dict):
+    """Replay a cached response in the stream_claude event format"""
+    yield {"type": "text", "text": response['content']}
+    yield {
+        "type": "done",
+        "usage": {},
+        "stop_reason": response.get('stop_reason'),
+        "model": response.get('model'),
+    }
+
+
+def chat_usage_context(chat: Chat, user: User) -> UsageContext:
+    """Attribute a chat turn's model call for the usage ledger"""
+    return UsageContext(
+        operation='chat',
+        chat_type=chat.chat_type,
+        canvas_id=chat.canvas_id,
+        user_id=user.id,
+        chat_id=chat.id,
     )
 
-    claude_messages = [
-        {'role': msg.role, 'content': msg.content}
-        for msg in previous_messages
-    ]
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/{chat_id}/messages", response_model=MessageResponse)
+async def send_message(
+    chat_id: int,
+    message_data: MessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Send a message and get Claude's response"""
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
+
+    system_prompt, claude_messages, context_info = await prepare_claude_request(
+        db, chat, canvas, message_data, user_id=current_user.id
+    )
+    cache_key, cached = lookup_cached_response(chat, message_data, system_prompt, context_info)
 
     try:
-        # Call Claude
-        response = chat_with_claude(
-            messages=claude_messages,
-            system_prompt=system_prompt,
-            max_tokens=4096,
-        )
+        if cached is not None:
+            logger.info(f"Serving cached result: chat={chat.id}")
+            response = {**cached, "usage": {}}
+        else:
+            # Call Claude
+            response = await chat_with_claude(
+                messages=claude_messages,
+                system_prompt=system_prompt,
+                max_tokens=4096,
+                usage_context=chat_usage_context(chat, current_user),
+            )
+
+            if cache_key:
+                whats_next_cache.set(cache_key, response)
 
         # Save assistant response
         assistant_message = ChatMessage(
             chat_id=chat.id,
             role='assistant',
             content=response['content'],
-            token_count=response.get('usage', {}).get('output_tokens'),
+            **usage_columns(response.get('usage', {})),
         )
         db.add(assistant_message)
-        db.commit()
-        db.refresh(assistant_message)
+        await db.commit()
+        await db.refresh(assistant_message)
 
-        logger.info(f"Chat message processed: chat={chat.id}, tokens={assistant_message.token_count}")
+        logger.info(
+            f"Chat message processed: chat={chat.id}, tokens={assistant_message.token_count}, "
+            f"cache_read={assistant_message.cache_read_tokens}, cache_write={assistant_message.cache_write_tokens}"
+        )
 
         return assistant_message
 
+    except LLMTimeoutError as e:
+        logger.error(f"AI response timed out: {e}")
+        raise HTTPException(
+            status_code=504,
+            detail=str(e)
+        )
+    except LLMThrottledError as e:
+        logger.warning(f"AI response throttled: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="AI service is busy, please retry shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         logger.error(f"Error getting AI response: {e}")
         raise HTTPException(
@@ -290,23 +393,362 @@ async def send_message(
         )
 
 
+def usage_columns(usage: dict) -> dict:
+    """Map a model response's usage block to ChatMessage token columns"""
+    return {
+        'token_count': usage.get('output_tokens'),
+        'input_tokens': usage.get('input_tokens'),
+        'cache_read_tokens': usage.get('cache_read_input_tokens'),
+        'cache_write_tokens': usage.get('cache_creation_input_tokens'),
+    }
+
+
+async def save_assistant_message(chat_id: int, content: str, usage: dict) -> ChatMessage:
+    """
+    Save an assistant message using its own session.
+    Streaming responses outlive the request-scoped session.
+    """
+    async with AsyncSessionLocal() as db:
+        message = ChatMessage(
+            chat_id=chat_id,
+            role='assistant',
+            content=content,
+            **usage_columns(usage),
+        )
+        db.add(message)
+        await db.commit()
+        await db.refresh(message)
+        return message
+
+
+@router.post("/{chat_id}/messages/stream")
+async def stream_message(
+    chat_id: int,
+    message_data: MessageCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Send a message and stream Claude's response as server-sent events.
+
+    Emits `delta` events with text chunks, then a single `done` event
+    carrying the saved message, usage and time-to-first-token. The full
+    assistant message is saved when the stream ends; if the stream is cut
+    off (client disconnect or upstream error) whatever was received so far
+    is saved instead.
+    """
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
+
+    system_prompt, claude_messages, context_info = await prepare_claude_request(
+        db, chat, canvas, message_data, user_id=current_user.id
+    )
+    cache_key, cached = lookup_cached_response(chat, message_data, system_prompt, context_info)
+    saved_chat_id = chat.id
+
+    async def event_stream():
+        started_at = time.perf_counter()
+        first_token_ms = None
+        parts: List[str] = []
+        finished = False
+
+        try:
+            if cached is not None:
+                logger.info(f"Serving cached result: chat={saved_chat_id}")
+                events = replay_cached_response(cached)
+            else:
+                events = stream_claude(
+                    messages=claude_messages,
+                    system_prompt=system_prompt,
+                    max_tokens=4096,
+                    usage_context=chat_usage_context(chat, current_user),
+                )
+
+            async for event in events:
+                if event['type'] == 'text':
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                        logger.info(f"Chat stream first token: chat={saved_chat_id}, ttft_ms={first_token_ms}")
+                    parts.append(event['text'])
+                    yield format_sse("delta", {"text": event['text']})
+                elif event['type'] == 'done':
+                    if cache_key and cached is None:
+                        whats_next_cache.set(cache_key, {
+                            "content": "".join(parts),
+                            "usage": event.get('usage', {}),
+                            "stop_reason": event.get('stop_reason'),
+                            "model": event.get('model'),
+                        })
+
+                    message = await save_assistant_message(
+                        saved_chat_id,
+                        "".join(parts),
+                        event.get('usage', {}),
+                    )
+                    finished = True
+
+                    total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                    logger.info(
+                        f"Chat stream processed: chat={saved_chat_id}, tokens={message.token_count}, "
+                        f"ttft_ms={first_token_ms}, total_ms={total_ms}"
+                    )
+
+                    yield format_sse("done", {
+                        "message": MessageResponse.model_validate(message).model_dump(mode="json"),
+                        "usage": event.get('usage', {}),
+                        "stop_reason": event.get('stop_reason'),
+                        "ttft_ms": first_token_ms,
+                        "total_ms": total_ms,
+                        "cached": cached is not None,
+                        "context": context_info,
+                    })
+        except LLMThrottledError as e:
+            logger.warning(f"AI stream throttled: {e}")
+            yield format_sse("error", {
+                "detail": "AI service is busy, please retry shortly",
+                "retry_after": math.ceil(e.retry_after),
+            })
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {e}")
+            yield format_sse("error", {"detail": f"Failed to get AI response: {str(e)}"})
+        finally:
+            if not finished and parts:
+                # Own task: a disconnect cancels this stream, not the save
+                run_in_background(save_assistant_message(saved_chat_id, "".join(parts), {}))
+                logger.warning(f"Chat stream cut off, saving partial response: chat={saved_chat_id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def get_or_create_persona_chat(db: AsyncSession, canvas_id: int, node: Node) -> Chat:
+    """Get the node's persona chat, creating it on first use"""
+    result = await db.execute(
+        select(Chat)
+        .where(Chat.node_id == node.id, Chat.chat_type == 'persona')
+        .order_by(Chat.id)
+        .limit(1)
+    )
+    chat = result.scalars().first()
+    if chat:
+        return chat
+
+    chat = Chat(
+        name=f"{node.title} Persona",
+        canvas_id=canvas_id,
+        chat_type='persona',
+        node_id=node.id,
+        parent_chat_id=None,
+        context_snapshot=None,
+    )
+    db.add(chat)
+    await db.commit()
+    await db.refresh(chat)
+
+    logger.info(f"Persona chat created: {chat.id} for node {node.id}")
+    return chat
+
+
+async def prepare_persona_turn(
+    canvas,
+    node: Node,
+    message_data: MessageCreate,
+    current_user: User,
+) -> tuple:
+    """
+    Get or create a person's persona chat and build its request on a
+    session of its own, so several personas can be prepared at once.
+
+    Returns:
+        Arguments for run_persona_turn after the queue
+    """
+    async with AsyncSessionLocal() as db:
+        chat = await get_or_create_persona_chat(db, canvas.id, node)
+        system_prompt, claude_messages, _ = await prepare_claude_request(
+            db, chat, canvas, message_data, user_id=current_user.id
+        )
+        return chat.id, node.id, system_prompt, claude_messages, chat_usage_context(chat, current_user)
+
+
+async def run_persona_turn(
+    queue: asyncio.Queue,
+    chat_id: int,
+    node_id: int,
+    system_prompt,
+    claude_messages: List[dict],
+    usage_context: UsageContext,
+):
+    """
+    Stream one persona's reply into a shared queue as SSE strings.
+
+    The reply is saved when its stream ends (or whatever arrived, if cut off).
+    """
+    tag = {"chat_id": chat_id, "node_id": node_id}
+    started_at = time.perf_counter()
+    first_token_ms = None
+    parts: List[str] = []
+    finished = False
+
+    try:
+        events = stream_claude(
+            messages=claude_messages,
+            system_prompt=system_prompt,
+            max_tokens=4096,
+            usage_context=usage_context,
+        )
+
+        async for event in events:
+            if event['type'] == 'text':
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                parts.append(event['text'])
+                await queue.put(format_sse("delta", {**tag, "text": event['text']}))
+            elif event['type'] == 'done':
+                message = await save_assistant_message(chat_id, "".join(parts), event.get('usage', {}))
+                finished = True
+
+                total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                logger.info(
+                    f"Persona turn processed: chat={chat_id}, tokens={message.token_count}, "
+                    f"ttft_ms={first_token_ms}, total_ms={total_ms}"
+                )
+
+                await queue.put(format_sse("done", {
+                    **tag,
+                    "message": MessageResponse.model_validate(message).model_dump(mode="json"),
+                    "usage": event.get('usage', {}),
+                    "stop_reason": event.get('stop_reason'),
+                    "ttft_ms": first_token_ms,
+                    "total_ms": total_ms,
+                }))
+    except LLMThrottledError as e:
+        logger.warning(f"Persona turn throttled: chat={chat_id}: {e}")
+        await queue.put(format_sse("error", {
+            **tag,
+            "detail": "AI service is busy, please retry shortly",
+            "retry_after": math.ceil(e.retry_after),
+        }))
+    except Exception as e:
+        logger.error(f"Error streaming persona turn: chat={chat_id}: {e}")
+        await queue.put(format_sse("error", {**tag, "detail": f"Failed to get AI response: {str(e)}"}))
+    finally:
+        if not finished and parts:
+            run_in_background(save_assistant_message(chat_id, "".join(parts), {}))
+            logger.warning(f"Persona turn cut off, saving partial response: chat={chat_id}")
+
+
+@router.post("/canvas/{canvas_id}/personas/stream")
+async def stream_persona_turns(
+    canvas_id: int,
+    turn_data: PersonaTurnCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Put one prompt to several person nodes and stream their replies concurrently.
+
+    Each person answers in their own persona chat (created on first use)
+    with context focused on their node only. Events from all personas are
+    interleaved on one server-sent event stream; `delta`, `done` and
+    `error` events carry `chat_id` and `node_id`, and a final `end` event
+    follows once every persona has finished.
+    """
+    canvas = await get_canvas_by_id(db, canvas_id)
+    if not canvas:
+        raise HTTPException(status_code=404, detail="Canvas not found")
+
+    if not await can_user_access_canvas(db, current_user, canvas):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    node_ids = list(dict.fromkeys(turn_data.node_ids))
+    if not node_ids:
+        raise HTTPException(status_code=400, detail="At least one person node is required")
+    if len(node_ids) > settings.persona_simulation_max_personas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.persona_simulation_max_personas} personas per turn",
+        )
+
+    result = await db.execute(select(Node).where(Node.id.in_(node_ids), Node.canvas_id == canvas_id))
+    nodes = {node.id: node for node in result.scalars()}
+    for node_id in node_ids:
+        node = nodes.get(node_id)
+        if not node:
+            raise HTTPException(status_code=404, detail=f"Node {node_id} not found on this canvas")
+        if node.node_type != 'person':
+            raise HTTPException(status_code=400, detail=f"Node {node_id} is not a person")
+
+    # Persona turns use node-focused context only
+    message_data = MessageCreate(content=turn_data.content, include_canvas_context=False)
+
+    # Personas are prepared concurrently, each on its own session (a turn
+    # can wait on the database or on compacting a long persona chat)
+    turns = await asyncio.gather(*(
+        prepare_persona_turn(canvas, nodes[node_id], message_data, current_user)
+        for node_id in node_ids
+    ))
+
+    logger.info(f"Persona turn started: canvas={canvas_id}, personas={len(turns)}")
+
+    async def event_stream():
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [asyncio.create_task(run_persona_turn(queue, *turn)) for turn in turns]
+        all_done = asyncio.gather(*tasks)
+
+        try:
+            while not (all_done.done() and queue.empty()):
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, all_done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+
+            yield format_sse("end", {"chat_ids": [turn[0] for turn in turns]})
+        finally:
+            # Client went away: stop the remaining personas (partials are saved)
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{chat_id}/refresh-context")
+async def refresh_chat_context(
+    chat_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Rebuild the chat's context snapshot from the current canvas, deciding
+    again between full context and retrieval.
+
+    Chats otherwise keep the canvas as it was at their first message (ADR-005).
+    """
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
+
+    _, context_info = await db.run_sync(pin_chat_context, chat, canvas)
+
+    return {"message": "Chat context refreshed", "context": context_info}
+
+
 @router.delete("/{chat_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_chat(
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Delete a chat"""
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    canvas = get_canvas_by_id(db, chat.canvas_id)
-    if not can_user_access_canvas(db, current_user, canvas):
-        raise HTTPException(status_code=403, detail="Access denied")
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
 
-    db.delete(chat)
-    db.commit()
+    await db.delete(chat)
+    await db.commit()
 
     logger.info(f"Chat deleted: {chat_id}")
 
@@ -316,18 +758,12 @@ async def rename_chat(
     chat_id: int,
     name: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Rename a chat"""
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    canvas = get_canvas_by_id(db, chat.canvas_id)
-    if not can_user_access_canvas(db, current_user, canvas):
-        raise HTTPException(status_code=403, detail="Access denied")
+    chat, canvas = await check_chat_access(db, current_user, chat_id)
 
     chat.name = name
-    db.commit()
+    await db.commit()
 
     return {"message": "Chat renamed successfully"}
@@ -5,9 +5,9 @@ WARNING: These endpoints bypass SAML and should ONLY be used in development.
 DO NOT enable in production!
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.services.user_service import bootstrap_admin_if_needed
 from app.services.jwt_service import create_access_token
@@ -28,7 +28,7 @@ class DevLoginRequest(BaseModel):
 @router.post("/login")
 async def dev_login(
     login_req: DevLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Development-only login endpoint that bypasses SAML.
@@ -51,7 +51,7 @@ async def dev_login(
         )
 
     # Bootstrap admin or create/get user
-    user = bootstrap_admin_if_needed(
+    user = await bootstrap_admin_if_needed(
         db,
         email=login_req.email,
         full_name=login_req.full_name
@@ -12,7 +12,7 @@ async def health_check():
     Health check endpoint.
     Returns system health status including database connection.
     """
-    db_healthy = check_db_connection()
+    db_healthy = await check_db_connection()
 
     health_status = {
         "service": "deep-thought",
@@ -0,0 +1,122 @@
+"""Background job status endpoints"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.dependencies import get_current_user
+from app.models.job import Job
+from app.models.user import User, UserRole
+from app.schemas.job_schemas import JobResponse
+from app.services.canvas_service import can_user_access_canvas, get_canvas_by_id
+from app.services.job_service import get_job, job_status
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs")
+
+TERMINAL_STATUSES = ('complete', 'failed')
+
+
+async def can_user_read_job(db: AsyncSession, user: User, job: Job) -> bool:
+    """
+    Check if a user may see a job.
+
+    Creators and admins see every job. Requests that find a job already
+    running return it to whoever asked, so those users can see it too:
+    anyone with access to the canvas for a scorecard refresh, managers for
+    a portfolio run, and the canvas owner for a canvas delete.
+    """
+    if job.created_by_id == user.id or user.role == UserRole.ADMIN:
+        return True
+
+    if job.job_type == 'portfolio_whats_next':
+        return user.role == UserRole.SALES_MANAGER
+
+    canvas_id = (job.payload or {}).get('canvas_id')
+    canvas = await get_canvas_by_id(db, canvas_id) if canvas_id is not None else None
+    if canvas is None:
+        return False
+
+    if job.job_type == 'scorecard_refresh':
+        return await can_user_access_canvas(db, user, canvas)
+    if job.job_type == 'delete_canvas':
+        return canvas.owner_id == user.id
+
+    return False
+
+
+async def check_job_access(db: AsyncSession, user: User, job_id: int) -> Job:
+    """
+    Helper to load a job visible to the user.
+    Raises HTTPException if not found or access denied.
+    """
+    job = await db.run_sync(get_job, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    if not await can_user_read_job(db, user, job):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get a background job's status, progress and result"""
+    return await check_job_access(db, current_user, job_id)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream a job's status as server-sent events.
+
+    Emits a `status` event whenever the status or progress changes (polled
+    every settings.job_poll_interval_seconds), ending after the job
+    completes or fails.
+    """
+    await check_job_access(db, current_user, job_id)
+
+    async def event_stream():
+        last = None
+        while True:
+            # The request session is closed once streaming starts
+            async with AsyncSessionLocal() as poll_db:
+                job = await poll_db.run_sync(get_job, job_id)
+                current = JobResponse.model_validate(job_status(job)).model_dump(mode="json") if job else None
+
+            if current is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'Job not found'})}\n\n"
+                return
+
+            if current != last:
+                yield f"event: status\ndata: {json.dumps(current)}\n\n"
+                last = current
+
+            if current["status"] in TERMINAL_STATUSES:
+                return
+
+            await asyncio.sleep(settings.job_poll_interval_seconds)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,8 @@
 """Node management endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.node_schemas import (
@@ -30,32 +30,32 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/nodes")
 
 
-def check_node_access(db: Session, user: User, node_id: int, require_write: bool = False):
+async def check_node_access(db: AsyncSession, user: User, node_id: int, require_write: bool = False):
     """
     Helper to check node access via canvas permissions.
     Raises HTTPException if access denied.
     """
-    node = get_node_by_id(db, node_id)
+    node = await get_node_by_id(db, node_id)
     if not node:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Node not found"
         )
 
-    canvas = get_canvas_by_id(db, node.canvas_id)
+    canvas = await get_canvas_by_id(db, node.canvas_id)
     if not canvas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Canvas not found"
         )
 
-    if not can_user_access_canvas(db, user, canvas):
+    if not await can_user_access_canvas(db, user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
 
-    if require_write and not can_user_write_canvas(db, user, canvas):
+    if require_write and not await can_user_write_canvas(db, user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Write access required"
@@ -95,27 +95,27 @@ async def list_node_types():
 async def list_canvas_nodes(
     canvas_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get all nodes for a canvas.
 
     User must have access to the canvas.
     """
-    canvas = get_canvas_by_id(db, canvas_id)
+    canvas = await get_canvas_by_id(db, canvas_id)
     if not canvas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Canvas not found"
         )
 
-    if not can_user_access_canvas(db, current_user, canvas):
+    if not await can_user_access_canvas(db, current_user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
 
-    nodes = get_canvas_nodes(db, canvas)
+    nodes = await get_canvas_nodes(db, canvas)
     return nodes
 
 
@@ -123,27 +123,27 @@ async def list_canvas_nodes(
 async def create_node(
     node_data: NodeCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new node.
 
     User must have write access to the canvas.
     """
-    canvas = get_canvas_by_id(db, node_data.canvas_id)
+    canvas = await get_canvas_by_id(db, node_data.canvas_id)
     if not canvas:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Canvas not found"
         )
 
-    if not can_user_write_canvas(db, current_user, canvas):
+    if not await can_user_write_canvas(db, current_user, canvas):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Write access required"
         )
 
-    node = create_node_service(
+    node = await create_node_service(
         db,
         canvas=canvas,
         node_type=node_data.node_type,
@@ -162,14 +162,14 @@ async def create_node(
 async def get_node(
     node_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get node details.
 
     User must have access to the canvas.
     """
-    node, canvas = check_node_access(db, current_user, node_id)
+    node, canvas = await check_node_access(db, current_user, node_id)
     return node
 
 
@@ -178,16 +178,16 @@ async def update_node(
     node_id: int,
     node_data: NodeUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update node details.
 
     User must have write access to the canvas.
     """
-    node, canvas = check_node_access(db, current_user, node_id, require_write=True)
+    node, canvas = await check_node_access(db, current_user, node_id, require_write=True)
 
-    node = update_node_service(
+    node = await update_node_service(
         db,
         node,
         title=node_data.title,
@@ -207,22 +207,22 @@ async def update_node(
 async def delete_node(
     node_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Delete a node.
 
     User must have write access to the canvas.
     """
-    node, canvas = check_node_access(db, current_user, node_id, require_write=True)
-    delete_node_service(db, node)
+    node, canvas = await check_node_access(db, current_user, node_id, require_write=True)
+    await delete_node_service(db, node)
 
 
 @router.post("/bulk-update-positions", response_model=List[NodeResponse])
 async def bulk_update_positions(
     bulk_update: BulkNodePositionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update positions of multiple nodes at once.
@@ -232,10 +232,10 @@ async def bulk_update_positions(
     """
     # Verify access to all nodes
     for update in bulk_update.updates:
-        node, canvas = check_node_access(db, current_user, update.id, require_write=True)
+        node, canvas = await check_node_access(db, current_user, update.id, require_write=True)
 
     # Perform bulk update
-    updated_nodes = bulk_update_node_positions(
+    updated_nodes = await bulk_update_node_positions(
         db,
         [{"id": u.id, "position_x": u.position_x, "position_y": u.position_y}
          for u in bulk_update.updates]
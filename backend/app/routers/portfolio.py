@@ -0,0 +1,104 @@
+"""Portfolio-wide analysis endpoints (managers and admins)"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from typing import List, Optional
+from app.core.database import get_async_db
+from app.dependencies import get_current_manager
+from app.models.user import User
+from app.services.portfolio_service import (
+    start_portfolio_run,
+    get_current_run,
+    run_status,
+    get_portfolio_results,
+)
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/portfolio")
+
+
+class PortfolioRunCreate(BaseModel):
+    provider: Optional[str] = None  # 'bedrock', 'bedrock_batch' or 'fake' (debug only)
+    force: bool = False  # Re-analyze unchanged canvases
+
+
+class PortfolioRunResponse(BaseModel):
+    id: str
+    job_id: int  # Background job (see /jobs/{id})
+    provider: str
+    status: str  # 'pending', 'running', 'complete', 'failed'
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    total: Optional[int] = None
+    completed: int = 0
+    skipped: Optional[int] = None
+    failed: Optional[int] = None
+    error: Optional[str] = None
+    batch_job_status: Optional[str] = None
+
+
+class PortfolioResultResponse(BaseModel):
+    canvas_id: int
+    canvas_name: str
+    owner_id: int
+    status: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    provider: str
+    model: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    analyzed_at: datetime
+    run_id: str
+
+
+@router.post("/whats-next/runs", response_model=PortfolioRunResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_portfolio_run(
+    run_data: PortfolioRunCreate = PortfolioRunCreate(),
+    current_user: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Start a "What's Next" analysis of every open deal.
+    Returns the in-progress run if one is already running.
+    """
+    try:
+        job = await db.run_sync(
+            start_portfolio_run, provider=run_data.provider, force=run_data.force, created_by_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    run = run_status(job)
+    logger.info(f"Portfolio run {run['id']} requested by {current_user.email}")
+    return run
+
+
+@router.get("/whats-next/runs/current", response_model=PortfolioRunResponse)
+async def get_portfolio_run(
+    current_user: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the status of the current (or most recent) portfolio run"""
+    run = await db.run_sync(get_current_run)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No portfolio run has started"
+        )
+
+    return run
+
+
+@router.get("/whats-next", response_model=List[PortfolioResultResponse])
+async def list_portfolio_results(
+    current_user: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the latest analysis of every open deal"""
+    return await db.run_sync(get_portfolio_results)
@@ -0,0 +1,94 @@
+"""Deal scorecard endpoints"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from typing import List, Optional
+from app.core.database import get_async_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.job_schemas import JobResponse
+from app.services.canvas_service import get_canvas_by_id, can_user_access_canvas
+from app.services.scorecard_service import get_scorecard, start_scorecard_refresh
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/canvases")
+
+
+class ScorecardRefresh(BaseModel):
+    force: bool = False  # Re-assess every dimension, changed or not
+
+
+class ScorecardDimensionResponse(BaseModel):
+    key: str
+    name: str
+    question: str
+    status: str  # 'pending', 'complete', 'no_evidence', 'failed'
+    score: Optional[int] = None
+    summary: Optional[str] = None
+    gaps: Optional[List[str]] = None
+    evidence_node_ids: Optional[List[int]] = None
+    error: Optional[str] = None
+    assessed_at: Optional[datetime] = None
+
+
+class ScorecardResponse(BaseModel):
+    canvas_id: int
+    dimensions: List[ScorecardDimensionResponse]
+    score: Optional[int] = None
+    max_score: int
+    assessed_at: Optional[datetime] = None
+
+
+async def check_scorecard_access(db: AsyncSession, user: User, canvas_id: int):
+    """
+    Helper to check canvas access for scorecard endpoints.
+    Raises HTTPException if not found or access denied.
+    """
+    canvas = await get_canvas_by_id(db, canvas_id)
+    if not canvas:
+        raise HTTPException(status_code=404, detail="Canvas not found")
+
+    if not await can_user_access_canvas(db, user, canvas):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return canvas
+
+
+@router.get("/{canvas_id}/scorecard", response_model=ScorecardResponse)
+async def read_scorecard(
+    canvas_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the canvas's MEDDPICC scorecard as last assessed.
+
+    Dimensions are only (re)assessed by a refresh; ones never assessed are 'pending'.
+    """
+    await check_scorecard_access(db, current_user, canvas_id)
+
+    return await db.run_sync(get_scorecard, canvas_id)
+
+
+@router.post("/{canvas_id}/scorecard/refresh", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def refresh_scorecard(
+    canvas_id: int,
+    refresh_data: ScorecardRefresh = ScorecardRefresh(),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Re-assess the scorecard dimensions whose relevant nodes changed.
+
+    Returns the refresh job (the running one if a refresh is in progress).
+    """
+    await check_scorecard_access(db, current_user, canvas_id)
+
+    job = await db.run_sync(
+        start_scorecard_refresh, canvas_id, force=refresh_data.force, created_by_id=current_user.id
+    )
+
+    logger.info(f"Scorecard refresh requested: canvas={canvas_id}, job={job.id}")
+    return job
@@ -0,0 +1,24 @@
+"""
+Pydantic schemas for background job endpoints.
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class JobResponse(BaseModel):
+    """Background job status (returned with 202 by long-running endpoints)"""
+    id: int
+    job_type: str
+    status: str  # 'queued', 'running', 'complete', 'failed'
+    attempts: int
+    max_attempts: int
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
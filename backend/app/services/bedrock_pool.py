@@ -0,0 +1,226 @@
+"""
+Process-wide Bedrock client pool.
+
+One boto3 session and one bedrock-runtime client are created at startup and
+shared by every model call. boto3 clients are thread-safe and keep a pool of
+keep-alive HTTPS connections, so calls after the first skip both credential
+resolution and the TLS handshake. A background thread refreshes SSO/role
+credentials before they expire so no request pays for the refresh.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator
+import boto3
+from botocore.config import Config
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BedrockClientPool:
+    """Shared bedrock-runtime client with usage stats and credential refresh"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._client = None
+        self._stop = threading.Event()
+        self._refresher: threading.Thread | None = None
+
+        # Stats
+        self._clients_created = 0
+        self._calls = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._credential_refreshes = 0
+        self._last_refresh_at: datetime | None = None
+
+    def start(self) -> None:
+        """
+        Create the client and start background credential refresh.
+        Safe to call more than once.
+        """
+        self.get_client()
+
+        if self._refresher is None or not self._refresher.is_alive():
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop,
+                name="bedrock-credential-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+
+        logger.info("Bedrock client pool started")
+
+    def stop(self) -> None:
+        """Stop background credential refresh"""
+        self._stop.set()
+
+    def get_client(self):
+        """
+        Get the shared bedrock-runtime client, creating it on first use.
+
+        Returns:
+            boto3 bedrock-runtime client
+        """
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                self._session = boto3.Session(
+                    profile_name=settings.aws_profile,
+                    region_name=settings.aws_bedrock_region
+                )
+                # Resolve credentials now rather than on the first request
+                self._session.get_credentials()
+
+                self._client = self._session.client(
+                    'bedrock-runtime',
+                    config=Config(
+                        # Match the gateway timeout so a timed-out call's
+                        # executor thread is freed soon after the caller
+                        # gives up; throttling is retried by the scheduler
+                        connect_timeout=settings.llm_timeout_seconds,
+                        read_timeout=settings.llm_timeout_seconds,
+                        retries={"total_max_attempts": 1},
+                        max_pool_connections=settings.llm_max_concurrency,
+                        tcp_keepalive=True,
+                    ),
+                )
+                self._clients_created += 1
+                logger.info(f"Bedrock client created (region={settings.aws_bedrock_region})")
+
+        return self._client
+
+    def aws_client(self, service_name: str):
+        """
+        Create a client for another AWS service on the shared session
+        (e.g. 'bedrock' or 's3' for batch inference).
+
+        Args:
+            service_name: boto3 service name
+
+        Returns:
+            boto3 client
+        """
+        self.get_client()
+        return self._session.client(service_name)
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """
+        Borrow the client for one call, tracking calls in flight.
+
+        Yields:
+            boto3 bedrock-runtime client
+        """
+        client = self.get_client()
+
+        with self._lock:
+            self._calls += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._in_use -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics for monitoring.
+
+        Returns:
+            Dict with calls in flight, HTTP connection pool numbers and
+            credential state
+        """
+        with self._lock:
+            return {
+                "clients_created": self._clients_created,
+                "calls": self._calls,
+                "calls_in_flight": self._in_use,
+                "peak_calls_in_flight": self._peak_in_use,
+                "connections": self._connection_stats(),
+                "credential_refreshes": self._credential_refreshes,
+                "last_credential_refresh_at": self._last_refresh_at,
+                "credentials_expire_at": self._credential_expiry(),
+            }
+
+    def _connection_stats(self) -> Dict[str, Any] | None:
+        """
+        Numbers from the client's urllib3 connection pools (one per host).
+
+        Returns:
+            Dict with connections opened, requests sent over them, idle
+            connections and the pool size; None before the client exists or
+            if botocore's internals change
+        """
+        if self._client is None:
+            return None
+
+        try:
+            manager = self._client._endpoint.http_session._manager
+            pools = [manager.pools[key] for key in manager.pools.keys()]
+            opened = sum(pool.num_connections for pool in pools)
+            requests = sum(pool.num_requests for pool in pools)
+            idle = sum(pool.pool.qsize() for pool in pools if pool.pool is not None)
+        except AttributeError:
+            return None
+
+        return {
+            "opened": opened,
+            "requests": requests,
+            "idle": idle,
+            "max_pool_connections": self._client.meta.config.max_pool_connections,
+            # Share of requests that went over an already open connection
+            "reuse_ratio": round(1 - opened / requests, 4) if requests else None,
+        }
+
+    def _credential_expiry(self) -> datetime | None:
+        """Expiry of the current credentials (None if static)"""
+        if self._session is None:
+            return None
+
+        credentials = self._session.get_credentials()
+        return getattr(credentials, "_expiry_time", None)
+
+    def _refresh_loop(self) -> None:
+        """Refresh credentials ahead of expiry until stopped"""
+        interval = settings.aws_credential_refresh_interval_seconds
+
+        while not self._stop.wait(interval):
+            try:
+                self._refresh_if_expiring()
+            except Exception as e:
+                # Never kill the loop; the next tick retries
+                logger.warning(f"Bedrock credential refresh failed: {e}")
+
+    def _refresh_if_expiring(self) -> None:
+        """Refresh credentials if they expire within the refresh window"""
+        expiry = self._credential_expiry()
+        if expiry is None:
+            return
+
+        remaining = (expiry - datetime.now(timezone.utc)).total_seconds()
+        if remaining > settings.aws_credential_refresh_window_seconds:
+            return
+
+        # botocore refreshes RefreshableCredentials inside its advisory
+        # window (15 min before expiry) when they are next read
+        self._session.get_credentials().get_frozen_credentials()
+        if self._credential_expiry() == expiry:
+            return
+
+        with self._lock:
+            self._credential_refreshes += 1
+            self._last_refresh_at = datetime.now(timezone.utc)
+
+        logger.info(f"Bedrock credentials refreshed ({int(remaining)}s before expiry)")
+
+
+bedrock_pool = BedrockClientPool()
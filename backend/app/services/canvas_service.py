@@ -1,16 +1,28 @@
 """
 Canvas management service.
+
+Functions take an AsyncSession unless suffixed _sync; the sync variants
+serve sync ORM code (context assembly, scorecards) run through run_sync.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, func, literal, or_, select, true, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 from app.models.canvas import Canvas, CanvasShare
+from app.models.chat import Chat, ChatMessage
+from app.models.node import Node
 from app.models.user import User, UserRole
-from typing import List
+from app.services.job_service import JobContext, job_handler
+from typing import Any, Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def get_canvas_by_id(db: Session, canvas_id: int) -> Canvas | None:
+async def get_canvas_by_id(db: AsyncSession, canvas_id: int) -> Canvas | None:
     """
     Get canvas by ID.
 
@@ -21,76 +33,98 @@ def get_canvas_by_id(db: Session, canvas_id: int) -> Canvas | None:
     Returns:
         Canvas object or None
     """
-    return db.query(Canvas).filter(Canvas.id == canvas_id).first()
+    result = await db.execute(select(Canvas).where(Canvas.id == canvas_id))
+    return result.scalars().first()
 
 
-def get_user_canvases(db: Session, user: User, include_archived: bool = False) -> List[Canvas]:
+def get_canvas_by_id_sync(db: Session, canvas_id: int) -> Canvas | None:
     """
-    Get all canvases accessible to a user (owned + shared).
+    Get canvas by ID (sync session).
 
     Args:
         db: Database session
-        user: User object
-        include_archived: Include archived canvases
+        canvas_id: Canvas ID
 
     Returns:
-        List of Canvas objects
+        Canvas object or None
     """
-    # Start with owned canvases
-    query = db.query(Canvas).filter(Canvas.owner_id == user.id)
-
-    if not include_archived:
-        query = query.filter(Canvas.is_archived == False)
-
-    owned_canvases = query.all()
-
-    # Add shared canvases
-    shared_query = (
-        db.query(Canvas)
-        .join(CanvasShare, Canvas.id == CanvasShare.canvas_id)
-        .filter(CanvasShare.user_id == user.id)
-    )
-
-    if not include_archived:
-        shared_query = shared_query.filter(Canvas.is_archived == False)
-
-    shared_canvases = shared_query.all()
-
-    # Combine and return
-    all_canvases = owned_canvases + shared_canvases
-
-    # Remove duplicates (shouldn't happen, but just in case)
-    seen = set()
-    unique_canvases = []
-    for canvas in all_canvases:
-        if canvas.id not in seen:
-            seen.add(canvas.id)
-            unique_canvases.append(canvas)
+    return db.execute(select(Canvas).where(Canvas.id == canvas_id)).scalars().first()
 
-    return unique_canvases
 
-
-def get_all_canvases(db: Session, include_archived: bool = False) -> List[Canvas]:
+async def list_accessible_canvases(
+    db: AsyncSession,
+    user: User,
+    include_archived: bool = False,
+) -> List[Tuple[Canvas, str, int, bool]]:
     """
-    Get all canvases (for sales managers/admins).
+    List the canvases a user can see, in one query.
+
+    Regular users see owned canvases plus those shared with them (a UNION of
+    the two, collapsed per canvas); sales managers and admins see all.
+    Owner email, node count and write access come from a join, a COUNT
+    subquery and a share check in the same statement, so the query count
+    doesn't grow with the number of canvases.
 
     Args:
         db: Database session
+        user: User object
         include_archived: Include archived canvases
 
     Returns:
-        List of Canvas objects
+        (canvas, owner_email, node_count, can_write) tuples, by canvas ID
     """
-    query = db.query(Canvas)
+    node_count = (
+        select(func.count(Node.id))
+        .where(Node.canvas_id == Canvas.id)
+        .correlate(Canvas)
+        .scalar_subquery()
+    )
+
+    if user.role in [UserRole.ADMIN, UserRole.SALES_MANAGER]:
+        if user.role == UserRole.ADMIN:
+            can_write = true()
+        else:
+            # Same rule as can_user_write_canvas: owner or a write share
+            can_write = or_(
+                Canvas.owner_id == user.id,
+                canvas_share_query(Canvas, user, require_write=True).correlate(Canvas).exists(),
+            )
+        query = select(Canvas, User.email, node_count, can_write)
+    else:
+        # 1 = write access; a canvas both owned and shared keeps the higher
+        visible = union_all(
+            select(Canvas.id.label("canvas_id"), literal(1).label("can_write"))
+            .where(Canvas.owner_id == user.id),
+            select(
+                CanvasShare.canvas_id.label("canvas_id"),
+                case((CanvasShare.can_write == True, 1), else_=0).label("can_write"),
+            )
+            .where(CanvasShare.user_id == user.id),
+        ).subquery()
+        access = (
+            select(visible.c.canvas_id, func.max(visible.c.can_write).label("can_write"))
+            .group_by(visible.c.canvas_id)
+            .subquery()
+        )
+        query = (
+            select(Canvas, User.email, node_count, access.c.can_write == 1)
+            .join(access, access.c.canvas_id == Canvas.id)
+        )
+
+    query = query.join(User, User.id == Canvas.owner_id)
 
     if not include_archived:
-        query = query.filter(Canvas.is_archived == False)
+        query = query.where(Canvas.is_archived == False)
 
-    return query.all()
+    result = await db.execute(query.order_by(Canvas.id))
+    return [
+        (canvas, owner_email, node_count, bool(can_write))
+        for canvas, owner_email, node_count, can_write in result.all()
+    ]
 
 
-def create_canvas(
-    db: Session,
+async def create_canvas(
+    db: AsyncSession,
     owner: User,
     name: str,
     description: str | None = None,
@@ -116,15 +150,15 @@ def create_canvas(
     )
 
     db.add(canvas)
-    db.commit()
-    db.refresh(canvas)
+    await db.commit()
+    await db.refresh(canvas)
 
     logger.info(f"Canvas created: {canvas.id} by user {owner.email}")
     return canvas
 
 
-def update_canvas(
-    db: Session,
+async def update_canvas(
+    db: AsyncSession,
     canvas: Canvas,
     name: str | None = None,
     description: str | None = None,
@@ -150,14 +184,14 @@ def update_canvas(
     if viewport is not None:
         canvas.viewport = viewport
 
-    db.commit()
-    db.refresh(canvas)
+    await db.commit()
+    await db.refresh(canvas)
 
     logger.info(f"Canvas updated: {canvas.id}")
     return canvas
 
 
-def delete_canvas(db: Session, canvas: Canvas) -> None:
+async def delete_canvas(db: AsyncSession, canvas: Canvas) -> None:
     """
     Delete a canvas and all associated data.
 
@@ -166,13 +200,92 @@ def delete_canvas(db: Session, canvas: Canvas) -> None:
         canvas: Canvas to delete
     """
     canvas_id = canvas.id
-    db.delete(canvas)
-    db.commit()
+    await db.delete(canvas)
+    await db.commit()
 
     logger.info(f"Canvas deleted: {canvas_id}")
 
 
-def archive_canvas(db: Session, canvas: Canvas) -> Canvas:
+async def delete_batch(db: AsyncSession, model, criterion, batch_size: int) -> int:
+    """
+    Delete up to batch_size matching rows in one transaction.
+
+    Args:
+        db: Database session
+        model: Model class
+        criterion: Filter selecting rows to delete
+        batch_size: Max rows to delete
+
+    Returns:
+        Rows deleted (0 when none are left)
+    """
+    result = await db.execute(select(model.id).where(criterion).limit(batch_size))
+    ids = result.scalars().all()
+    if not ids:
+        return 0
+
+    await db.execute(
+        delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return len(ids)
+
+
+@job_handler("delete_canvas")
+async def delete_canvas_job(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Delete a canvas and its data in small transactions (job handler).
+
+    Messages, chats and nodes go first in batches of
+    settings.job_delete_batch_size, each its own awaited transaction so
+    requests interleave with the delete, and the canvas row last. Safe to
+    re-run after a partial attempt.
+
+    Args:
+        ctx: Job context (progress counts deleted rows)
+        payload: {"canvas_id": ...}
+
+    Returns:
+        {"canvas_id": ..., "deleted_rows": ...}
+    """
+    canvas_id = payload["canvas_id"]
+    batch_size = settings.job_delete_batch_size
+
+    chat_ids = select(Chat.id).where(Chat.canvas_id == canvas_id).scalar_subquery()
+    stages = [
+        ("messages", ChatMessage, ChatMessage.chat_id.in_(chat_ids)),
+        ("chats", Chat, Chat.canvas_id == canvas_id),
+        ("nodes", Node, Node.canvas_id == canvas_id),
+        ("shares", CanvasShare, CanvasShare.canvas_id == canvas_id),
+    ]
+
+    async with AsyncSessionLocal() as db:
+        # Child chats point at their parent; unlink so chats delete in any order
+        await db.execute(
+            update(Chat)
+            .where(Chat.canvas_id == canvas_id, Chat.parent_chat_id.is_not(None))
+            .values(parent_chat_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+        deleted = ctx.progress.get("current", 0)
+        for stage, model, criterion in stages:
+            while True:
+                count = await delete_batch(db, model, criterion, batch_size)
+                if not count:
+                    break
+                deleted += count
+                ctx.set_progress(deleted, message=f"Deleting {stage}")
+
+        deleted += await delete_batch(db, Canvas, Canvas.id == canvas_id, 1)
+        ctx.set_progress(deleted, message="Done")
+
+    logger.info(f"Canvas deleted: {canvas_id} ({deleted} rows, job {ctx.job_id})")
+    return {"canvas_id": canvas_id, "deleted_rows": deleted}
+
+
+async def archive_canvas(db: AsyncSession, canvas: Canvas) -> Canvas:
     """
     Archive a canvas.
 
@@ -184,14 +297,14 @@ def archive_canvas(db: Session, canvas: Canvas) -> Canvas:
         Archived Canvas object
     """
     canvas.is_archived = True
-    db.commit()
-    db.refresh(canvas)
+    await db.commit()
+    await db.refresh(canvas)
 
     logger.info(f"Canvas archived: {canvas.id}")
     return canvas
 
 
-def unarchive_canvas(db: Session, canvas: Canvas) -> Canvas:
+async def unarchive_canvas(db: AsyncSession, canvas: Canvas) -> Canvas:
     """
     Unarchive a canvas.
 
@@ -203,47 +316,79 @@ def unarchive_canvas(db: Session, canvas: Canvas) -> Canvas:
         Unarchived Canvas object
     """
     canvas.is_archived = False
-    db.commit()
-    db.refresh(canvas)
+    await db.commit()
+    await db.refresh(canvas)
 
     logger.info(f"Canvas unarchived: {canvas.id}")
     return canvas
 
 
-def can_user_access_canvas(db: Session, user: User, canvas: Canvas) -> bool:
+def canvas_share_query(canvas: Canvas, user: User, require_write: bool = False) -> Select:
     """
-    Check if user has any access to canvas.
+    Build a query for the user's share of a canvas.
+
+    Args:
+        canvas: Canvas object, or the Canvas class for a correlated subquery
+        user: User object
+        require_write: Only match shares with write access
+
+    Returns:
+        Select returning the share ID if one exists
+    """
+    query = select(CanvasShare.id).where(
+        CanvasShare.canvas_id == canvas.id,
+        CanvasShare.user_id == user.id,
+    )
+
+    if require_write:
+        query = query.where(CanvasShare.can_write == True)
+
+    return query.limit(1)
+
+
+def has_role_access(user: User, canvas: Canvas, require_write: bool = False) -> bool:
+    """
+    Check access granted by ownership or role alone, without a share.
 
     Args:
-        db: Database session
         user: User object
         canvas: Canvas object
+        require_write: Check write access instead of read access
 
     Returns:
-        True if user can access canvas
+        True if the user has access without a share
     """
-    # Owner can always access
+    # Owner can always read and write
     if canvas.owner_id == user.id:
         return True
 
-    # Sales managers and admins can access all canvases
-    if user.role in [UserRole.ADMIN, UserRole.SALES_MANAGER]:
+    # Admins can write to all canvases; sales managers can read them all
+    if require_write:
+        return user.role == UserRole.ADMIN
+    return user.role in [UserRole.ADMIN, UserRole.SALES_MANAGER]
+
+
+async def can_user_access_canvas(db: AsyncSession, user: User, canvas: Canvas) -> bool:
+    """
+    Check if user has any access to canvas.
+
+    Args:
+        db: Database session
+        user: User object
+        canvas: Canvas object
+
+    Returns:
+        True if user can access canvas
+    """
+    if has_role_access(user, canvas):
         return True
 
     # Check if canvas is shared with user
-    share = (
-        db.query(CanvasShare)
-        .filter(
-            CanvasShare.canvas_id == canvas.id,
-            CanvasShare.user_id == user.id,
-        )
-        .first()
-    )
+    result = await db.execute(canvas_share_query(canvas, user))
+    return result.first() is not None
 
-    return share is not None
 
-
-def can_user_write_canvas(db: Session, user: User, canvas: Canvas) -> bool:
+async def can_user_write_canvas(db: AsyncSession, user: User, canvas: Canvas) -> bool:
     """
     Check if user has write access to canvas.
 
@@ -255,30 +400,16 @@ def can_user_write_canvas(db: Session, user: User, canvas: Canvas) -> bool:
     Returns:
         True if user can write to canvas
     """
-    # Owner can always write
-    if canvas.owner_id == user.id:
-        return True
-
-    # Admins can write to all canvases
-    if user.role == UserRole.ADMIN:
+    if has_role_access(user, canvas, require_write=True):
         return True
 
     # Check if canvas is shared with write access
-    share = (
-        db.query(CanvasShare)
-        .filter(
-            CanvasShare.canvas_id == canvas.id,
-            CanvasShare.user_id == user.id,
-            CanvasShare.can_write == True,
-        )
-        .first()
-    )
-
-    return share is not None
+    result = await db.execute(canvas_share_query(canvas, user, require_write=True))
+    return result.first() is not None
 
 
-def share_canvas(
-    db: Session,
+async def share_canvas(
+    db: AsyncSession,
     canvas: Canvas,
     user: User,
     can_write: bool = False,
@@ -293,25 +424,12 @@ def share_canvas(
         can_write: Grant write access
 
     Returns:
-        Created CanvasShare object
+        Created (or updated, if already shared) CanvasShare object
     """
     # Check if already shared
-    existing_share = (
-        db.query(CanvasShare)
-        .filter(
-            CanvasShare.canvas_id == canvas.id,
-            CanvasShare.user_id == user.id,
-        )
-        .first()
-    )
-
+    existing_share = await get_canvas_share(db, canvas.id, user.id)
     if existing_share:
-        # Update existing share
-        existing_share.can_write = can_write
-        db.commit()
-        db.refresh(existing_share)
-        logger.info(f"Canvas share updated: {canvas.id} with user {user.email}")
-        return existing_share
+        return await update_share(db, existing_share, can_write, canvas.id, user.email)
 
     # Create new share
     share = CanvasShare(
@@ -320,15 +438,77 @@ def share_canvas(
         can_write=can_write,
     )
 
+    canvas_id, user_id, email = canvas.id, user.id, user.email
     db.add(share)
-    db.commit()
-    db.refresh(share)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request shared it first (unique canvas_id, user_id):
+        # update that share instead
+        await db.rollback()
+        existing_share = await get_canvas_share(db, canvas_id, user_id)
+        if existing_share is None:
+            raise
+        # The rollback expired the caller's objects; reload them for the response
+        await db.refresh(canvas)
+        await db.refresh(user)
+        return await update_share(db, existing_share, can_write, canvas_id, email)
+
+    await db.refresh(share)
+
+    logger.info(f"Canvas shared: {canvas_id} with user {email}")
+    return share
+
+
+async def get_canvas_share(db: AsyncSession, canvas_id: int, user_id: int) -> CanvasShare | None:
+    """
+    Get a user's share of a canvas.
+
+    Args:
+        db: Database session
+        canvas_id: Canvas ID
+        user_id: User ID
+
+    Returns:
+        CanvasShare or None
+    """
+    result = await db.execute(
+        select(CanvasShare).where(
+            CanvasShare.canvas_id == canvas_id,
+            CanvasShare.user_id == user_id,
+        )
+    )
+    return result.scalars().first()
+
+
+async def update_share(
+    db: AsyncSession,
+    share: CanvasShare,
+    can_write: bool,
+    canvas_id: int,
+    email: str,
+) -> CanvasShare:
+    """
+    Change an existing share's access level.
+
+    Args:
+        db: Database session
+        share: Share to update
+        can_write: Grant write access
+        canvas_id: Canvas ID (for logging)
+        email: Shared user's email (for logging)
 
-    logger.info(f"Canvas shared: {canvas.id} with user {user.email}")
+    Returns:
+        Updated CanvasShare object
+    """
+    share.can_write = can_write
+    await db.commit()
+    await db.refresh(share)
+    logger.info(f"Canvas share updated: {canvas_id} with user {email}")
     return share
 
 
-def unshare_canvas(db: Session, canvas: Canvas, user: User) -> None:
+async def unshare_canvas(db: AsyncSession, canvas: Canvas, user: User) -> None:
     """
     Remove canvas share for a user.
 
@@ -337,24 +517,17 @@ def unshare_canvas(db: Session, canvas: Canvas, user: User) -> None:
         canvas: Canvas to unshare
         user: User to remove access from
     """
-    share = (
-        db.query(CanvasShare)
-        .filter(
-            CanvasShare.canvas_id == canvas.id,
-            CanvasShare.user_id == user.id,
-        )
-        .first()
-    )
+    share = await get_canvas_share(db, canvas.id, user.id)
 
     if share:
-        db.delete(share)
-        db.commit()
+        await db.delete(share)
+        await db.commit()
         logger.info(f"Canvas unshared: {canvas.id} from user {user.email}")
 
 
-def get_canvas_shares(db: Session, canvas: Canvas) -> List[CanvasShare]:
+async def get_canvas_shares(db: AsyncSession, canvas: Canvas) -> List[CanvasShare]:
     """
-    Get all shares for a canvas.
+    Get all shares for a canvas, with their users loaded.
 
     Args:
         db: Database session
@@ -363,8 +536,9 @@ def get_canvas_shares(db: Session, canvas: Canvas) -> List[CanvasShare]:
     Returns:
         List of CanvasShare objects
     """
-    return (
-        db.query(CanvasShare)
-        .filter(CanvasShare.canvas_id == canvas.id)
-        .all()
+    result = await db.execute(
+        select(CanvasShare)
+        .where(CanvasShare.canvas_id == canvas.id)
+        .options(selectinload(CanvasShare.user))
     )
+    return list(result.scalars().all())
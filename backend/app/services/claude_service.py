@@ -1,10 +1,18 @@
 """
-Claude AI service via AWS Bedrock.
+Claude AI service.
+
+Calls go to the provider selected by settings.llm_provider (Bedrock by
+default; see llm_providers).
 """
-import boto3
-import json
-from typing import List, Dict, Any
-from app.core.config import settings
+import time
+from typing import List, Dict, Any, AsyncIterator
+from app.services import llm_gateway
+from app.services.bedrock_pool import bedrock_pool
+from app.services.llm_providers import get_provider
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+from app.services.result_cache import make_cache_key
+from app.services.single_flight import llm_single_flight
+from app.services.usage_service import record_usage, UsageContext
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,15 +20,59 @@ logger = logging.getLogger(__name__)
 
 def get_bedrock_client():
     """
-    Get AWS Bedrock runtime client.
+    Get the shared AWS Bedrock runtime client.
     Uses AWS profile from environment for local development.
     """
-    session = boto3.Session(
-        profile_name=settings.aws_profile,
-        region_name=settings.aws_bedrock_region
-    )
+    return bedrock_pool.get_client()
+
+
+def render_canvas_header(canvas_data: Dict[str, Any]) -> str:
+    """
+    Render the canvas heading and description for Claude's context.
+
+    Args:
+        canvas_data: Canvas information
+
+    Returns:
+        Formatted header string
+    """
+    header = f"# Deal Canvas: {canvas_data['name']}\n\n"
+
+    if canvas_data.get('description'):
+        header += f"**Description**: {canvas_data['description']}\n\n"
+
+    return header + "## Canvas Contents\n\n"
+
+
+def render_node_fragment(node: Dict[str, Any]) -> str:
+    """
+    Render one node as a markdown fragment for Claude's context.
 
-    return session.client('bedrock-runtime')
+    Args:
+        node: Node data
+
+    Returns:
+        Formatted fragment string
+    """
+    lines = [f"### {node['title']} ({node['node_type']})\n"]
+
+    # Large nodes use their background summary when one is ready
+    if node.get('summary'):
+        lines.append(f"*(Summarized from {node.get('content_size')} characters)*\n")
+        lines.append(f"{node['summary']}\n\n")
+        return "".join(lines)
+
+    # Add node data
+    if node.get('data'):
+        for key, value in node['data'].items():
+            if isinstance(value, str) and value.strip():
+                lines.append(f"**{key}**: {value}\n")
+
+    lines.append("\n")
+    return "".join(lines)
+
+
+EMPTY_CANVAS_TEXT = "*(No nodes yet - empty canvas)*\n"
 
 
 def build_canvas_context(canvas_data: Dict[str, Any], nodes_data: List[Dict[str, Any]]) -> str:
@@ -34,78 +86,118 @@ def build_canvas_context(canvas_data: Dict[str, Any], nodes_data: List[Dict[str,
     Returns:
         Formatted context string
     """
-    context = f"# Deal Canvas: {canvas_data['name']}\n\n"
+    if not nodes_data:
+        return render_canvas_header(canvas_data) + EMPTY_CANVAS_TEXT
 
-    if canvas_data.get('description'):
-        context += f"**Description**: {canvas_data['description']}\n\n"
+    # Skip nodes excluded from context
+    fragments = [
+        render_node_fragment(node)
+        for node in nodes_data
+        if not node.get('exclude_from_context')
+    ]
 
-    context += "## Canvas Contents\n\n"
+    return render_canvas_header(canvas_data) + "".join(fragments)
 
-    if not nodes_data:
-        context += "*(No nodes yet - empty canvas)*\n"
-    else:
-        for node in nodes_data:
-            # Skip nodes excluded from context
-            if node.get('exclude_from_context'):
-                continue
 
-            context += f"### {node['title']} ({node['node_type']})\n"
+def build_request_body(
+    messages: List[Dict[str, str]],
+    system_prompt: str | List[Dict[str, Any]] | None = None,
+    max_tokens: int = 4096,
+    temperature: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Build the request body for the Anthropic messages API.
 
-            # Add node data
-            if node.get('data'):
-                for key, value in node['data'].items():
-                    if isinstance(value, str) and value.strip():
-                        context += f"**{key}**: {value}\n"
+    The latest message also gets a cache breakpoint so the next turn reads
+    the whole conversation prefix from the prompt cache.
 
-            context += "\n"
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+        system_prompt: Optional system prompt (string or content blocks)
+        max_tokens: Maximum tokens in response
+        temperature: Sampling temperature (0-1)
+
+    Returns:
+        Request body dict
+    """
+    if messages and isinstance(messages[-1].get('content'), str):
+        last = messages[-1]
+        messages = messages[:-1] + [
+            {'role': last['role'], 'content': [cached_block(last['content'])]}
+        ]
+
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+
+    if system_prompt:
+        request_body["system"] = system_prompt
 
-    return context
+    return request_body
 
 
-def chat_with_claude(
+async def chat_with_claude(
     messages: List[Dict[str, str]],
-    system_prompt: str | None = None,
+    system_prompt: str | List[Dict[str, Any]] | None = None,
     max_tokens: int = 4096,
     temperature: float = 1.0,
+    timeout: float | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    user_key: Any = None,
+    usage_context: UsageContext | None = None,
 ) -> Dict[str, Any]:
     """
-    Send messages to Claude via AWS Bedrock and get response.
+    Send messages to Claude and get response.
 
     Args:
         messages: List of message dicts with 'role' and 'content'
-        system_prompt: Optional system prompt
+        system_prompt: Optional system prompt (string or content blocks)
         max_tokens: Maximum tokens in response
         temperature: Sampling temperature (0-1)
+        timeout: Seconds to wait (default: settings.llm_timeout_seconds)
+        priority: Scheduler priority class (see llm_scheduler)
+        user_key: Caller identity for fair queuing (default: usage_context.user_id)
+        usage_context: Attribution for the usage ledger
 
     Returns:
         Response dict with content and usage stats
+
+    Raises:
+        LLMTimeoutError: If the call exceeds the timeout
+        LLMThrottledError: If the provider stays throttled or capacity is busy
     """
     try:
-        client = get_bedrock_client()
-
-        # Build request body
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "messages": messages,
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-        }
-
-        if system_prompt:
-            request_body["system"] = system_prompt
-
-        logger.info(f"Calling Bedrock with {len(messages)} messages, model: {settings.aws_bedrock_model_id}")
-
-        # Call Bedrock
-        response = client.invoke_model(
-            modelId=settings.aws_bedrock_model_id,
-            body=json.dumps(request_body)
+        request_body = build_request_body(messages, system_prompt, max_tokens, temperature)
+        provider = get_provider()
+
+        logger.info(f"Calling {provider.name} with {len(messages)} messages, model: {provider.model}")
+
+        if user_key is None and usage_context:
+            user_key = usage_context.user_id
+
+        async def call_bedrock() -> Dict[str, Any]:
+            started_at = time.perf_counter()
+            body = await llm_gateway.run(provider.invoke, request_body, timeout=timeout)
+            record_usage(
+                usage_context,
+                provider=provider.name,
+                model=body.get('model') or provider.model,
+                usage=body.get('usage', {}),
+                latency_ms=round((time.perf_counter() - started_at) * 1000, 1),
+            )
+            return body
+
+        # Identical concurrent requests (open tabs, double clicks) share one call
+        request_key = make_cache_key(provider=provider.name, model=provider.model, body=request_body)
+        response_body = await llm_single_flight.do(
+            request_key,
+            lambda: llm_scheduler.run(call_bedrock, priority=priority, user_key=user_key),
         )
 
-        # Parse response
-        response_body = json.loads(response['body'].read())
-
-        logger.info(f"Bedrock response received, usage: {response_body.get('usage', {})}")
+        logger.info(f"{provider.name} response received, usage: {response_body.get('usage', {})}")
 
         return {
             "content": response_body['content'][0]['text'],
@@ -114,28 +206,93 @@ def chat_with_claude(
             "model": response_body.get('model'),
         }
 
+    except (llm_gateway.LLMTimeoutError, llm_gateway.LLMThrottledError):
+        raise
     except Exception as e:
-        logger.error(f"Error calling Claude via Bedrock: {e}", exc_info=True)
+        logger.error(f"Error calling Claude: {e}", exc_info=True)
         raise Exception(f"Failed to get AI response: {str(e)}")
 
 
-def create_sales_assistant_prompt(canvas_context: str) -> str:
+async def stream_claude(
+    messages: List[Dict[str, str]],
+    system_prompt: str | List[Dict[str, Any]] | None = None,
+    max_tokens: int = 4096,
+    temperature: float = 1.0,
+    timeout: float | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    user_key: Any = None,
+    usage_context: UsageContext | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    Create system prompt for sales assistant chat.
+    Stream Claude's response token by token.
 
     Args:
-        canvas_context: Formatted context from canvas
-
-    Returns:
-        System prompt string
+        messages: List of message dicts with 'role' and 'content'
+        system_prompt: Optional system prompt (string or content blocks)
+        max_tokens: Maximum tokens in response
+        temperature: Sampling temperature (0-1)
+        timeout: Max seconds between stream events
+            (default: settings.llm_timeout_seconds)
+        priority: Scheduler priority class (see llm_scheduler)
+        user_key: Caller identity for fair queuing (default: usage_context.user_id)
+        usage_context: Attribution for the usage ledger
+
+    Yields:
+        Stream event dicts (see LLMProvider.iter_stream)
+
+    Raises:
+        LLMTimeoutError: If the stream stalls past the timeout
+        LLMThrottledError: If the provider stays throttled or capacity is busy
     """
-    return f"""You are a helpful AI assistant for Deep Thought, a sales deal intelligence platform for Cyera (a data security company specializing in DSPM and DLP).
+    request_body = build_request_body(messages, system_prompt, max_tokens, temperature)
+    provider = get_provider()
 
-Your role is to help sales professionals manage and strategize on their enterprise security deals by analyzing the deal canvas and providing insights, recommendations, and guidance.
+    logger.info(f"Streaming from {provider.name} with {len(messages)} messages, model: {provider.model}")
+
+    try:
+        if user_key is None and usage_context:
+            user_key = usage_context.user_id
+
+        events = llm_scheduler.stream(
+            lambda: llm_gateway.stream(lambda: provider.iter_stream(request_body), timeout=timeout),
+            priority=priority,
+            user_key=user_key,
+        )
+
+        started_at = time.perf_counter()
+        ttft_ms = None
+        usage = None
+        model = None
+        try:
+            async for event in events:
+                if event['type'] == 'text' and ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                elif event['type'] in ('usage', 'done'):
+                    usage = event.get('usage', {})
+                    model = event.get('model') or model
+                yield event
+        finally:
+            # Cancelled, timed-out and failed streams are billed too; record
+            # whatever usage the stream reported before it ended
+            if usage is not None:
+                record_usage(
+                    usage_context,
+                    provider=provider.name,
+                    model=model or provider.model,
+                    usage=usage,
+                    latency_ms=round((time.perf_counter() - started_at) * 1000, 1),
+                    ttft_ms=ttft_ms,
+                )
+    except (llm_gateway.LLMTimeoutError, llm_gateway.LLMThrottledError):
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming Claude: {e}", exc_info=True)
+        raise Exception(f"Failed to get AI response: {str(e)}")
 
-## Current Deal Context
 
-{canvas_context}
+SALES_ASSISTANT_INSTRUCTIONS = """You are a helpful AI assistant for Deep Thought, a sales deal intelligence platform for Cyera (a data security company specializing in DSPM and DLP).
+
+Your role is to help sales professionals manage and strategize on their enterprise security deals by analyzing the deal canvas and providing insights, recommendations, and guidance.
 
 ## Your Capabilities
 
@@ -153,10 +310,58 @@ Your role is to help sales professionals manage and strategize on their enterpri
 - Reference specific information from the canvas when relevant
 - Help prioritize next steps
 
-How can I help you with this deal?"""
+The current deal context follows."""
+
+
+# Bump when WHATS_NEXT_INSTRUCTIONS changes so cached results are not reused
+WHATS_NEXT_PROMPT_VERSION = "2"
+
+WHATS_NEXT_INSTRUCTIONS = """Based on the deal canvas that follows, provide a concise analysis of what should happen next to move this deal forward.
+
+Please provide:
+
+1. **Immediate Next Steps** (2-3 most important actions)
+2. **Key Questions** (What we need to learn/clarify)
+3. **Potential Risks** (What could derail this deal)
+4. **Recommended Focus Areas** (Where to invest time/energy)
+
+Keep your response focused and actionable."""
+
+
+def cached_block(text: str) -> Dict[str, Any]:
+    """
+    Build a text content block with a prompt-cache breakpoint.
+
+    Args:
+        text: Block text
+
+    Returns:
+        Content block dict
+    """
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
 
 
-def create_whats_next_prompt(canvas_context: str) -> str:
+def create_sales_assistant_prompt(canvas_context: str) -> List[Dict[str, Any]]:
+    """
+    Create system prompt for sales assistant chat.
+
+    Static instructions come first and the canvas context second, each
+    ending in a cache breakpoint, so the prefix is served from the prompt
+    cache on every turn until the canvas changes.
+
+    Args:
+        canvas_context: Formatted context from canvas
+
+    Returns:
+        System prompt content blocks
+    """
+    return [
+        cached_block(SALES_ASSISTANT_INSTRUCTIONS),
+        cached_block(f"## Current Deal Context\n\n{canvas_context}"),
+    ]
+
+
+def create_whats_next_prompt(canvas_context: str) -> List[Dict[str, Any]]:
     """
     Create prompt for "What's Next" recommendations.
 
@@ -164,17 +369,75 @@ def create_whats_next_prompt(canvas_context: str) -> str:
         canvas_context: Formatted context from canvas
 
     Returns:
-        Prompt string for what's next analysis
+        System prompt content blocks for what's next analysis
     """
-    return f"""Based on the following deal canvas, provide a concise analysis of what should happen next to move this deal forward.
+    return [
+        cached_block(WHATS_NEXT_INSTRUCTIONS),
+        cached_block(canvas_context),
+    ]
 
-{canvas_context}
 
-Please provide:
+def add_history_summary(system_prompt: List[Dict[str, Any]], summary: str | None) -> List[Dict[str, Any]]:
+    """
+    Append a compacted conversation summary to a system prompt.
 
-1. **Immediate Next Steps** (2-3 most important actions)
-2. **Key Questions** (What we need to learn/clarify)
-3. **Potential Risks** (What could derail this deal)
-4. **Recommended Focus Areas** (Where to invest time/energy)
+    The summary only changes when older turns are folded into it, so it
+    gets its own cache breakpoint after the canvas context.
 
-Keep your response focused and actionable."""
+    Args:
+        system_prompt: System prompt content blocks
+        summary: Running summary of earlier turns (optional)
+
+    Returns:
+        System prompt content blocks
+    """
+    if not summary:
+        return system_prompt
+
+    return [*system_prompt, cached_block(f"## Earlier Conversation (summarized)\n\n{summary}")]
+
+
+def whats_next_cache_key(
+    context_hash: str,
+    message: str,
+    max_tokens: int = 4096,
+    temperature: float = 1.0,
+) -> str:
+    """
+    Build the result-cache key for a "What's Next" analysis.
+
+    Keyed on the context snapshot and the latest request rather than the
+    chat history, so asking again on an unchanged canvas is a hit.
+
+    Args:
+        context_hash: Hash of the canvas context the analysis reads
+        message: Latest user message
+        max_tokens: Maximum tokens in response
+        temperature: Sampling temperature
+
+    Returns:
+        Cache key
+    """
+    provider = get_provider()
+    return make_cache_key(
+        prompt_version=WHATS_NEXT_PROMPT_VERSION,
+        provider=provider.name,
+        model=provider.model,
+        context=context_hash,
+        message=message,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+
+def create_context_prompt(canvas_context: str) -> List[Dict[str, Any]]:
+    """
+    Create system prompt for chats without dedicated instructions (e.g. persona).
+
+    Args:
+        canvas_context: Formatted context from canvas
+
+    Returns:
+        System prompt content blocks
+    """
+    return [cached_block(canvas_context)]
@@ -0,0 +1,226 @@
+"""
+Token-budgeted canvas context assembly.
+
+Large canvases can overflow the model window or waste tokens on low-value
+nodes. The assembler takes each node's cached fragment, ranks nodes by
+relevance to the user's message, recency and node type, and packs the best
+ones under settings.max_context_tokens. Nodes that do not fit are truncated or dropped
+and reported back to the caller.
+"""
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.claude_service import render_canvas_header, EMPTY_CANVAS_TEXT
+from app.services.context_renderer import (
+    CHARS_PER_TOKEN,
+    WORD_RE,
+    estimate_tokens,
+    render_fragments,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Truncate a node rather than drop it if at least this many tokens remain
+MIN_TRUNCATED_TOKENS = 200
+
+TRUNCATION_MARKER = "\n*(truncated)*\n\n"
+
+# Relative importance of node types for deal context
+NODE_TYPE_WEIGHTS = {
+    "person": 1.3,
+    "meeting": 1.2,
+    "document": 0.9,
+    "generic": 1.0,
+}
+
+# Recency half-life: a node untouched for this long counts half as much
+RECENCY_HALF_LIFE_DAYS = 30.0
+_RECENCY_DECAY = math.log(2) / RECENCY_HALF_LIFE_DAYS
+
+
+# Words too common to signal relevance
+STOP_WORDS = {
+    "the", "and", "for", "are", "was", "were", "what", "who", "how", "why",
+    "when", "where", "which", "did", "does", "about", "with", "this", "that",
+    "from", "have", "has", "say", "said", "can", "our", "their", "they", "you",
+}
+
+
+@dataclass
+class AssembledContext:
+    """Canvas context fitted to a token budget"""
+
+    text: str
+    token_count: int
+    budget_tokens: int
+    included_node_ids: List[Any] = field(default_factory=list)
+    truncated: List[Dict[str, Any]] = field(default_factory=list)
+    dropped: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def query_terms(query: Optional[str]) -> List[str]:
+    """
+    Extract distinct, meaningful lowercase terms from the user's message.
+
+    Args:
+        query: User message
+
+    Returns:
+        List of terms
+    """
+    if not query:
+        return []
+
+    return sorted(set(WORD_RE.findall(query.lower())) - STOP_WORDS)
+
+
+def count_term_matches(words: List[frozenset], terms: List[str]) -> List[int]:
+    """
+    Count, per fragment, how many distinct terms it contains.
+
+    Fragments cache their word sets, so this is one set lookup per
+    (fragment, term) pair instead of a scan of every fragment's text.
+
+    Args:
+        words: Word set of each fragment
+        terms: Lowercase query terms
+
+    Returns:
+        Match count per fragment
+    """
+    counts = [0] * len(words)
+    for term in terms:
+        counts = [count + (term in fragment_words) for count, fragment_words in zip(counts, words)]
+    return counts
+
+
+def score_node(
+    node: Dict[str, Any],
+    term_matches: int,
+    term_total: int,
+    now: datetime,
+) -> float:
+    """
+    Score a node's value for the context.
+
+    Args:
+        node: Node data
+        term_matches: Distinct query terms found in the node
+        term_total: Number of query terms
+        now: Reference time for recency
+
+    Returns:
+        Score (higher is more valuable)
+    """
+    score = NODE_TYPE_WEIGHTS.get(node.get('node_type'), 1.0)
+
+    if term_matches:
+        score *= 1.0 + 2.0 * term_matches / term_total
+
+    updated_at = node.get('updated_at')
+    if updated_at is not None:
+        age_days = (now - updated_at).total_seconds() / 86400
+        if age_days > 0:
+            score *= 0.5 + 0.5 * math.exp(-age_days * _RECENCY_DECAY)
+
+    return score
+
+
+def assemble_canvas_context(
+    canvas_data: Dict[str, Any],
+    nodes_data: List[Dict[str, Any]],
+    query: Optional[str] = None,
+    budget_tokens: Optional[int] = None,
+) -> AssembledContext:
+    """
+    Build canvas context that fits a token budget.
+
+    Nodes are ranked and packed greedily; the first node that does not fit
+    is truncated if enough budget remains, and smaller lower-ranked nodes
+    may still fill the gap. Included nodes keep their canvas order so the
+    rendered context stays stable between turns.
+
+    Args:
+        canvas_data: Canvas information
+        nodes_data: List of node data (with 'id' and 'updated_at' if known)
+        query: User message used to rank nodes by relevance
+        budget_tokens: Token budget (default: settings.max_context_tokens)
+
+    Returns:
+        AssembledContext with the text and a report of truncated/dropped nodes
+    """
+    budget = budget_tokens or settings.max_context_tokens
+    header = render_canvas_header(canvas_data)
+    remaining = budget - estimate_tokens(header)
+
+    candidates = [node for node in nodes_data if not node.get('exclude_from_context')]
+    if not candidates:
+        text = header + EMPTY_CANVAS_TEXT
+        return AssembledContext(text=text, token_count=estimate_tokens(text), budget_tokens=budget)
+
+    # Cached per node; only nodes edited since the last turn are re-rendered
+    rendered = render_fragments(candidates)
+    fragments = [f.text for f in rendered]
+    costs = [f.tokens for f in rendered]
+
+    # Fast path: everything fits
+    if sum(costs) <= remaining:
+        text = "".join([header, *fragments])
+        return AssembledContext(
+            text=text,
+            token_count=estimate_tokens(text),
+            budget_tokens=budget,
+            included_node_ids=[node.get('id') for node in candidates],
+        )
+
+    terms = query_terms(query)
+    matches = count_term_matches([f.words for f in rendered], terms)
+    now = datetime.utcnow()
+    scores = [
+        score_node(node, term_matches, len(terms), now)
+        for node, term_matches in zip(candidates, matches)
+    ]
+    ranked = sorted(range(len(candidates)), key=scores.__getitem__, reverse=True)
+
+    selected: Dict[int, str] = {}
+    truncated: List[Dict[str, Any]] = []
+    dropped: List[Dict[str, Any]] = []
+
+    for i in ranked:
+        node = candidates[i]
+        if costs[i] <= remaining:
+            selected[i] = fragments[i]
+            remaining -= costs[i]
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            keep_chars = (remaining - estimate_tokens(TRUNCATION_MARKER)) * CHARS_PER_TOKEN
+            selected[i] = fragments[i][:keep_chars].rstrip() + TRUNCATION_MARKER
+            remaining -= estimate_tokens(selected[i])
+            truncated.append({
+                'id': node.get('id'),
+                'title': node['title'],
+                'tokens': costs[i],
+                'kept_tokens': estimate_tokens(selected[i]),
+            })
+        else:
+            dropped.append({'id': node.get('id'), 'title': node['title'], 'tokens': costs[i]})
+
+    order = sorted(selected)
+    text = "".join([header, *(selected[i] for i in order)])
+
+    if truncated or dropped:
+        logger.info(
+            f"Context over budget ({budget} tokens): "
+            f"truncated={[n['id'] for n in truncated]}, dropped={[n['id'] for n in dropped]}"
+        )
+
+    return AssembledContext(
+        text=text,
+        token_count=estimate_tokens(text),
+        budget_tokens=budget,
+        included_node_ids=[candidates[i].get('id') for i in order],
+        truncated=truncated,
+        dropped=dropped,
+    )
@@ -0,0 +1,188 @@
+"""
+Incremental canvas context rendering.
+
+Each node's markdown fragment is rendered once and cached under the node's
+id, keyed by its content hash (and summary state). Building the context for
+a turn is then a lookup per node plus a single join; editing a node only
+re-renders that node, and moving it re-renders nothing.
+"""
+import re
+import threading
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.services.claude_service import (
+    render_canvas_header,
+    render_node_fragment,
+    EMPTY_CANVAS_TEXT,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rough Claude tokenizer ratio for English prose
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a string.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Approximate token count
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# Words as the assembler matches them against query terms
+WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+
+class Fragment:
+    """
+    Rendered node fragment with derived values the assembler needs.
+
+    The word set is only needed when a canvas is over budget and nodes are
+    ranked, so it is built on first use and then cached with the fragment.
+    """
+
+    __slots__ = ("text", "tokens", "_words")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self._words: frozenset[str] | None = None
+
+    @property
+    def words(self) -> frozenset[str]:
+        """Distinct lowercase words, for relevance matching"""
+        if self._words is None:
+            self._words = frozenset(WORD_RE.findall(self.text.lower()))
+        return self._words
+
+
+class FragmentCache:
+    """
+    Bounded cache of rendered node fragments.
+
+    Hits are lock-free dict reads (atomic under the GIL); misses re-insert
+    the entry at the end, so eviction drops the least recently rendered.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: Dict[Any, tuple[tuple, Fragment]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, node: Dict[str, Any]) -> Fragment:
+        """
+        Get a node's fragment, rendering it if missing or stale.
+
+        Args:
+            node: Node data ('id' and 'content_hash' or 'updated_at' enable caching)
+
+        Returns:
+            Fragment
+        """
+        node_id = node.get('id')
+        if node_id is None:
+            return make_fragment(node)
+
+        # updated_at also changes on moves; the content hash only on edits
+        version = (node.get('content_hash') or node.get('updated_at'), node.get('summary') is not None)
+
+        entry = self._entries.get(node_id)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        fragment = make_fragment(node)
+
+        with self._lock:
+            self.misses += 1
+            self._entries.pop(node_id, None)
+            self._entries[node_id] = (version, fragment)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+        return fragment
+
+    def invalidate(self, node_id: Any) -> None:
+        """
+        Drop a node's cached fragment.
+
+        Args:
+            node_id: Node ID
+        """
+        with self._lock:
+            self._entries.pop(node_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with size and hit/miss counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def make_fragment(node: Dict[str, Any]) -> Fragment:
+    """
+    Render a node into a Fragment.
+
+    Args:
+        node: Node data
+
+    Returns:
+        Fragment
+    """
+    return Fragment(render_node_fragment(node))
+
+
+def render_fragments(nodes_data: List[Dict[str, Any]]) -> List[Fragment]:
+    """
+    Get fragments for the nodes included in context, in canvas order.
+
+    Args:
+        nodes_data: List of node data
+
+    Returns:
+        Fragments for nodes not excluded from context
+    """
+    get = fragment_cache.get
+    return [get(node) for node in nodes_data if not node.get('exclude_from_context')]
+
+
+def render_canvas_context(canvas_data: Dict[str, Any], nodes_data: List[Dict[str, Any]]) -> str:
+    """
+    Render the full canvas context from cached fragments.
+
+    Args:
+        canvas_data: Canvas information
+        nodes_data: List of node data
+
+    Returns:
+        Formatted context string
+    """
+    fragments = render_fragments(nodes_data)
+    if not fragments:
+        return render_canvas_header(canvas_data) + EMPTY_CANVAS_TEXT
+
+    return "".join([render_canvas_header(canvas_data), *(f.text for f in fragments)])
+
+
+fragment_cache = FragmentCache(max_entries=settings.context_fragment_cache_max_entries)
@@ -0,0 +1,458 @@
+"""
+Chat context building and snapshots (ADR-005).
+
+A chat's canvas context is compiled once, stored in a content-addressed
+table and referenced from Chat.context_snapshot. Later turns read only the
+snapshot's hash and text instead of reloading and re-rendering every node.
+Identical snapshots are stored once no matter how many chats use them.
+
+Large canvases can instead use retrieval: the system prompt holds only an
+outline of the canvas, and each user message carries the few chunks most
+relevant to it (see retrieval_index). The mode is decided on the chat's
+first message and pinned with the context: the outline is stored the same
+way under `outline_hash`, so the system prompt stays identical (and
+prompt-cached) between turns until the context is refreshed.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.canvas import Canvas
+from app.models.chat import Chat, ContextSnapshot
+from app.models.node import Node
+from app.services.claude_service import render_canvas_header, EMPTY_CANVAS_TEXT
+from app.services.context_assembler import assemble_canvas_context, AssembledContext
+from app.services.context_renderer import CHARS_PER_TOKEN, estimate_tokens
+from app.services.node_service import get_canvas_nodes_sync
+from app.services.retrieval_index import retrieval_index
+from app.services.summarization_service import get_summaries, needs_summary
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def node_context_data(node: Node, summary: str | None = None) -> Dict[str, Any]:
+    """
+    Convert a node into the dict form used by context rendering.
+
+    Args:
+        node: Node object
+        summary: Stored summary for large nodes (optional)
+
+    Returns:
+        Node data dict
+    """
+    return {
+        'id': node.id,
+        'title': node.title,
+        'node_type': node.node_type,
+        'data': node.data,
+        'exclude_from_context': node.exclude_from_context,
+        'updated_at': node.updated_at,
+        'content_size': node.content_size,
+        'content_hash': node.content_hash,
+        'summary': summary,
+    }
+
+
+def context_report(assembled: AssembledContext) -> Dict[str, Any]:
+    """
+    Summarize how the canvas context was fitted to the token budget.
+
+    Args:
+        assembled: Assembled context
+
+    Returns:
+        Report dict
+    """
+    return {
+        "token_count": assembled.token_count,
+        "budget_tokens": assembled.budget_tokens,
+        "truncated": assembled.truncated,
+        "dropped": assembled.dropped,
+    }
+
+
+def build_canvas_context_for_chat(
+    db: Session,
+    canvas: Canvas,
+    query: str | None = None,
+) -> AssembledContext:
+    """
+    Build the full canvas context, using summaries for large nodes.
+
+    Args:
+        db: Database session
+        canvas: Canvas object
+        query: User message used to rank nodes if over budget
+
+    Returns:
+        AssembledContext
+    """
+    nodes = get_canvas_nodes_sync(db, canvas)
+    summaries = get_summaries(db, [n.content_hash for n in nodes if needs_summary(n)])
+    nodes_data = [node_context_data(n, summaries.get(n.content_hash)) for n in nodes]
+    canvas_data = {
+        'name': canvas.name,
+        'description': canvas.description,
+    }
+
+    return assemble_canvas_context(canvas_data, nodes_data, query=query)
+
+
+def build_node_context(db: Session, canvas: Canvas, node_id: int) -> AssembledContext:
+    """
+    Build context focused on a single node.
+
+    Args:
+        db: Database session
+        canvas: Canvas object
+        node_id: Node to focus on
+
+    Returns:
+        AssembledContext
+    """
+    node = db.query(Node).filter(Node.id == node_id).first()
+    if node:
+        nodes_data = [dict(node_context_data(node), exclude_from_context=False)]
+        canvas_data = {
+            'name': canvas.name,
+            'description': f"Focus: {node.title}",
+        }
+    else:
+        nodes_data = []
+        canvas_data = {'name': canvas.name, 'description': canvas.description}
+
+    return assemble_canvas_context(canvas_data, nodes_data)
+
+
+def store_snapshot(db: Session, content: str, token_count: int) -> str:
+    """
+    Store context text under its content hash (once per distinct text).
+
+    Args:
+        db: Database session
+        content: Compiled context text
+        token_count: Estimated tokens
+
+    Returns:
+        Content hash
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    exists = (
+        db.query(ContextSnapshot.id)
+        .filter(ContextSnapshot.content_hash == content_hash)
+        .first()
+    )
+    if exists:
+        return content_hash
+
+    try:
+        db.add(ContextSnapshot(
+            content_hash=content_hash,
+            content=content,
+            token_count=token_count,
+        ))
+        db.commit()
+    except IntegrityError:
+        # Stored concurrently by another chat
+        db.rollback()
+
+    return content_hash
+
+
+def snapshot_chat_context(
+    db: Session,
+    chat: Chat,
+    canvas: Canvas,
+    query: str | None = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Compile the canvas context and pin it to the chat.
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+        query: User message used to rank nodes if over budget
+
+    Returns:
+        (context text, snapshot info)
+    """
+    assembled = build_canvas_context_for_chat(db, canvas, query)
+    content_hash = store_snapshot(db, assembled.text, assembled.token_count)
+
+    info = {
+        "mode": "snapshot",
+        "hash": content_hash,
+        "built_at": datetime.utcnow().isoformat(),
+        **context_report(assembled),
+    }
+    chat.context_snapshot = info
+    db.commit()
+
+    logger.info(f"Context snapshot built: chat={chat.id}, hash={content_hash[:12]}, tokens={assembled.token_count}")
+    return assembled.text, info
+
+
+def load_snapshot(db: Session, content_hash: str | None) -> str | None:
+    """
+    Read stored context text by hash.
+
+    Args:
+        db: Database session
+        content_hash: Snapshot hash (None reads nothing)
+
+    Returns:
+        Context text, or None if missing
+    """
+    if not content_hash:
+        return None
+
+    return (
+        db.query(ContextSnapshot.content)
+        .filter(ContextSnapshot.content_hash == content_hash)
+        .scalar()
+    )
+
+
+def get_chat_context(
+    db: Session,
+    chat: Chat,
+    canvas: Canvas,
+    query: str | None = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Get a chat's canvas context, building the snapshot on first use.
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+        query: User message used to rank nodes if the snapshot is built now
+
+    Returns:
+        (context text, snapshot info)
+    """
+    info = chat.context_snapshot or {}
+    if info.get("hash"):
+        content = load_snapshot(db, info["hash"])
+        if content is not None:
+            return content, info
+
+        logger.warning(f"Context snapshot {info['hash'][:12]} missing, rebuilding for chat {chat.id}")
+
+    return snapshot_chat_context(db, chat, canvas, query)
+
+
+def should_use_retrieval(db: Session, chat: Chat, canvas: Canvas) -> bool:
+    """
+    Decide whether a chat's canvas context should use retrieval.
+
+    "What's Next" analyses always see the whole canvas; other chats use
+    retrieval once the canvas content exceeds
+    settings.context_retrieval_min_tokens.
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+
+    Returns:
+        True to send an outline plus retrieved chunks
+    """
+    if not settings.context_retrieval_enabled or chat.chat_type == 'whats_next':
+        return False
+
+    content_size = (
+        db.query(func.coalesce(func.sum(Node.content_size), 0))
+        .filter(Node.canvas_id == canvas.id, Node.exclude_from_context == 0)
+        .scalar()
+    )
+    return content_size // CHARS_PER_TOKEN > settings.context_retrieval_min_tokens
+
+
+def build_canvas_outline(db: Session, canvas: Canvas) -> str:
+    """
+    Render the canvas header and a one-line entry per node.
+
+    Args:
+        db: Database session
+        canvas: Canvas object
+
+    Returns:
+        Outline text
+    """
+    rows = (
+        db.query(Node.title, Node.node_type)
+        .filter(Node.canvas_id == canvas.id, Node.exclude_from_context == 0)
+        .order_by(Node.id)
+        .all()
+    )
+    header = render_canvas_header({'name': canvas.name, 'description': canvas.description})
+    if not rows:
+        return header + EMPTY_CANVAS_TEXT
+
+    lines = [f"- {title} ({node_type})\n" for title, node_type in rows]
+    return "".join([
+        header,
+        "Nodes on this canvas (relevant excerpts are attached to each user message):\n\n",
+        *lines,
+    ])
+
+
+def retrieve_excerpts(db: Session, canvas: Canvas, query: str) -> Tuple[str, list]:
+    """
+    Retrieve the canvas chunks most relevant to a user message.
+
+    Args:
+        db: Database session
+        canvas: Canvas object
+        query: User message
+
+    Returns:
+        (excerpts text or "" if nothing matched, retrieved chunk info)
+    """
+    hits = retrieval_index.get(db, canvas.id).search(query, settings.context_retrieval_top_k)
+    if not hits:
+        return "", []
+
+    text = "".join(["## Relevant Canvas Excerpts\n\n", *(hit.text for hit in hits)])
+    retrieved = [
+        {'id': hit.node_id, 'title': hit.title, 'score': round(hit.score, 3)}
+        for hit in hits
+    ]
+    return text, retrieved
+
+
+def pin_canvas_outline(db: Session, chat: Chat, canvas: Canvas) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the canvas outline and pin it to the chat (retrieval mode).
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+
+    Returns:
+        (outline text, snapshot info)
+    """
+    outline = build_canvas_outline(db, canvas)
+    token_count = estimate_tokens(outline)
+    outline_hash = store_snapshot(db, outline, token_count)
+
+    info = {
+        "mode": "retrieval",
+        "outline_hash": outline_hash,
+        "built_at": datetime.utcnow().isoformat(),
+        "token_count": token_count,
+    }
+    chat.context_snapshot = info
+    db.commit()
+
+    logger.info(f"Canvas outline pinned: chat={chat.id}, hash={outline_hash[:12]}, tokens={token_count}")
+    return outline, info
+
+
+def pin_chat_context(
+    db: Session,
+    chat: Chat,
+    canvas: Canvas,
+    query: str | None = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Decide the chat's context mode and pin its context (first message or refresh).
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+        query: User message used to rank nodes if over budget
+
+    Returns:
+        (system context text, snapshot info)
+    """
+    if should_use_retrieval(db, chat, canvas):
+        return pin_canvas_outline(db, chat, canvas)
+
+    return snapshot_chat_context(db, chat, canvas, query)
+
+
+def get_retrieval_context(
+    db: Session,
+    chat: Chat,
+    canvas: Canvas,
+    query: str,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Build question-aware context for a large canvas.
+
+    The pinned outline is the system context on every turn, so it stays
+    prompt-cached; only the excerpts change per message (none if nothing
+    matches it).
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+        query: User message
+
+    Returns:
+        (system context text, excerpts to attach to the message, info)
+    """
+    info = chat.context_snapshot or {}
+    outline = load_snapshot(db, info.get("outline_hash"))
+    if outline is None:
+        if info.get("outline_hash"):
+            logger.warning(f"Canvas outline {info['outline_hash'][:12]} missing, rebuilding for chat {chat.id}")
+        outline, info = pin_canvas_outline(db, chat, canvas)
+
+    excerpts, retrieved = retrieve_excerpts(db, canvas, query)
+    info = {
+        **info,
+        "token_count": estimate_tokens(outline) + estimate_tokens(excerpts),
+        "retrieved": retrieved,
+    }
+    return outline, excerpts, info
+
+
+def get_turn_context(
+    db: Session,
+    chat: Chat,
+    canvas: Canvas,
+    query: str,
+    node_only: bool = False,
+) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Get the canvas context for a chat turn.
+
+    Node-focused turns see only the chat's node. Otherwise the first
+    message decides between retrieval and a full snapshot, and later turns
+    keep that mode until the context is refreshed.
+
+    Args:
+        db: Database session
+        chat: Chat object
+        canvas: Canvas object
+        query: User message
+        node_only: Only include the chat's own node
+
+    Returns:
+        (system context text, excerpts to attach to the message or "", info)
+    """
+    if node_only:
+        assembled = build_node_context(db, canvas, chat.node_id)
+        return assembled.text, "", context_report(assembled)
+
+    if not chat.context_snapshot:
+        pin_chat_context(db, chat, canvas, query)
+
+    if chat.context_snapshot.get("mode") == "retrieval":
+        return get_retrieval_context(db, chat, canvas, query)
+
+    canvas_context, info = get_chat_context(db, chat, canvas, query=query)
+    return canvas_context, "", info
@@ -0,0 +1,151 @@
+"""
+Conversation history with rolling compaction.
+
+Long chats keep only their most recent turns verbatim. Older turns are
+folded, a batch at a time, into a running summary stored on the chat, so
+the history sent per turn stays bounded no matter how long the chat runs.
+"""
+from typing import Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.chat import Chat, ChatMessage
+from app.services.claude_service import chat_with_claude
+from app.services.usage_service import UsageContext
+import logging
+
+logger = logging.getLogger(__name__)
+
+COMPACTION_INSTRUCTIONS = """You maintain a running summary of a sales strategy conversation between a user and an AI assistant (or a simulated customer persona).
+
+Update the existing summary with the new turns. Keep decisions, commitments, facts learned about the deal and people, open questions and the user's stated goals. Preserve names, numbers and dates exactly. Drop pleasantries and repetition. Reply with the updated summary only."""
+
+
+def load_unsummarized_messages(db: Session, chat: Chat) -> List[ChatMessage]:
+    """
+    Load the chat's messages that are not yet folded into the summary.
+
+    Args:
+        db: Database session
+        chat: Chat object
+
+    Returns:
+        Messages in order
+    """
+    query = db.query(ChatMessage).filter(
+        ChatMessage.chat_id == chat.id,
+        ChatMessage.role.in_(['user', 'assistant']),
+    )
+    if chat.summarized_through_id:
+        query = query.filter(ChatMessage.id > chat.summarized_through_id)
+
+    return query.order_by(ChatMessage.created_at, ChatMessage.id).all()
+
+
+def fold_boundary(messages: List[ChatMessage], keep_messages: int) -> int:
+    """
+    Pick how many leading messages to fold so the kept window starts on a user turn.
+
+    Args:
+        messages: Unsummarized messages
+        keep_messages: Messages to keep verbatim
+
+    Returns:
+        Number of leading messages to fold
+    """
+    boundary = max(len(messages) - keep_messages, 0)
+    while boundary < len(messages) and messages[boundary].role != 'user':
+        boundary += 1
+    return boundary
+
+
+async def summarize_turns(
+    previous_summary: str | None,
+    messages: List[ChatMessage],
+    usage_context: UsageContext | None = None,
+) -> str:
+    """
+    Fold turns into the running summary.
+
+    Args:
+        previous_summary: Existing summary (optional)
+        messages: Turns to fold in
+        usage_context: Attribution for the usage ledger
+
+    Returns:
+        Updated summary
+    """
+    transcript = "\n\n".join(f"{m.role.upper()}: {m.content}" for m in messages)
+    prompt = (
+        f"## Existing Summary\n\n{previous_summary or '(none yet)'}\n\n"
+        f"## New Turns\n\n{transcript}"
+    )
+
+    response = await chat_with_claude(
+        messages=[{'role': 'user', 'content': prompt}],
+        system_prompt=COMPACTION_INSTRUCTIONS,
+        max_tokens=1024,
+        temperature=0.0,
+        usage_context=usage_context,
+    )
+    return response['content']
+
+
+async def build_conversation(
+    db: AsyncSession,
+    chat: Chat,
+    user_id: int | None = None,
+) -> Tuple[List[Dict[str, str]], str | None]:
+    """
+    Build the history to send for the next turn, compacting if needed.
+
+    Compaction runs once enough turns have aged out of the verbatim window
+    (settings.chat_compaction_batch_turns), so the summary is rewritten
+    once per batch rather than every turn. If compaction fails, the oldest
+    turns are still left out so the per-turn history stays capped.
+
+    Args:
+        db: Database session
+        chat: Chat object (the new user message already saved)
+        user_id: User sending the turn (usage attribution)
+
+    Returns:
+        (Claude messages, running summary or None)
+    """
+    messages = await db.run_sync(load_unsummarized_messages, chat)
+
+    if settings.chat_compaction_enabled:
+        keep = settings.chat_keep_recent_turns * 2
+        limit = keep + settings.chat_compaction_batch_turns * 2
+
+        if len(messages) > limit:
+            boundary = fold_boundary(messages, keep)
+            folded = messages[:boundary]
+
+            try:
+                chat.history_summary = await summarize_turns(
+                    chat.history_summary,
+                    folded,
+                    UsageContext(
+                        operation='compaction',
+                        chat_type=chat.chat_type,
+                        canvas_id=chat.canvas_id,
+                        user_id=user_id,
+                        chat_id=chat.id,
+                    ),
+                )
+                chat.summarized_through_id = folded[-1].id
+                await db.commit()
+                messages = messages[boundary:]
+
+                logger.info(f"Chat compacted: chat={chat.id}, folded={len(folded)} messages")
+            except Exception as e:
+                logger.error(f"Chat compaction failed for chat {chat.id}: {e}")
+                messages = messages[fold_boundary(messages, limit):]
+
+    claude_messages = [
+        {'role': msg.role, 'content': msg.content}
+        for msg in messages
+    ]
+
+    return claude_messages, chat.history_summary
@@ -0,0 +1,455 @@
+"""
+Durable background jobs.
+
+Long operations (large deletes, portfolio analysis) are stored as rows in
+the jobs table and executed by a pool of worker coroutines, so requests can
+return 202 with a job ID instead of holding the connection open.
+
+A worker leases a job by moving it to 'running' with a lease that expires
+after settings.job_visibility_timeout_seconds. While the handler runs the
+worker renews the lease and saves the handler's progress; if the process
+dies the lease lapses and another worker picks the job up again. Failed
+attempts are retried with exponential backoff up to the job's max_attempts.
+Handlers must therefore be safe to run more than once. Workers share the
+event loop with requests, so handlers do their database work through
+AsyncSession (sync ORM helpers via run_sync) and await between batches
+of work (see canvas_service.delete_canvas_job).
+
+Leasing is a single conditional UPDATE, so several backend processes can
+share one jobs table.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.job import Job
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobContext:
+    """
+    Handle passed to job handlers.
+
+    Handlers update `progress` in place (any JSON-serializable values); the
+    worker saves it with each lease renewal and when the job finishes.
+    """
+
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.job_type = job.job_type
+        self.payload: Dict[str, Any] = dict(job.payload or {})
+        self.attempt = job.attempts
+        self.created_by_id = job.created_by_id
+        self.progress: Dict[str, Any] = dict(job.progress or {})
+
+    def set_progress(self, current: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        Report progress as current/total steps.
+
+        Args:
+            current: Steps done
+            total: Total steps (if known)
+            message: Short description of the current step
+        """
+        self.progress.update(current=current, total=total)
+        if message is not None:
+            self.progress["message"] = message
+
+
+JobHandler = Callable[[JobContext, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+# job_type -> handler; handlers return the job result (JSON-serializable) or None
+HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str):
+    """
+    Register an async handler for a job type.
+
+    Args:
+        job_type: Name stored in Job.job_type
+    """
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[job_type] = fn
+        return fn
+    return register
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    payload: Dict[str, Any] | None = None,
+    created_by_id: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Add a job to the queue.
+
+    Args:
+        db: Database session
+        job_type: Registered handler name
+        payload: Handler arguments (JSON-serializable)
+        created_by_id: User who requested the job
+        max_attempts: Attempts before the job fails (default: settings.job_max_attempts)
+
+    Returns:
+        Queued Job
+    """
+    if job_type not in HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    job = Job(
+        job_type=job_type,
+        payload=payload or {},
+        created_by_id=created_by_id,
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts or settings.job_max_attempts,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    logger.info(f"Job queued: {job.id} ({job_type})")
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[Job]:
+    """
+    Get a job by ID.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+
+    Returns:
+        Job or None
+    """
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def get_active_job(db: Session, job_type: str, **payload: Any) -> Optional[Job]:
+    """
+    Get the oldest queued or running job of a type, to avoid queueing duplicates.
+
+    Args:
+        db: Database session
+        job_type: Job type
+        **payload: Payload values the job must match (e.g. canvas_id=3)
+
+    Returns:
+        Job or None
+    """
+    jobs = (
+        db.query(Job)
+        .filter(Job.job_type == job_type, Job.status.in_(ACTIVE_STATUSES))
+        .order_by(Job.id)
+        .all()
+    )
+    for job in jobs:
+        if all((job.payload or {}).get(key) == value for key, value in payload.items()):
+            return job
+    return None
+
+
+def lease_job(db: Session, worker_id: str) -> Optional[Job]:
+    """
+    Lease the next runnable job: queued and due, or running with an expired lease.
+
+    Args:
+        db: Database session
+        worker_id: Leasing worker
+
+    Returns:
+        Leased Job or None if nothing is runnable
+    """
+    now = datetime.utcnow()
+    expired = and_(Job.status == 'running', Job.lease_expires_at < now)
+
+    # Jobs whose last allowed attempt died with its worker fail instead of looping
+    abandoned = db.execute(
+        update(Job)
+        .where(expired, Job.attempts >= Job.max_attempts)
+        .values(status='failed', error="Worker lost (lease expired)", lease_owner=None, finished_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if abandoned:
+        db.commit()
+        logger.warning(f"Failed {abandoned} abandoned job(s) with no attempts left")
+
+    runnable = or_(
+        and_(Job.status == 'queued', Job.run_after <= now),
+        and_(expired, Job.attempts < Job.max_attempts),
+    )
+
+    candidates = db.query(Job.id).filter(runnable).order_by(Job.run_after, Job.id).limit(5).all()
+    for (job_id,) in candidates:
+        # Only one worker's UPDATE matches; the others move on to the next candidate
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, runnable)
+            .values(
+                status='running',
+                attempts=Job.attempts + 1,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=settings.job_visibility_timeout_seconds),
+                started_at=now,
+                error=None,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+        if claimed:
+            return get_job(db, job_id)
+
+    return None
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str, progress: Dict[str, Any]) -> bool:
+    """
+    Extend a lease and save progress.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+        progress: Current progress
+
+    Returns:
+        False if the lease was lost (expired and taken by another worker)
+    """
+    renewed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == worker_id, Job.status == 'running')
+        .values(
+            lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.job_visibility_timeout_seconds),
+            progress=progress,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def retry_delay_seconds(attempt: int) -> float:
+    """
+    Backoff before the next attempt.
+
+    Args:
+        attempt: Attempt that just failed (1-based)
+
+    Returns:
+        Seconds to wait
+    """
+    return settings.job_retry_base_seconds * (2 ** (attempt - 1))
+
+
+def finish_job(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    progress: Dict[str, Any],
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Record the outcome of an attempt, re-queueing failed jobs with attempts left.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+        progress: Final progress
+        result: Handler result (on success)
+        error: Error message (on failure)
+    """
+    job = get_job(db, job_id)
+    if job is None or job.lease_owner != worker_id or job.status != 'running':
+        logger.warning(f"Job {job_id} lease lost before finishing; outcome dropped")
+        return
+
+    now = datetime.utcnow()
+    job.progress = progress
+    job.lease_owner = None
+    job.lease_expires_at = None
+
+    if error is None:
+        job.status = 'complete'
+        job.result = result
+        job.finished_at = now
+    elif job.attempts < job.max_attempts:
+        job.status = 'queued'
+        job.error = error
+        job.run_after = now + timedelta(seconds=retry_delay_seconds(job.attempts))
+    else:
+        job.status = 'failed'
+        job.error = error
+        job.finished_at = now
+
+    db.commit()
+    logger.info(f"Job {job_id} ({job.job_type}) attempt {job.attempts}: {job.status}")
+
+
+def job_status(job: Job) -> Dict[str, Any]:
+    """
+    Serialize a job for API responses.
+
+    Args:
+        job: Job
+
+    Returns:
+        Job status dict
+    """
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class JobWorkerPool:
+    """Worker coroutines that lease and run jobs in this process"""
+
+    def __init__(self):
+        self.worker_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._workers: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def start(self, workers: Optional[int] = None) -> None:
+        """
+        Start the worker coroutines (call from the event loop).
+
+        Args:
+            workers: Worker count (default: settings.job_workers)
+        """
+        if self._workers:
+            return
+
+        self._stopping = False
+        count = workers or settings.job_workers
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.worker_prefix}-{i}"))
+            for i in range(count)
+        ]
+        logger.info(f"Job workers started: {count}")
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs are abandoned and re-leased after their lease expires"""
+        self._stopping = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self) -> None:
+        """Wake idle workers (call after enqueueing)"""
+        self._wakeup.set()
+
+    async def _wait_for_work(self) -> None:
+        """Sleep until notified or the poll interval passes"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _work(self, worker_id: str) -> None:
+        """Worker loop: lease, run, repeat"""
+        while not self._stopping:
+            try:
+                job = await self._lease(worker_id)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} failed to lease: {e}", exc_info=True)
+                job = None
+
+            if job is None:
+                await self._wait_for_work()
+                continue
+
+            await self._run(job, worker_id)
+
+    async def _lease(self, worker_id: str) -> Optional[JobContext]:
+        """Lease a job and build its context (own session, on the async engine)"""
+        async with AsyncSessionLocal() as db:
+            job = await db.run_sync(lease_job, worker_id)
+            if job is None:
+                return None
+            return JobContext(job)
+
+    async def _run(self, context: JobContext, worker_id: str) -> None:
+        """Run one leased job, renewing its lease until the handler returns"""
+        handler = HANDLERS.get(context.job_type)
+        logger.info(f"Job {context.job_id} ({context.job_type}) attempt {context.attempt} on {worker_id}")
+
+        task = asyncio.create_task(handler(context, context.payload)) if handler else None
+        heartbeat = asyncio.create_task(self._heartbeat(context, worker_id, task)) if task else None
+
+        result, error = None, None
+        try:
+            if task is None:
+                error = f"No handler for job type: {context.job_type}"
+            else:
+                result = await task
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise
+            error = "Job lease lost"
+        except Exception as e:
+            logger.error(f"Job {context.job_id} ({context.job_type}) failed: {e}", exc_info=True)
+            error = str(e) or type(e).__name__
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            if task and not task.done():
+                task.cancel()
+
+        await self._finish(context, worker_id, result, error)
+
+    async def _heartbeat(self, context: JobContext, worker_id: str, task: asyncio.Task) -> None:
+        """Renew the lease (and save progress) until cancelled; stop the handler if the lease is lost"""
+        interval = settings.job_visibility_timeout_seconds / 3
+        while True:
+            await asyncio.sleep(min(interval, settings.job_progress_interval_seconds))
+            try:
+                renewed = await self._renew(context, worker_id)
+            except Exception as e:
+                logger.warning(f"Job {context.job_id} lease renewal failed: {e}")
+                continue
+
+            if not renewed:
+                logger.warning(f"Job {context.job_id} lease lost by {worker_id}; stopping handler")
+                task.cancel()
+                return
+
+    async def _renew(self, context: JobContext, worker_id: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(renew_lease, context.job_id, worker_id, dict(context.progress))
+
+    async def _finish(self, context: JobContext, worker_id: str, result, error) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(
+                finish_job, context.job_id, worker_id, dict(context.progress), result=result, error=error
+            )
+
+
+job_workers = JobWorkerPool()
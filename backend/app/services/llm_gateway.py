@@ -0,0 +1,148 @@
+"""
+Async gateway for LLM calls.
+
+boto3 is synchronous, so model calls run on a bounded, dedicated thread pool
+instead of on the event loop. One slow model call then only ties up one LLM
+worker thread, never the whole uvicorn worker.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dedicated pool: LLM calls never compete with FastAPI's default threadpool
+_executor = ThreadPoolExecutor(
+    max_workers=settings.llm_max_concurrency,
+    thread_name_prefix="llm-gateway",
+)
+
+_STREAM_END = object()
+
+
+class LLMTimeoutError(Exception):
+    """
+    Raised when a model call exceeds its timeout.
+
+    The executor thread cannot be interrupted and keeps running until the
+    HTTP client's own timeout; worker is its future, so callers can keep
+    counting the call as in flight until it finishes.
+    """
+
+    def __init__(self, message: str, worker: asyncio.Future | None = None):
+        super().__init__(message)
+        self.worker = worker
+
+
+class LLMThrottledError(Exception):
+    """Raised when the model is throttled or at capacity; retry later"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+async def run(
+    fn: Callable[..., Any],
+    *args: Any,
+    timeout: float | None = None,
+) -> Any:
+    """
+    Run a blocking model call on the LLM executor.
+
+    Args:
+        fn: Blocking callable (e.g. a boto3 invoke)
+        *args: Arguments for fn
+        timeout: Seconds to wait (default: settings.llm_timeout_seconds)
+
+    Returns:
+        Result of fn
+
+    Raises:
+        LLMTimeoutError: If the call does not finish within the timeout
+    """
+    timeout = timeout or settings.llm_timeout_seconds
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, fn, *args)
+
+    try:
+        # Shielded so the future still tracks the thread after a timeout
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"LLM call timed out after {timeout}s")
+        raise LLMTimeoutError(f"Model call timed out after {timeout}s", worker=future)
+
+
+async def stream(
+    factory: Callable[[], Iterator[Any]],
+    timeout: float | None = None,
+) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator on the LLM executor and yield its items.
+
+    The iterator is driven by a worker thread that hands items to the event
+    loop through a queue. If the consumer stops early (client disconnect,
+    task cancellation) the worker is told to stop and closes the iterator,
+    which releases the upstream HTTP stream.
+
+    Args:
+        factory: Callable returning the blocking iterator
+        timeout: Max seconds to wait for each item
+            (default: settings.llm_timeout_seconds)
+
+    Yields:
+        Items from the iterator
+
+    Raises:
+        LLMTimeoutError: If no item arrives within the timeout
+    """
+    timeout = timeout or settings.llm_timeout_seconds
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def pump():
+        iterator = None
+        try:
+            # Inside the try: a factory error (e.g. opening the upstream
+            # stream) reaches the consumer instead of a stall timeout
+            iterator = factory()
+            for item in iterator:
+                if cancelled.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+            loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, None))
+
+    worker = loop.run_in_executor(_executor, pump)
+
+    try:
+        while True:
+            try:
+                item, error = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"LLM stream stalled for {timeout}s")
+                raise LLMTimeoutError(f"Model stream stalled for {timeout}s", worker=worker)
+
+            if error is not None:
+                raise error
+            if item is _STREAM_END:
+                break
+            yield item
+    finally:
+        cancelled.set()
+        if not worker.done():
+            logger.info("LLM stream abandoned by consumer, stopping worker")
+
+
+def shutdown() -> None:
+    """Stop accepting LLM calls and drop queued ones"""
+    _executor.shutdown(wait=False, cancel_futures=True)
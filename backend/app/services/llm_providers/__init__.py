@@ -0,0 +1,43 @@
+"""
+Model providers (settings.llm_provider).
+
+- 'bedrock': Claude on AWS Bedrock (default)
+- 'anthropic': Claude via the Anthropic API
+- 'simulated': deterministic local simulator for load tests and offline dev
+"""
+from app.core.config import settings
+from app.services.llm_providers.base import LLMProvider
+from app.services.llm_providers.bedrock import BedrockProvider
+from app.services.llm_providers.anthropic_api import AnthropicProvider
+from app.services.llm_providers.simulated import SimulatedProvider
+
+PROVIDERS = {
+    "bedrock": BedrockProvider,
+    "anthropic": AnthropicProvider,
+    "simulated": SimulatedProvider,
+}
+
+_instances: dict[str, LLMProvider] = {}
+
+
+def get_provider(name: str | None = None) -> LLMProvider:
+    """
+    Get a provider instance (one per name, created on first use).
+
+    Args:
+        name: Provider name (default: settings.llm_provider)
+
+    Returns:
+        LLMProvider
+    """
+    name = name or settings.llm_provider
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+
+    provider = _instances.get(name)
+    if provider is None:
+        provider = _instances.setdefault(name, PROVIDERS[name]())
+    return provider
+
+
+__all__ = ["LLMProvider", "get_provider", "PROVIDERS"]
@@ -0,0 +1,64 @@
+"""Direct Anthropic API provider"""
+import threading
+from typing import Any, Dict, Iterator
+from app.core.config import settings
+from app.services.llm_providers.base import LLMProvider, parse_stream_events
+
+
+class AnthropicProvider(LLMProvider):
+    """Claude via the Anthropic API (settings.anthropic_api_key)"""
+
+    name = "anthropic"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return settings.anthropic_model_id
+
+    def get_client(self):
+        """
+        Get the shared Anthropic client, creating it on first use.
+
+        Returns:
+            anthropic.Anthropic client
+        """
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                import anthropic
+
+                if not settings.anthropic_api_key:
+                    raise ValueError("ANTHROPIC_API_KEY is required for the anthropic provider")
+
+                self._client = anthropic.Anthropic(
+                    api_key=settings.anthropic_api_key,
+                    timeout=settings.llm_timeout_seconds,
+                    # Throttling is retried by the LLM scheduler
+                    max_retries=0,
+                )
+
+        return self._client
+
+    def _params(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """Bedrock-style body -> Anthropic API parameters"""
+        params = {k: v for k, v in request_body.items() if k != "anthropic_version"}
+        params["model"] = self.model
+        return params
+
+    def invoke(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        message = self.get_client().messages.create(**self._params(request_body))
+        return message.model_dump()
+
+    def iter_stream(self, request_body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        stream = self.get_client().messages.create(**self._params(request_body), stream=True)
+
+        try:
+            yield from parse_stream_events(event.model_dump() for event in stream)
+        finally:
+            # Release the HTTP connection if the consumer stopped early
+            stream.response.close()
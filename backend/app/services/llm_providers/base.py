@@ -0,0 +1,95 @@
+"""
+Provider interface for model calls.
+
+Providers take an Anthropic messages request body (see
+claude_service.build_request_body) and return an Anthropic-shaped response,
+so everything above them (scheduler, caching, usage ledger) is provider
+agnostic. Both methods are blocking and run on the LLM gateway executor.
+"""
+from typing import Any, Dict, Iterable, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider:
+    """Base class for model providers"""
+
+    name = "base"
+
+    @property
+    def model(self) -> str:
+        """Model ID requests are sent to"""
+        raise NotImplementedError
+
+    def invoke(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a blocking model call.
+
+        Args:
+            request_body: Anthropic messages request body
+
+        Returns:
+            Response body with 'content', 'usage', 'stop_reason' and 'model'
+        """
+        raise NotImplementedError
+
+    def iter_stream(self, request_body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Make a blocking streaming model call.
+
+        Args:
+            request_body: Anthropic messages request body
+
+        Yields:
+            A {"type": "usage", "usage": ..., "model": ...} event once the
+            input is counted, {"type": "text", "text": ...} events, then a
+            single {"type": "done", "usage": ..., "stop_reason": ..., "model": ...}
+        """
+        raise NotImplementedError
+
+
+def _known(usage: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Drop unset counters (SDK models dump them as None)"""
+    return {k: v for k, v in (usage or {}).items() if v is not None}
+
+
+def parse_stream_events(payloads: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Turn Anthropic streaming events into text/done events.
+
+    Args:
+        payloads: Raw stream events (message_start, content_block_delta, ...)
+
+    Yields:
+        Stream event dicts (see LLMProvider.iter_stream)
+    """
+    usage: Dict[str, Any] = {}
+    stop_reason = None
+    model = None
+
+    for payload in payloads:
+        event_type = payload.get('type')
+
+        if event_type == 'message_start':
+            message = payload.get('message', {})
+            model = message.get('model')
+            usage.update(_known(message.get('usage')))
+            # Input is billed from here on, even if the stream is cut off
+            yield {"type": "usage", "usage": dict(usage), "model": model}
+        elif event_type == 'content_block_delta':
+            delta = payload.get('delta', {})
+            if delta.get('type') == 'text_delta' and delta.get('text'):
+                yield {"type": "text", "text": delta['text']}
+        elif event_type == 'message_delta':
+            stop_reason = payload.get('delta', {}).get('stop_reason')
+            usage.update(_known(payload.get('usage')))
+
+    logger.info(f"Model stream finished, usage: {usage}")
+
+    yield {
+        "type": "done",
+        "usage": usage,
+        "stop_reason": stop_reason,
+        "model": model,
+    }
@@ -0,0 +1,44 @@
+"""AWS Bedrock provider (shared client from bedrock_pool)"""
+import json
+from typing import Any, Dict, Iterator
+from app.core.config import settings
+from app.services.bedrock_pool import bedrock_pool
+from app.services.llm_providers.base import LLMProvider, parse_stream_events
+
+
+class BedrockProvider(LLMProvider):
+    """Claude via Bedrock invoke_model / invoke_model_with_response_stream"""
+
+    name = "bedrock"
+
+    @property
+    def model(self) -> str:
+        return settings.aws_bedrock_model_id
+
+    def invoke(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        with bedrock_pool.lease() as client:
+            response = client.invoke_model(
+                modelId=self.model,
+                body=json.dumps(request_body)
+            )
+
+            return json.loads(response['body'].read())
+
+    def iter_stream(self, request_body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        with bedrock_pool.lease() as client:
+            response = client.invoke_model_with_response_stream(
+                modelId=self.model,
+                body=json.dumps(request_body)
+            )
+
+            payloads = (
+                json.loads(event['chunk']['bytes'])
+                for event in response['body']
+                if event.get('chunk')
+            )
+
+            try:
+                yield from parse_stream_events(payloads)
+            finally:
+                # Release the HTTP connection if the consumer stopped early
+                response['body'].close()
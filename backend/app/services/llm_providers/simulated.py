@@ -0,0 +1,114 @@
+"""
+Deterministic local model simulator.
+
+Produces Anthropic-shaped responses with no network access, for load
+testing the whole chat path on a laptop. The reply text depends only on the
+request, latency follows settings.llm_simulator_ttft_ms and
+settings.llm_simulator_tokens_per_second, and errors are injected at the
+configured rates from a seeded random stream.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator
+from app.core.config import settings
+from app.services.llm_providers.base import LLMProvider, parse_stream_events
+
+SIMULATED_MODEL = "simulated-claude"
+
+_WORDS = (
+    "deal champion budget timeline security team data risk stakeholder "
+    "meeting decision criteria next step follow up proposal pilot scope "
+    "compliance visibility sensitive cloud coverage renewal executive"
+).split()
+
+
+class SimulatedError(Exception):
+    """Injected failure; status_code mirrors the HTTP error it stands for"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SimulatedProvider(LLMProvider):
+    """Local provider with configurable latency, token rate and error injection"""
+
+    name = "simulated"
+
+    def __init__(self):
+        self._random = random.Random(settings.llm_simulator_seed)
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return SIMULATED_MODEL
+
+    def _maybe_fail(self) -> None:
+        """Raise an injected throttle or server error at the configured rates"""
+        with self._lock:
+            roll = self._random.random()
+
+        if roll < settings.llm_simulator_throttle_rate:
+            raise SimulatedError("Simulated throttling", status_code=429)
+        if roll < settings.llm_simulator_throttle_rate + settings.llm_simulator_error_rate:
+            raise SimulatedError("Simulated server error", status_code=500)
+
+    def _reply(self, request_body: Dict[str, Any]) -> tuple[list[str], int]:
+        """Deterministic reply words and input token estimate for a request"""
+        canonical = json.dumps(request_body, sort_keys=True, default=str)
+        digest = hashlib.sha256(canonical.encode("utf-8")).digest()
+        rng = random.Random(digest)
+
+        output_tokens = min(request_body.get("max_tokens", 4096), settings.llm_simulator_output_tokens)
+        words = [rng.choice(_WORDS) for _ in range(output_tokens)]
+        return words, len(canonical) // 4
+
+    def _usage(self, input_tokens: int, output_tokens: int) -> Dict[str, int]:
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+    def invoke(self, request_body: Dict[str, Any]) -> Dict[str, Any]:
+        self._maybe_fail()
+        words, input_tokens = self._reply(request_body)
+
+        time.sleep(
+            settings.llm_simulator_ttft_ms / 1000
+            + len(words) / settings.llm_simulator_tokens_per_second
+        )
+
+        return {
+            "content": [{"type": "text", "text": " ".join(words)}],
+            "usage": self._usage(input_tokens, len(words)),
+            "stop_reason": "end_turn",
+            "model": SIMULATED_MODEL,
+        }
+
+    def iter_stream(self, request_body: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        self._maybe_fail()
+        words, input_tokens = self._reply(request_body)
+        yield from parse_stream_events(self._events(words, input_tokens))
+
+    def _events(self, words: list[str], input_tokens: int) -> Iterator[Dict[str, Any]]:
+        """Anthropic streaming events, paced like a real model"""
+        time.sleep(settings.llm_simulator_ttft_ms / 1000)
+        yield {
+            "type": "message_start",
+            "message": {"model": SIMULATED_MODEL, "usage": self._usage(input_tokens, 0)},
+        }
+
+        interval = 1.0 / settings.llm_simulator_tokens_per_second
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(interval)
+            yield {
+                "type": "content_block_delta",
+                "delta": {"type": "text_delta", "text": word if i == 0 else f" {word}"},
+            }
+
+        yield {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn"},
+            "usage": {"output_tokens": len(words)},
+        }
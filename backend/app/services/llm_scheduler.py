@@ -0,0 +1,374 @@
+"""
+Adaptive scheduler for model calls.
+
+All Bedrock calls pass through one scheduler that:
+
+- limits calls in flight with an AIMD limit: +1 per window of successes,
+  halved (at most once per cooldown) when Bedrock throttles, never outside
+  [settings.llm_min_concurrency, settings.llm_max_concurrency]
+- queues calls by priority (interactive chat ahead of background summaries
+  ahead of batch reports) and round-robins between users within a priority
+- retries throttled calls with jittered exponential backoff, then raises
+  LLMThrottledError so routers can answer 429 instead of a generic 500
+- records queue depth, wait times, throttles and retries for monitoring
+"""
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List
+from app.core.config import settings
+from app.services.llm_gateway import LLMThrottledError, LLMTimeoutError
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # User waiting on a chat response
+PRIORITY_BACKGROUND = 1  # Node summaries and other background work
+PRIORITY_BATCH = 2  # Portfolio reports
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+    PRIORITY_BATCH: "batch",
+}
+
+# Bedrock error codes that mean "slow down"
+THROTTLING_ERROR_CODES = {
+    "throttlingexception",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+    "serviceunavailableexception",
+}
+
+# HTTP statuses meaning "slow down" (rate limited, overloaded)
+THROTTLING_STATUS_CODES = {429, 529}
+
+# Minimum seconds between two multiplicative decreases
+DECREASE_COOLDOWN_SECONDS = 2.0
+
+# Cap on a single retry backoff
+MAX_BACKOFF_SECONDS = 10.0
+
+# Recent wait times kept per priority for percentiles
+WAIT_SAMPLES = 1000
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Check whether an error is provider throttling or overload.
+
+    Args:
+        error: Exception from a model call (botocore ClientError and
+            EventStreamError carry the code in .response; Anthropic API and
+            simulator errors carry an HTTP .status_code)
+
+    Returns:
+        True if the call should be retried later
+    """
+    if getattr(error, "status_code", None) in THROTTLING_STATUS_CODES:
+        return True
+
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return False
+    code = response.get("Error", {}).get("Code", "")
+    return code.lower() in THROTTLING_ERROR_CODES
+
+
+def backoff_seconds(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff.
+
+    Args:
+        attempt: Zero-based retry number
+
+    Returns:
+        Seconds to wait
+    """
+    ceiling = min(MAX_BACKOFF_SECONDS, settings.llm_retry_base_seconds * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class Waiter:
+    """A queued call waiting for a slot"""
+
+    __slots__ = ("future", "priority", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, priority: int):
+        self.future = future
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+
+class LLMScheduler:
+    """Priority, per-user fair queue in front of an AIMD concurrency limit"""
+
+    def __init__(self, min_limit: int, max_limit: int):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+
+        # priority -> user key -> waiters (users served round-robin)
+        self._queues: Dict[int, OrderedDict[Any, Deque[Waiter]]] = {
+            priority: OrderedDict() for priority in PRIORITY_NAMES
+        }
+        self._last_decrease = 0.0
+
+        # Metrics
+        self._waits: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITY_NAMES
+        }
+        self.completed = 0
+        self.timed_out_running = 0
+        self.throttles = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def _capacity(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def _queued(self) -> int:
+        return sum(len(q) for queues in self._queues.values() for q in queues.values())
+
+    async def acquire(self, priority: int, user_key: Any, timeout: float | None = None) -> None:
+        """
+        Wait for a call slot.
+
+        Args:
+            priority: PRIORITY_* class
+            user_key: Caller identity for fair queuing
+            timeout: Max seconds to wait in the queue (None = no limit)
+
+        Raises:
+            LLMThrottledError: If no slot frees up within the timeout
+        """
+        if self.in_flight < self._capacity() and not self._queued():
+            self.in_flight += 1
+            self._waits[priority].append(0.0)
+            return
+
+        waiter = Waiter(asyncio.get_running_loop().create_future(), priority)
+        self._queues[priority].setdefault(user_key, deque()).append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up; hand the slot on
+                self.release()
+            else:
+                self._remove(waiter, user_key)
+
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise LLMThrottledError(
+                    f"Model capacity busy, waited {timeout}s",
+                    retry_after=settings.llm_retry_base_seconds * 4,
+                )
+            raise
+
+    def _remove(self, waiter: Waiter, user_key: Any) -> None:
+        queues = self._queues[waiter.priority]
+        waiters = queues.get(user_key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not waiters:
+            del queues[user_key]
+
+    def release(self, worker: asyncio.Future | None = None) -> None:
+        """
+        Return a call slot and start queued calls that now fit.
+
+        Args:
+            worker: Executor future of a call that timed out; the slot is
+                held until its thread actually finishes
+        """
+        if worker is not None and not worker.done():
+            self.timed_out_running += 1
+            worker.add_done_callback(self._release_timed_out)
+            return
+
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _release_timed_out(self, worker: asyncio.Future) -> None:
+        self.timed_out_running -= 1
+        self.release()
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+
+        for priority, queues in self._queues.items():
+            while queues and self.in_flight < self._capacity():
+                user_key, waiters = next(iter(queues.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    queues.move_to_end(user_key)
+                else:
+                    del queues[user_key]
+
+                if waiter.future.done():
+                    continue
+
+                self.in_flight += 1
+                self._waits[priority].append(now - waiter.enqueued_at)
+                waiter.future.set_result(None)
+
+    def on_success(self) -> None:
+        """Additive increase: about +1 per `limit` successful calls"""
+        self.completed += 1
+        if self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._dispatch()
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease, at most once per cooldown"""
+        self.throttles += 1
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+            return
+
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit / 2)
+        logger.warning(f"Bedrock throttling: concurrency limit {previous:.1f} -> {self.limit:.1f}")
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_INTERACTIVE,
+        user_key: Any = None,
+    ) -> Any:
+        """
+        Run a model call under the scheduler, retrying on throttling.
+
+        Args:
+            fn: Coroutine factory making one upstream call
+            priority: PRIORITY_* class
+            user_key: Caller identity for fair queuing
+
+        Returns:
+            Result of fn
+
+        Raises:
+            LLMThrottledError: If still throttled after settings.llm_max_retries
+        """
+        for attempt in range(settings.llm_max_retries + 1):
+            await self.acquire(priority, user_key, self._queue_timeout(priority))
+            worker = None
+            try:
+                result = await fn()
+            except LLMTimeoutError as e:
+                worker = e.worker
+                raise
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self.on_throttle()
+                error = e
+            else:
+                self.on_success()
+                return result
+            finally:
+                self.release(worker)
+
+            if attempt < settings.llm_max_retries:
+                self.retries += 1
+                await asyncio.sleep(backoff_seconds(attempt))
+
+        raise LLMThrottledError(
+            f"Model throttled after {settings.llm_max_retries} retries: {error}",
+            retry_after=backoff_seconds(settings.llm_max_retries) + 1,
+        )
+
+    async def stream(
+        self,
+        factory: Callable[[], AsyncIterator[Any]],
+        priority: int = PRIORITY_INTERACTIVE,
+        user_key: Any = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Run a streaming model call under the scheduler, holding a slot for
+        the whole stream. Throttling is retried only before the first event.
+
+        Args:
+            factory: Callable returning the async event iterator
+            priority: PRIORITY_* class
+            user_key: Caller identity for fair queuing
+
+        Yields:
+            Stream events
+
+        Raises:
+            LLMThrottledError: If throttled after events were sent or retries ran out
+        """
+        for attempt in range(settings.llm_max_retries + 1):
+            await self.acquire(priority, user_key, self._queue_timeout(priority))
+            started = False
+            worker = None
+            try:
+                async for event in factory():
+                    started = True
+                    yield event
+                self.on_success()
+                return
+            except LLMTimeoutError as e:
+                worker = e.worker
+                raise
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                self.on_throttle()
+                if started or attempt == settings.llm_max_retries:
+                    raise LLMThrottledError(f"Model throttled: {e}", retry_after=backoff_seconds(attempt) + 1)
+            finally:
+                self.release(worker)
+
+            self.retries += 1
+            await asyncio.sleep(backoff_seconds(attempt))
+
+    def _queue_timeout(self, priority: int) -> float | None:
+        """Only interactive calls give up waiting; background work can wait"""
+        return settings.llm_queue_timeout_seconds if priority == PRIORITY_INTERACTIVE else None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dict with the current limit, queue depth and wait times per priority
+        """
+        queues = {}
+        for priority, name in PRIORITY_NAMES.items():
+            waits: List[float] = sorted(self._waits[priority])
+            queues[name] = {
+                "depth": sum(len(q) for q in self._queues[priority].values()),
+                "users_waiting": len(self._queues[priority]),
+                "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else None,
+                "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else None,
+            }
+
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "timed_out_running": self.timed_out_running,
+            "completed": self.completed,
+            "throttles": self.throttles,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "queues": queues,
+        }
+
+
+llm_scheduler = LLMScheduler(
+    min_limit=settings.llm_min_concurrency,
+    max_limit=settings.llm_max_concurrency,
+)
@@ -1,16 +1,27 @@
 """
 Node management service.
+
+Functions take an AsyncSession unless suffixed _sync (for context assembly,
+which is still on Session).
 """
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.node import Node
 from app.models.canvas import Canvas
+from app.services.context_renderer import fragment_cache
+from app.services.retrieval_index import retrieval_index
+from app.services.summarization_service import (
+    compute_content_hash,
+    schedule_summary,
+)
 from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def get_node_by_id(db: Session, node_id: int) -> Node | None:
+async def get_node_by_id(db: AsyncSession, node_id: int) -> Node | None:
     """
     Get node by ID.
 
@@ -21,10 +32,11 @@ def get_node_by_id(db: Session, node_id: int) -> Node | None:
     Returns:
         Node object or None
     """
-    return db.query(Node).filter(Node.id == node_id).first()
+    result = await db.execute(select(Node).where(Node.id == node_id))
+    return result.scalars().first()
 
 
-def get_canvas_nodes(db: Session, canvas: Canvas) -> List[Node]:
+async def get_canvas_nodes(db: AsyncSession, canvas: Canvas) -> List[Node]:
     """
     Get all nodes for a canvas.
 
@@ -35,11 +47,26 @@ def get_canvas_nodes(db: Session, canvas: Canvas) -> List[Node]:
     Returns:
         List of Node objects
     """
-    return db.query(Node).filter(Node.canvas_id == canvas.id).all()
+    result = await db.execute(select(Node).where(Node.canvas_id == canvas.id))
+    return list(result.scalars().all())
+
+
+def get_canvas_nodes_sync(db: Session, canvas: Canvas) -> List[Node]:
+    """
+    Get all nodes for a canvas (sync session).
 
+    Args:
+        db: Database session
+        canvas: Canvas object
 
-def create_node(
-    db: Session,
+    Returns:
+        List of Node objects
+    """
+    return list(db.execute(select(Node).where(Node.canvas_id == canvas.id)).scalars().all())
+
+
+async def create_node(
+    db: AsyncSession,
     canvas: Canvas,
     node_type: str,
     title: str,
@@ -80,18 +107,18 @@ def create_node(
     )
 
     db.add(node)
-    db.commit()
-    db.refresh(node)
+    await db.commit()
+    await db.refresh(node)
 
     # Calculate and update content size
-    update_node_content_size(db, node)
+    await update_node_content_size(db, node)
 
     logger.info(f"Node created: {node.id} ({node_type}) on canvas {canvas.id}")
     return node
 
 
-def update_node(
-    db: Session,
+async def update_node(
+    db: AsyncSession,
     node: Node,
     title: str | None = None,
     position_x: float | None = None,
@@ -137,18 +164,20 @@ def update_node(
     if status is not None:
         node.status = status
 
-    db.commit()
-    db.refresh(node)
+    await db.commit()
+    await db.refresh(node)
 
-    # Recalculate content size if data changed
-    if data is not None:
-        update_node_content_size(db, node)
+    # Recalculate content size if context content changed
+    if data is not None or title is not None:
+        await update_node_content_size(db, node)
+    elif exclude_from_context is not None:
+        retrieval_index.update_node(node)
 
     logger.info(f"Node updated: {node.id}")
     return node
 
 
-def delete_node(db: Session, node: Node) -> None:
+async def delete_node(db: AsyncSession, node: Node) -> None:
     """
     Delete a node.
 
@@ -157,15 +186,20 @@ def delete_node(db: Session, node: Node) -> None:
         node: Node to delete
     """
     node_id = node.id
-    db.delete(node)
-    db.commit()
+    canvas_id = node.canvas_id
+    await db.delete(node)
+    await db.commit()
+
+    fragment_cache.invalidate(node_id)
+    retrieval_index.remove_node(canvas_id, node_id)
 
     logger.info(f"Node deleted: {node_id}")
 
 
-def update_node_content_size(db: Session, node: Node) -> Node:
+async def update_node_content_size(db: AsyncSession, node: Node) -> Node:
     """
-    Calculate and update the content size of a node.
+    Calculate and update the content size and hash of a node.
+    Large nodes get a background summary (see summarization_service).
 
     Args:
         db: Database session
@@ -187,43 +221,22 @@ def update_node_content_size(db: Session, node: Node) -> Node:
                 size += len(str(value))
 
     node.content_size = size
-    db.commit()
-    db.refresh(node)
-
-    return node
-
-
-def get_node_context_string(node: Node, summarize: bool = False) -> str:
-    """
-    Get node content as a string for AI context.
+    node.content_hash = compute_content_hash(node.title, node.node_type, node.data)
+    await db.commit()
+    await db.refresh(node)
 
-    Args:
-        node: Node object
-        summarize: Whether to summarize if content is large
+    # Content changed: only this node's context fragment is re-rendered
+    fragment_cache.invalidate(node.id)
+    retrieval_index.update_node(node)
 
-    Returns:
-        String representation of node content
-    """
-    if node.exclude_from_context:
-        return ""
+    # Summary lookups are sync; run them on the session's sync half
+    await db.run_sync(schedule_summary, node)
 
-    # Build context string
-    context = f"# {node.title} ({node.node_type})\n\n"
-
-    if node.data:
-        for key, value in node.data.items():
-            if isinstance(value, str):
-                context += f"**{key}**: {value}\n"
-            elif isinstance(value, (list, dict)):
-                context += f"**{key}**: {str(value)}\n"
-
-    # TODO: Add summarization logic if content is too large
-    # For now, just return as-is
-    return context
+    return node
 
 
-def bulk_update_node_positions(
-    db: Session,
+async def bulk_update_node_positions(
+    db: AsyncSession,
     updates: List[dict]
 ) -> List[Node]:
     """
@@ -237,19 +250,21 @@ def bulk_update_node_positions(
     Returns:
         List of updated Node objects
     """
+    result = await db.execute(select(Node).where(Node.id.in_([update['id'] for update in updates])))
+    nodes = {node.id: node for node in result.scalars().all()}
     updated_nodes = []
 
     for update in updates:
-        node = get_node_by_id(db, update['id'])
+        node = nodes.get(update['id'])
         if node:
             node.position_x = update.get('position_x', node.position_x)
             node.position_y = update.get('position_y', node.position_y)
             updated_nodes.append(node)
 
-    db.commit()
+    await db.commit()
 
     for node in updated_nodes:
-        db.refresh(node)
+        await db.refresh(node)
 
     logger.info(f"Bulk updated {len(updated_nodes)} node positions")
     return updated_nodes
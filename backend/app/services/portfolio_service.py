@@ -0,0 +1,649 @@
+"""
+Portfolio-wide batch "What's Next" analysis.
+
+A run walks every non-archived canvas, builds its budgeted context and
+skips canvases whose context hash matches their last successful analysis.
+The remaining canvases go to a provider:
+
+- 'bedrock': online calls through the LLM gateway to the configured
+  provider (settings.llm_provider), at most
+  settings.portfolio_max_concurrency in flight
+- 'bedrock_batch': one Bedrock batch inference job via S3 (falls back to
+  online calls below settings.portfolio_batch_min_records)
+- 'fake': canned results without any model call, for tests and local dev
+  (debug mode only)
+
+Canvases are planned settings.portfolio_plan_batch_size at a time, so only
+one batch of contexts is held in memory, and each result is upserted into
+portfolio_analyses as soon as it arrives (one row per canvas, read by the
+manager dashboard in a single query). A retried or repeated run therefore
+skips every canvas already analyzed.
+
+Runs execute as 'portfolio_whats_next' background jobs (see job_service).
+"""
+import asyncio
+import json
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.models.job import Job
+from app.models.node import Node
+from app.models.portfolio import PortfolioAnalysis
+from app.services import llm_gateway
+from app.services.bedrock_pool import bedrock_pool
+from app.services.claude_service import (
+    chat_with_claude,
+    create_whats_next_prompt,
+    WHATS_NEXT_INSTRUCTIONS,
+    WHATS_NEXT_PROMPT_VERSION,
+)
+from app.services.context_assembler import assemble_canvas_context
+from app.services.context_service import node_context_data
+from app.services.job_service import JobContext, enqueue_job, get_active_job, job_handler, job_workers
+from app.services.llm_providers import get_provider
+from app.services.llm_scheduler import PRIORITY_BATCH
+from app.services.result_cache import make_cache_key
+from app.services.summarization_service import get_summaries, needs_summary
+from app.services.usage_service import record_usage, UsageContext
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ('bedrock', 'bedrock_batch', 'fake')
+
+PORTFOLIO_WHATS_NEXT_MESSAGE = "What should happen next on this deal? Give your analysis and top recommended actions."
+
+PORTFOLIO_MAX_TOKENS = 2048
+
+# Bedrock batch job states that will not change any more
+BATCH_TERMINAL_STATES = {'Completed', 'PartiallyCompleted', 'Failed', 'Stopped', 'Expired'}
+
+
+@dataclass
+class PortfolioJob:
+    """One canvas to analyze"""
+
+    canvas_id: int
+    context_hash: str
+    context: str
+
+
+# Called with each canvas's result as soon as it is available
+ResultCallback = Callable[[PortfolioJob, Dict[str, Any]], Awaitable[None]]
+
+
+def analysis_model(provider: str) -> str:
+    """
+    Model that produces a run provider's results, as 'llm_provider:model'.
+
+    Online runs go through the configured LLM provider (settings.llm_provider);
+    batch jobs always run on Bedrock. Canned results are 'fake'.
+    """
+    if provider == 'fake':
+        return 'fake'
+    if provider == 'bedrock_batch':
+        return f"bedrock:{settings.aws_bedrock_model_id}"
+
+    llm = get_provider()
+    return f"{llm.name}:{llm.model}"
+
+
+def portfolio_context_hash(context: str, provider: str) -> str:
+    """
+    Hash everything that determines a canvas's analysis.
+
+    Args:
+        context: Canvas context text
+        provider: Run provider (canned results never match a real model's)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return make_cache_key(
+        context=context,
+        prompt_version=WHATS_NEXT_PROMPT_VERSION,
+        model=analysis_model(provider),
+    )
+
+
+def load_plan_batch(
+    db: Session,
+    canvas_ids: List[int],
+) -> Tuple[List[Tuple[Canvas, List[Dict[str, Any]]]], Dict[int, str]]:
+    """
+    Load a batch of canvases' context inputs in a few queries.
+
+    Args:
+        db: Database session
+        canvas_ids: Canvases to load
+
+    Returns:
+        ((canvas, node data) pairs, context hash of each canvas's last complete analysis)
+    """
+    canvases = db.query(Canvas).filter(Canvas.id.in_(canvas_ids)).order_by(Canvas.id).all()
+
+    nodes_by_canvas: Dict[int, List[Node]] = defaultdict(list)
+    for node in db.query(Node).filter(Node.canvas_id.in_(canvas_ids)).order_by(Node.canvas_id, Node.id):
+        nodes_by_canvas[node.canvas_id].append(node)
+
+    summaries = get_summaries(db, [
+        node.content_hash
+        for nodes in nodes_by_canvas.values()
+        for node in nodes
+        if needs_summary(node)
+    ])
+    inputs = [
+        (canvas, [node_context_data(n, summaries.get(n.content_hash)) for n in nodes_by_canvas[canvas.id]])
+        for canvas in canvases
+    ]
+
+    previous = dict(
+        db.query(PortfolioAnalysis.canvas_id, PortfolioAnalysis.context_hash)
+        .filter(PortfolioAnalysis.canvas_id.in_(canvas_ids), PortfolioAnalysis.status == 'complete')
+        .all()
+    )
+    return inputs, previous
+
+
+def plan_batch(
+    inputs: List[Tuple[Canvas, List[Dict[str, Any]]]],
+    previous: Dict[int, str],
+    provider: str,
+    force: bool,
+) -> Tuple[List[PortfolioJob], int]:
+    """
+    Build contexts for a batch of canvases and pick the ones to analyze.
+    CPU only (no database access), so it runs in a worker thread.
+
+    Args:
+        inputs: (canvas, node data) pairs from load_plan_batch
+        previous: Context hash of each canvas's last complete analysis
+        provider: Run provider
+        force: Re-analyze canvases even if their context is unchanged
+
+    Returns:
+        (jobs to run, number of canvases skipped as unchanged)
+    """
+    jobs: List[PortfolioJob] = []
+    skipped = 0
+    for canvas, nodes_data in inputs:
+        canvas_data = {'name': canvas.name, 'description': canvas.description}
+        context = assemble_canvas_context(canvas_data, nodes_data).text
+        context_hash = portfolio_context_hash(context, provider)
+
+        if not force and previous.get(canvas.id) == context_hash:
+            skipped += 1
+            continue
+
+        jobs.append(PortfolioJob(canvas.id, context_hash, context))
+
+    return jobs, skipped
+
+
+async def plan_portfolio_run(provider: str, force: bool = False) -> AsyncIterator[Tuple[List[PortfolioJob], int]]:
+    """
+    Pick the open canvases to analyze, settings.portfolio_plan_batch_size at a time.
+
+    Each batch is loaded on the async engine and its contexts are built in a
+    worker thread, so planning a large portfolio neither blocks the event
+    loop nor holds every context in memory.
+
+    Args:
+        provider: Run provider
+        force: Re-analyze canvases even if their context is unchanged
+
+    Yields:
+        (jobs to run, number of canvases skipped as unchanged) per batch
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Canvas.id).where(Canvas.is_archived == False).order_by(Canvas.id)  # noqa: E712
+        )
+        canvas_ids = list(result.scalars())
+
+    batch_size = settings.portfolio_plan_batch_size
+    for start in range(0, len(canvas_ids), batch_size):
+        async with AsyncSessionLocal() as db:
+            inputs, previous = await db.run_sync(load_plan_batch, canvas_ids[start:start + batch_size])
+        yield await asyncio.to_thread(plan_batch, inputs, previous, provider, force)
+
+
+def portfolio_messages() -> List[Dict[str, str]]:
+    """Messages sent for a portfolio analysis"""
+    return [{'role': 'user', 'content': PORTFOLIO_WHATS_NEXT_MESSAGE}]
+
+
+async def run_online(jobs: List[PortfolioJob], on_result: ResultCallback) -> None:
+    """
+    Analyze canvases with online Bedrock calls, bounded by
+    settings.portfolio_max_concurrency.
+
+    Args:
+        jobs: Canvases to analyze
+        on_result: Receives each canvas's {content, usage, model} or {error}
+    """
+    semaphore = asyncio.Semaphore(settings.portfolio_max_concurrency)
+
+    async def analyze(job: PortfolioJob) -> None:
+        async with semaphore:
+            try:
+                result = await chat_with_claude(
+                    messages=portfolio_messages(),
+                    system_prompt=create_whats_next_prompt(job.context),
+                    max_tokens=PORTFOLIO_MAX_TOKENS,
+                    temperature=0.0,
+                    priority=PRIORITY_BATCH,
+                    usage_context=UsageContext(operation='portfolio', canvas_id=job.canvas_id),
+                )
+            except Exception as e:
+                logger.error(f"Portfolio analysis failed for canvas {job.canvas_id}: {e}")
+                result = {"error": str(e)}
+        await on_result(job, result)
+
+    await asyncio.gather(*(analyze(job) for job in jobs))
+
+
+async def run_fake(jobs: List[PortfolioJob], on_result: ResultCallback) -> None:
+    """
+    Produce canned results without calling a model.
+
+    Args:
+        jobs: Canvases to analyze
+        on_result: Receives each canvas's {content, usage, model}
+    """
+    for job in jobs:
+        await on_result(job, {
+            "content": f"## Next Steps\n\n*(Fake analysis of context {job.context_hash[:12]})*\n",
+            "usage": {"input_tokens": len(job.context) // 4, "output_tokens": 0},
+            "model": analysis_model('fake'),
+        })
+
+
+def parse_s3_uri(uri: str) -> Tuple[str, str]:
+    """
+    Split an s3://bucket/prefix URI.
+
+    Args:
+        uri: S3 URI
+
+    Returns:
+        (bucket, prefix without trailing slash)
+    """
+    if not uri.startswith("s3://"):
+        raise ValueError(f"Invalid S3 URI: {uri}")
+
+    bucket, _, prefix = uri[len("s3://"):].partition("/")
+    return bucket, prefix.strip("/")
+
+
+def s3_key(prefix: str, *parts: str) -> str:
+    """Join an S3 key prefix (possibly empty) and path parts"""
+    return "/".join(part for part in (prefix, *parts) if part)
+
+
+def batch_record(job: PortfolioJob) -> Dict[str, Any]:
+    """
+    Build a Bedrock batch inference record for a job.
+
+    Batch requests are not prompt-cached, so the system prompt is sent as
+    plain text.
+
+    Args:
+        job: Canvas to analyze
+
+    Returns:
+        JSONL record dict
+    """
+    return {
+        "recordId": str(job.canvas_id),
+        "modelInput": {
+            "anthropic_version": "bedrock-2023-05-31",
+            "system": f"{WHATS_NEXT_INSTRUCTIONS}\n\n{job.context}",
+            "messages": portfolio_messages(),
+            "max_tokens": PORTFOLIO_MAX_TOKENS,
+            "temperature": 0.0,
+        },
+    }
+
+
+def submit_batch_job(run_id: str, jobs: List[PortfolioJob]) -> str:
+    """
+    Upload the batch input to S3 and start a Bedrock batch inference job.
+    Blocking; runs on the LLM gateway executor.
+
+    Args:
+        run_id: Portfolio run ID
+        jobs: Canvases to analyze
+
+    Returns:
+        Batch job ARN
+    """
+    bucket, prefix = parse_s3_uri(settings.portfolio_batch_s3_uri)
+    input_key = s3_key(prefix, run_id, "input.jsonl")
+    body = "\n".join(json.dumps(batch_record(job)) for job in jobs)
+
+    bedrock_pool.aws_client('s3').put_object(Bucket=bucket, Key=input_key, Body=body.encode("utf-8"))
+
+    response = bedrock_pool.aws_client('bedrock').create_model_invocation_job(
+        jobName=f"portfolio-whats-next-{run_id}",
+        roleArn=settings.portfolio_batch_role_arn,
+        modelId=settings.aws_bedrock_model_id,
+        inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{bucket}/{input_key}"}},
+        outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{bucket}/{s3_key(prefix, run_id, 'output')}/"}},
+    )
+    return response["jobArn"]
+
+
+def get_batch_job_status(job_arn: str) -> str:
+    """
+    Get a batch job's status. Blocking.
+
+    Args:
+        job_arn: Batch job ARN
+
+    Returns:
+        Bedrock job status
+    """
+    return bedrock_pool.aws_client('bedrock').get_model_invocation_job(jobIdentifier=job_arn)["status"]
+
+
+def fetch_batch_results(run_id: str, job_arn: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Read a finished batch job's output from S3. Blocking.
+
+    Args:
+        run_id: Portfolio run ID
+        job_arn: Batch job ARN
+
+    Returns:
+        Dict of canvas ID -> {content, usage, model} or {error}
+    """
+    bucket, prefix = parse_s3_uri(settings.portfolio_batch_s3_uri)
+    job_id = job_arn.rsplit("/", 1)[-1]
+    output_key = s3_key(prefix, run_id, "output", job_id, "input.jsonl.out")
+
+    body = bedrock_pool.aws_client('s3').get_object(Bucket=bucket, Key=output_key)["Body"].read()
+
+    results: Dict[int, Dict[str, Any]] = {}
+    for line in body.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        canvas_id = int(record["recordId"])
+        output = record.get("modelOutput")
+        if output and output.get("content"):
+            results[canvas_id] = {
+                "content": output["content"][0]["text"],
+                "usage": output.get("usage", {}),
+                "model": output.get("model"),
+            }
+        else:
+            results[canvas_id] = {"error": json.dumps(record.get("error") or "No model output")}
+
+    return results
+
+
+async def run_batch(jobs: List[PortfolioJob], run: Dict[str, Any], on_result: ResultCallback) -> None:
+    """
+    Analyze canvases with a Bedrock batch inference job.
+
+    Args:
+        jobs: Canvases to analyze
+        run: Run status (the batch job's ARN and status are kept in it)
+        on_result: Receives each canvas's {content, usage, model} or {error}
+    """
+    if len(jobs) < settings.portfolio_batch_min_records:
+        logger.info(f"Only {len(jobs)} canvases to analyze, using online calls instead of batch")
+        # Key the results under the model that actually serves them
+        online = [
+            replace(job, context_hash=portfolio_context_hash(job.context, 'bedrock'))
+            for job in jobs
+        ]
+        await run_online(online, on_result)
+        return
+
+    job_arn = run.get("batch_job_arn")
+    if job_arn:
+        # Retried run: keep waiting on the batch job the earlier attempt submitted
+        logger.info(f"Portfolio batch job resumed: {job_arn}")
+    else:
+        job_arn = await llm_gateway.run(submit_batch_job, run["id"], jobs)
+        run["batch_job_arn"] = job_arn
+        logger.info(f"Portfolio batch job submitted: {job_arn} ({len(jobs)} canvases)")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.portfolio_batch_timeout_seconds
+    while True:
+        await asyncio.sleep(settings.portfolio_batch_poll_seconds)
+        job_status = await llm_gateway.run(get_batch_job_status, job_arn)
+        run["batch_job_status"] = job_status
+
+        if job_status in BATCH_TERMINAL_STATES:
+            break
+        if loop.time() > deadline:
+            raise TimeoutError(f"Batch job {job_arn} still {job_status} after {settings.portfolio_batch_timeout_seconds}s")
+
+    if job_status not in ('Completed', 'PartiallyCompleted'):
+        raise RuntimeError(f"Batch job {job_arn} ended with status {job_status}")
+
+    results = await llm_gateway.run(fetch_batch_results, run["id"], job_arn)
+
+    for job in jobs:
+        result = results.get(job.canvas_id) or {"error": "No result returned"}
+        if "error" not in result:
+            record_usage(
+                UsageContext(operation='portfolio', canvas_id=job.canvas_id),
+                provider='bedrock_batch',
+                model=result.get("model") or settings.aws_bedrock_model_id,
+                usage=result.get("usage", {}),
+                batch=True,
+            )
+        await on_result(job, result)
+
+
+def store_result(db: Session, run: Dict[str, Any], job: PortfolioJob, result: Dict[str, Any]) -> None:
+    """
+    Upsert a canvas's portfolio_analyses row.
+
+    Args:
+        db: Database session
+        run: Run status
+        job: Canvas analyzed
+        result: Provider result
+    """
+    row = db.query(PortfolioAnalysis).filter(PortfolioAnalysis.canvas_id == job.canvas_id).first()
+    if row is None:
+        row = PortfolioAnalysis(canvas_id=job.canvas_id)
+        db.add(row)
+
+    usage = result.get("usage") or {}
+    row.context_hash = job.context_hash
+    row.run_id = run["id"]
+    row.status = 'failed' if "error" in result else 'complete'
+    row.content = result.get("content")
+    row.error = result.get("error")
+    row.provider = run["provider"]
+    row.model = result.get("model")
+    row.input_tokens = usage.get("input_tokens")
+    row.output_tokens = usage.get("output_tokens")
+    row.analyzed_at = datetime.utcnow()
+    db.commit()
+
+
+@job_handler("portfolio_whats_next")
+async def run_portfolio_analysis(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute a portfolio run end to end (job handler).
+
+    The run status lives in the job's progress, so it survives restarts
+    and a retried attempt resumes a submitted batch job. `total` grows as
+    batches are planned.
+
+    Args:
+        ctx: Job context
+        payload: {"provider": ..., "force": ...}
+
+    Returns:
+        Run summary (total, skipped, failed)
+    """
+    provider = payload["provider"]
+    force = payload.get("force", False)
+    run = ctx.progress
+    run.update(id=str(ctx.job_id), provider=provider, total=0, skipped=0, completed=0, failed=0)
+
+    async def on_result(job: PortfolioJob, result: Dict[str, Any]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(store_result, run, job, result)
+        run["completed"] += 1
+        run["failed"] += "error" in result
+
+    # A batch job covers the whole run, so its inputs are collected first
+    batch_jobs: List[PortfolioJob] = []
+    async for jobs, skipped in plan_portfolio_run(provider, force=force):
+        run["total"] += len(jobs)
+        run["skipped"] += skipped
+        if provider == 'bedrock_batch':
+            batch_jobs.extend(jobs)
+        elif provider == 'fake':
+            await run_fake(jobs, on_result)
+        else:
+            await run_online(jobs, on_result)
+
+    if batch_jobs:
+        await run_batch(batch_jobs, run, on_result)
+
+    logger.info(
+        f"Portfolio run {run['id']} complete ({provider}): {run['completed'] - run['failed']} analyzed, "
+        f"{run['failed']} failed, {run['skipped']} unchanged"
+    )
+    return {"total": run["total"], "skipped": run["skipped"], "failed": run["failed"]}
+
+
+def start_portfolio_run(
+    db: Session,
+    provider: str | None = None,
+    force: bool = False,
+    created_by_id: int | None = None,
+) -> Job:
+    """
+    Queue a portfolio run unless one is already queued or running.
+
+    Args:
+        db: Database session
+        provider: 'bedrock', 'bedrock_batch' or 'fake' (default: settings.portfolio_provider)
+        force: Re-analyze canvases even if their context is unchanged
+        created_by_id: Requesting user
+
+    Returns:
+        Run job (the active one if a run is in progress)
+    """
+    active = get_active_job(db, "portfolio_whats_next")
+    if active:
+        return active
+
+    provider = provider or settings.portfolio_provider
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown portfolio provider: {provider}")
+    if provider == 'fake' and not settings.debug:
+        raise ValueError("The fake provider is only available in debug mode")
+    if provider == 'bedrock_batch' and not (settings.portfolio_batch_s3_uri and settings.portfolio_batch_role_arn):
+        raise ValueError("Batch inference requires PORTFOLIO_BATCH_S3_URI and PORTFOLIO_BATCH_ROLE_ARN")
+
+    # Results are stored per canvas, so a retried attempt skips the ones already analyzed
+    job = enqueue_job(
+        db,
+        "portfolio_whats_next",
+        {"provider": provider, "force": force},
+        created_by_id=created_by_id,
+    )
+    job_workers.notify()
+    return job
+
+
+def run_status(job: Job) -> Dict[str, Any]:
+    """
+    Describe a portfolio run job in the run status format.
+
+    Args:
+        job: portfolio_whats_next job
+
+    Returns:
+        Run status dict
+    """
+    progress = job.progress or {}
+    return {
+        "id": str(job.id),
+        "job_id": job.id,
+        "provider": job.payload["provider"],
+        "status": {'queued': 'pending'}.get(job.status, job.status),
+        "started_at": job.created_at,
+        "finished_at": job.finished_at,
+        "total": progress.get("total"),
+        "completed": progress.get("completed", 0),
+        "skipped": progress.get("skipped"),
+        "failed": progress.get("failed"),
+        "error": job.error,
+        "batch_job_status": progress.get("batch_job_status"),
+    }
+
+
+def get_current_run(db: Session) -> Dict[str, Any] | None:
+    """
+    Get the current (or most recent) run's status.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Run status or None if no run has started
+    """
+    job = (
+        db.query(Job)
+        .filter(Job.job_type == "portfolio_whats_next")
+        .order_by(Job.id.desc())
+        .first()
+    )
+    return run_status(job) if job else None
+
+
+def get_portfolio_results(db: Session) -> List[Dict[str, Any]]:
+    """
+    Get the latest analysis of every open canvas in one query.
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of result dicts, most recently analyzed first
+    """
+    rows = (
+        db.query(PortfolioAnalysis, Canvas.name, Canvas.owner_id)
+        .join(Canvas, Canvas.id == PortfolioAnalysis.canvas_id)
+        .filter(Canvas.is_archived == False)  # noqa: E712
+        .order_by(PortfolioAnalysis.analyzed_at.desc())
+        .all()
+    )
+
+    return [
+        {
+            "canvas_id": analysis.canvas_id,
+            "canvas_name": name,
+            "owner_id": owner_id,
+            "status": analysis.status,
+            "content": analysis.content,
+            "error": analysis.error,
+            "provider": analysis.provider,
+            "model": analysis.model,
+            "input_tokens": analysis.input_tokens,
+            "output_tokens": analysis.output_tokens,
+            "analyzed_at": analysis.analyzed_at,
+            "run_id": analysis.run_id,
+        }
+        for analysis, name, owner_id in rows
+    ]
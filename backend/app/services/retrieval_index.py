@@ -0,0 +1,405 @@
+"""
+In-process BM25 retrieval over node content.
+
+Each canvas gets an inverted index of node chunks, built lazily on first
+search and kept current by node_service on create/update/delete. Searching
+only touches the postings of the query's terms, so question-aware context
+can pick the few relevant chunks of a large canvas in a few milliseconds
+without a network service.
+
+Edits made by other worker processes (or while an index was loading) never
+reach this process's hooks, so every lookup also compares the canvas's node
+count and latest updated_at with what the index has loaded, and re-reads the
+nodes changed since. Each indexed node remembers its updated_at, so an older
+copy of a node never replaces a newer one.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.node import Node
+from app.services.claude_service import render_node_fragment
+from app.services.context_assembler import STOP_WORDS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms (stop words removed)
+    """
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def chunk_node_text(node: Dict[str, Any], chunk_chars: int) -> List[str]:
+    """
+    Split a node's full content into chunks of about chunk_chars characters.
+
+    Chunks break on line boundaries where possible, and every chunk starts
+    with the node's heading so title terms match each chunk.
+
+    Args:
+        node: Node data
+        chunk_chars: Target chunk size
+
+    Returns:
+        List of chunk texts
+    """
+    text = render_node_fragment(dict(node, summary=None))
+    heading, _, body = text.partition("\n")
+    heading += "\n"
+
+    chunks: List[str] = []
+    current = ""
+    for line in body.splitlines(keepends=True):
+        while len(line) > chunk_chars:
+            cut = line.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current.strip():
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:cut] + "\n")
+            line = line[cut:].lstrip()
+        if len(current) + len(line) > chunk_chars and current.strip():
+            chunks.append(current)
+            current = ""
+        current += line
+    if current.strip() or not chunks:
+        chunks.append(current)
+
+    return [heading + chunk.strip() + "\n\n" for chunk in chunks]
+
+
+class Hit(NamedTuple):
+    """A retrieved chunk"""
+
+    node_id: int
+    title: str
+    text: str
+    score: float
+
+
+class CanvasIndex:
+    """BM25 inverted index over one canvas's node chunks"""
+
+    def __init__(self, canvas_id: int):
+        self.canvas_id = canvas_id
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._chunks: Dict[int, tuple[int, str, str, int]] = {}  # id -> (node_id, title, text, length)
+        self._node_chunks: Dict[int, List[int]] = {}
+        # Every known node (excluded too) -> (updated_at, add sequence number)
+        self._node_versions: Dict[int, tuple[Optional[datetime], int]] = {}
+        self._adds = 0
+        self._next_id = 0
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self.loaded = False  # All nodes have been read from the database once
+        self.synced_through: Optional[datetime] = None  # Latest updated_at read from the database
+
+    def add_node(self, node: Dict[str, Any]) -> None:
+        """
+        Index (or re-index) a node. Excluded nodes are removed.
+        Ignored if the index already has a newer version of the node.
+
+        Args:
+            node: Node data with 'id', 'title', 'node_type', 'data', 'updated_at'
+        """
+        with self._lock:
+            updated_at = node.get('updated_at')
+            known, _ = self._node_versions.get(node['id'], (None, 0))
+            if known is not None and updated_at is not None and updated_at < known:
+                return
+
+            self._remove(node['id'])
+            self._adds += 1
+            self._node_versions[node['id']] = (updated_at, self._adds)
+            if node.get('exclude_from_context'):
+                return
+
+            chunk_ids = []
+            for text in chunk_node_text(node, settings.retrieval_chunk_chars):
+                terms = tokenize(text)
+                chunk_id = self._next_id
+                self._next_id += 1
+
+                self._chunks[chunk_id] = (node['id'], node['title'], text, len(terms))
+                self._total_length += len(terms)
+                for term, tf in Counter(terms).items():
+                    self._postings.setdefault(term, {})[chunk_id] = tf
+                chunk_ids.append(chunk_id)
+
+            self._node_chunks[node['id']] = chunk_ids
+
+    def remove_node(self, node_id: int) -> None:
+        """
+        Remove a node from the index.
+
+        Args:
+            node_id: Node ID
+        """
+        with self._lock:
+            self._remove(node_id)
+            self._node_versions.pop(node_id, None)
+
+    def add_count(self) -> int:
+        """Number of node adds so far (marks a point in time for remove_missing)"""
+        with self._lock:
+            return self._adds
+
+    def remove_missing(self, node_ids: set, added_before: int) -> None:
+        """
+        Drop nodes that are gone from the database.
+
+        Args:
+            node_ids: IDs of every node the canvas has
+            added_before: add_count() taken before node_ids was read; nodes added
+                since (by node_service while the read ran) are kept
+        """
+        with self._lock:
+            for node_id, (_, added) in list(self._node_versions.items()):
+                if node_id not in node_ids and added <= added_before:
+                    self._remove(node_id)
+                    del self._node_versions[node_id]
+
+    def is_current(self, node_count: int, latest_update: Optional[datetime]) -> bool:
+        """
+        Check the index against the canvas's current node count and latest updated_at.
+
+        Args:
+            node_count: Nodes on the canvas
+            latest_update: Latest node updated_at (None for an empty canvas)
+
+        Returns:
+            True if nothing changed since the index last read the database
+        """
+        with self._lock:
+            if not self.loaded or len(self._node_versions) != node_count:
+                return False
+            return latest_update is None or (self.synced_through is not None and latest_update <= self.synced_through)
+
+    def node_count(self) -> int:
+        """Number of known nodes (excluded ones included)"""
+        with self._lock:
+            return len(self._node_versions)
+
+    def mark_synced(self, latest_update: Optional[datetime]) -> None:
+        """
+        Record that the database has been read up to latest_update.
+
+        Args:
+            latest_update: Latest updated_at seen by the read
+        """
+        with self._lock:
+            self.loaded = True
+            if latest_update is not None and (self.synced_through is None or latest_update > self.synced_through):
+                self.synced_through = latest_update
+
+    def _remove(self, node_id: int) -> None:
+        for chunk_id in self._node_chunks.pop(node_id, []):
+            _, _, text, length = self._chunks.pop(chunk_id)
+            self._total_length -= length
+            for term in set(tokenize(text)):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    def search(self, query: str, k: int) -> List[Hit]:
+        """
+        Find the chunks most relevant to a query.
+
+        Args:
+            query: User message
+            k: Number of chunks to return
+
+        Returns:
+            Hits ordered by descending BM25 score
+        """
+        terms = set(tokenize(query))
+
+        with self._lock:
+            n_chunks = len(self._chunks)
+            if not terms or not n_chunks:
+                return []
+
+            avg_length = self._total_length / n_chunks or 1.0
+            scores: Dict[int, float] = {}
+            chunks = self._chunks
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (n_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * chunks[chunk_id][3] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                Hit(chunks[chunk_id][0], chunks[chunk_id][1], chunks[chunk_id][2], score)
+                for chunk_id, score in best
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size.
+
+        Returns:
+            Dict with node, chunk and term counts
+        """
+        with self._lock:
+            return {
+                "nodes": len(self._node_chunks),
+                "chunks": len(self._chunks),
+                "terms": len(self._postings),
+            }
+
+
+class RetrievalIndex:
+    """
+    Per-canvas indexes, built on first search and kept up to date by
+    node_service. Canvases that were never searched are not indexed, and the
+    least recently searched canvases are evicted past max_canvases.
+    """
+
+    def __init__(self, max_canvases: int):
+        self.max_canvases = max_canvases
+        self._indexes: OrderedDict[int, CanvasIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, canvas_id: int) -> CanvasIndex:
+        """
+        Get a canvas's index, building or catching it up from the database if needed.
+
+        Args:
+            db: Database session
+            canvas_id: Canvas ID
+
+        Returns:
+            CanvasIndex
+        """
+        node_count, latest_update = (
+            db.query(func.count(Node.id), func.max(Node.updated_at))
+            .filter(Node.canvas_id == canvas_id)
+            .one()
+        )
+
+        with self._lock:
+            index = self._indexes.get(canvas_id)
+            if index is None:
+                # Registered before loading, so node updates made meanwhile reach it
+                index = self._indexes[canvas_id] = CanvasIndex(canvas_id)
+            self._indexes.move_to_end(canvas_id)
+            while len(self._indexes) > self.max_canvases:
+                self._indexes.popitem(last=False)
+
+        if not index.is_current(node_count, latest_update):
+            self._sync(db, index, node_count, latest_update)
+        return index
+
+    def _sync(self, db: Session, index: CanvasIndex, node_count: int, latest_update: Optional[datetime]) -> None:
+        """
+        Catch an index up with the database: only the nodes changed since its
+        last read, or every node on first use or when nodes were deleted.
+        """
+        query = db.query(Node).filter(Node.canvas_id == index.canvas_id)
+
+        if index.loaded and index.synced_through is not None:
+            for node in query.filter(Node.updated_at >= index.synced_through):
+                index.add_node(node_index_data(node))
+            if index.node_count() == node_count:
+                index.mark_synced(latest_update)
+                return
+
+        added_before = index.add_count()
+        node_ids = set()
+        for node in query:
+            node_ids.add(node.id)
+            index.add_node(node_index_data(node))
+        index.remove_missing(node_ids, added_before)
+        index.mark_synced(latest_update)
+
+        logger.info(f"Retrieval index built for canvas {index.canvas_id}: {index.stats()}")
+
+    def update_node(self, node: Node) -> None:
+        """
+        Re-index a node if its canvas is indexed.
+
+        Args:
+            node: Node object
+        """
+        index = self._indexes.get(node.canvas_id)
+        if index is not None:
+            index.add_node(node_index_data(node))
+
+    def remove_node(self, canvas_id: int, node_id: int) -> None:
+        """
+        Drop a node from its canvas's index if indexed.
+
+        Args:
+            canvas_id: Canvas ID
+            node_id: Node ID
+        """
+        index = self._indexes.get(canvas_id)
+        if index is not None:
+            index.remove_node(node_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dict with indexed canvas and chunk counts
+        """
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return {
+            "canvases": len(indexes),
+            "max_canvases": self.max_canvases,
+            "chunks": sum(index.stats()["chunks"] for index in indexes),
+        }
+
+
+def node_index_data(node: Node) -> Dict[str, Any]:
+    """
+    Convert a node into the dict form the index uses.
+
+    Args:
+        node: Node object
+
+    Returns:
+        Node data dict
+    """
+    return {
+        'id': node.id,
+        'title': node.title,
+        'node_type': node.node_type,
+        'data': node.data,
+        'exclude_from_context': node.exclude_from_context,
+        'updated_at': node.updated_at,
+    }
+
+
+retrieval_index = RetrievalIndex(max_canvases=settings.retrieval_index_max_canvases)
@@ -0,0 +1,541 @@
+"""
+Incrementally recomputed MEDDPICC deal scorecard.
+
+The scorecard is split into one assessment per MEDDPICC dimension. Each
+dimension depends only on the nodes relevant to it (by node type or by
+keywords in the node's content), and its input hash covers just those
+nodes' content hashes plus the prompt version. A refresh re-assesses only
+the dimensions whose hash changed, so editing a competitor node re-runs
+Competition and leaves Economic Buyer alone.
+
+Assessments are stored one row per (canvas, dimension) in
+scorecard_dimensions; the scorecard endpoint reads them in one query.
+Refreshes run as 'scorecard_refresh' background jobs (see job_service).
+"""
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.models.job import Job
+from app.models.node import Node
+from app.models.scorecard import ScorecardDimension
+from app.services.canvas_service import get_canvas_by_id_sync
+from app.services.claude_service import cached_block, chat_with_claude
+from app.services.context_assembler import assemble_canvas_context
+from app.services.context_service import node_context_data
+from app.services.job_service import JobContext, enqueue_job, get_active_job, job_handler, job_workers
+from app.services.llm_scheduler import PRIORITY_BACKGROUND
+from app.services.node_service import get_canvas_nodes_sync
+from app.services.result_cache import make_cache_key
+from app.services.summarization_service import compute_content_hash, get_summaries, needs_summary
+from app.services.usage_service import UsageContext
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the instructions or dimension definitions change (re-assesses everything)
+SCORECARD_PROMPT_VERSION = "2"
+
+SCORECARD_MAX_TOKENS = 1024
+
+MAX_SCORE = 3
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """A scorecard dimension and the nodes it depends on"""
+    key: str
+    name: str
+    question: str
+    node_types: Tuple[str, ...]  # Always relevant
+    keywords: Tuple[str, ...]  # Other nodes are relevant if their text mentions one (see keyword_pattern)
+
+    @property
+    def pattern(self) -> re.Pattern:
+        """Regex matching any of the keywords"""
+        return keyword_pattern(self.keywords)
+
+
+DIMENSIONS: Tuple[Dimension, ...] = (
+    Dimension(
+        "metrics", "Metrics",
+        "What quantifiable business outcomes does the customer expect, and have they agreed to them?",
+        ("meeting", "document"),
+        ("metric*", "roi", "kpi*", "business case", "cost saving*", "savings", "measurable"),
+    ),
+    Dimension(
+        "economic_buyer", "Economic Buyer",
+        "Who has the budget and final authority to approve this purchase, and have we engaged them?",
+        ("person",),
+        ("economic buyer", "budget*", "sign off", "sign-off", "signoff", "final approval", "cfo", "ciso", "cio"),
+    ),
+    Dimension(
+        "decision_criteria", "Decision Criteria",
+        "Which technical and business criteria will the customer use to choose, and how well do we meet them?",
+        ("document", "competitor"),
+        ("criteria", "requirement*", "evaluat*", "must have", "must-have", "poc", "proof of concept", "rfp", "bake-off"),
+    ),
+    Dimension(
+        "decision_process", "Decision Process",
+        "What steps, people and timeline lead to a decision, and do we know them?",
+        ("meeting", "action"),
+        ("decision process", "decision maker*", "approval process", "timeline", "steering", "committee", "deadline*", "next step*"),
+    ),
+    Dimension(
+        "paper_process", "Paper Process",
+        "What legal, security, procurement and contracting steps are needed to sign, and how long will they take?",
+        ("action",),
+        ("legal", "procurement", "contract*", "security review", "questionnaire", "msa", "redline*", "purchase order", "po"),
+    ),
+    Dimension(
+        "identify_pain", "Identify Pain",
+        "What business pain drives this deal, how urgent is it, and what happens if nothing is done?",
+        ("meeting", "risk", "note"),
+        ("pain", "pain point*", "incident*", "breach*", "exposure", "audit*", "compliance", "urgent", "urgency"),
+    ),
+    Dimension(
+        "champion", "Champion",
+        "Who sells on our behalf inside the customer, and have they proven their influence?",
+        ("person",),
+        ("champion*", "advocate*", "sponsor*", "coach", "internal support"),
+    ),
+    Dimension(
+        "competition", "Competition",
+        "Who or what are we competing against (vendors, in-house builds, doing nothing), and how are we positioned?",
+        ("competitor",),
+        ("competitor*", "competition", "competing", "incumbent", "versus", "vs", "in-house", "homegrown", "build vs buy"),
+    ),
+)
+
+DIMENSIONS_BY_KEY = {dimension.key: dimension for dimension in DIMENSIONS}
+
+SCORECARD_INSTRUCTIONS = f"""You assess one dimension of a MEDDPICC deal qualification scorecard for Cyera (a data security company specializing in DSPM and DLP).
+
+You are given only the deal canvas nodes relevant to the dimension. Base the assessment strictly on them; do not assume facts that are not in the nodes.
+
+Score the dimension from 0 to {MAX_SCORE}:
+0 - Unknown: no real information
+1 - Weak: partial or unconfirmed information
+2 - Developing: identified but not fully validated
+3 - Strong: identified, validated and working in our favor
+
+Respond with only a JSON object, no other text:
+{{"score": <0-{MAX_SCORE}>, "summary": "<2-3 sentences>", "gaps": ["<what is missing or should be validated next>"]}}"""
+
+
+@dataclass
+class DimensionInput:
+    """What a dimension's assessment depends on"""
+    dimension: Dimension
+    nodes: List[Node]
+    input_hash: str
+
+
+def node_content_hash(node: Node) -> str:
+    """Stored content hash of a node (computed for nodes saved before hashing)"""
+    return node.content_hash or compute_content_hash(node.title, node.node_type, node.data)
+
+
+@lru_cache(maxsize=None)
+def keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern:
+    """
+    Compile keywords into one whole-word regex.
+
+    Args:
+        keywords: Lowercase words or phrases; a trailing * allows any ending
+            ("approv*" matches approve, approval, approver)
+
+    Returns:
+        Compiled pattern
+    """
+    alternatives = [
+        re.escape(keyword[:-1]) + r"\w*" if keyword.endswith("*") else re.escape(keyword)
+        for keyword in keywords
+    ]
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+def text_values(value: Any) -> List[str]:
+    """Collect the string values in node data (keys and field names are skipped)"""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in text_values(item)]
+    if isinstance(value, list):
+        return [text for item in value for text in text_values(item)]
+    return []
+
+
+def node_search_text(node: Node) -> str:
+    """Lowercased title and data text values, for keyword relevance"""
+    return " ".join([node.title or "", *text_values(node.data or {})]).lower()
+
+
+def relevant_nodes(dimension: Dimension, nodes: List[Node], texts: Dict[int, str]) -> List[Node]:
+    """
+    Select the nodes a dimension depends on.
+
+    Args:
+        dimension: Scorecard dimension
+        nodes: Canvas nodes included in context
+        texts: Node ID -> search text
+
+    Returns:
+        Relevant nodes, in canvas order
+    """
+    return [
+        node for node in nodes
+        if node.node_type in dimension.node_types
+        or dimension.pattern.search(texts[node.id])
+    ]
+
+
+def has_summary(node: Node, summaries: Dict[str, str]) -> bool:
+    """Whether a large node is sent as its stored summary rather than in full"""
+    return needs_summary(node) and node.content_hash in summaries
+
+
+def dimension_inputs(nodes: List[Node], summaries: Dict[str, str]) -> List[DimensionInput]:
+    """
+    Work out each dimension's relevant nodes and input hash.
+
+    A large node is assessed from its summary once one is stored, so the
+    hash also covers whether each node's summary was available.
+
+    Args:
+        nodes: Canvas nodes
+        summaries: Stored summaries of large nodes by content hash
+
+    Returns:
+        One DimensionInput per dimension
+    """
+    nodes = [node for node in nodes if not node.exclude_from_context]
+    texts = {node.id: node_search_text(node) for node in nodes}
+
+    inputs = []
+    for dimension in DIMENSIONS:
+        selected = relevant_nodes(dimension, nodes, texts)
+        input_hash = make_cache_key(
+            prompt_version=SCORECARD_PROMPT_VERSION,
+            dimension=dimension.key,
+            nodes=sorted(
+                (node.id, node_content_hash(node), has_summary(node, summaries))
+                for node in selected
+            ),
+        )
+        inputs.append(DimensionInput(dimension, selected, input_hash))
+
+    return inputs
+
+
+def parse_assessment(text: str) -> Dict[str, Any]:
+    """
+    Parse the model's JSON assessment.
+
+    Args:
+        text: Model response
+
+    Returns:
+        {score, summary, gaps}
+
+    Raises:
+        ValueError: If the response has no usable JSON object
+    """
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object in scorecard response")
+
+    parsed = json.loads(match.group(0))
+    score = int(parsed.get("score"))
+    if not 0 <= score <= MAX_SCORE:
+        raise ValueError(f"Score out of range: {score}")
+
+    return {
+        "score": score,
+        "summary": str(parsed.get("summary") or ""),
+        "gaps": [str(gap) for gap in parsed.get("gaps") or []],
+    }
+
+
+async def assess_dimension(
+    canvas: Canvas,
+    item: DimensionInput,
+    summaries: Dict[str, str],
+    user_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Assess one dimension from its relevant nodes.
+
+    Dimensions with no relevant nodes are scored 0 without a model call.
+
+    Args:
+        canvas: Canvas
+        item: Dimension input
+        summaries: Stored summaries of large nodes by content hash
+        user_id: User who requested the refresh (for the usage ledger)
+
+    Returns:
+        Assessment column values for ScorecardDimension
+    """
+    dimension = item.dimension
+    if not item.nodes:
+        return {
+            "status": 'no_evidence',
+            "score": 0,
+            "summary": f"No canvas nodes cover {dimension.name} yet.",
+            "gaps": [dimension.question],
+            "evidence_node_ids": [],
+        }
+
+    nodes_data = [
+        node_context_data(node, summaries[node.content_hash] if has_summary(node, summaries) else None)
+        for node in item.nodes
+    ]
+    canvas_data = {'name': canvas.name, 'description': f"Scorecard dimension: {dimension.name}"}
+    context = assemble_canvas_context(canvas_data, nodes_data, query=dimension.question).text
+
+    try:
+        response = await chat_with_claude(
+            messages=[{
+                'role': 'user',
+                'content': f"Dimension: {dimension.name}\nQuestion: {dimension.question}",
+            }],
+            system_prompt=[cached_block(SCORECARD_INSTRUCTIONS), cached_block(context)],
+            max_tokens=SCORECARD_MAX_TOKENS,
+            temperature=0.0,
+            priority=PRIORITY_BACKGROUND,
+            usage_context=UsageContext(operation='scorecard', canvas_id=canvas.id, user_id=user_id),
+        )
+        assessment = parse_assessment(response['content'])
+    except Exception as e:
+        logger.error(f"Scorecard {dimension.key} failed for canvas {canvas.id}: {e}")
+        return {"status": 'failed', "error": str(e)}
+
+    usage = response.get('usage', {})
+    return {
+        "status": 'complete',
+        **assessment,
+        "evidence_node_ids": [node.id for node in item.nodes],
+        "model": response.get('model'),
+        "input_tokens": usage.get('input_tokens'),
+        "output_tokens": usage.get('output_tokens'),
+    }
+
+
+def store_assessment(db: Session, canvas_id: int, item: DimensionInput, assessment: Dict[str, Any]) -> None:
+    """
+    Upsert a dimension's assessment.
+
+    A failed assessment only records its status and error: the last good
+    score, summary and evidence stay in place next to it.
+
+    Args:
+        db: Database session
+        canvas_id: Canvas ID
+        item: Dimension input
+        assessment: Column values from assess_dimension
+    """
+    row = (
+        db.query(ScorecardDimension)
+        .filter(ScorecardDimension.canvas_id == canvas_id, ScorecardDimension.dimension == item.dimension.key)
+        .first()
+    )
+    if row is None:
+        row = ScorecardDimension(canvas_id=canvas_id, dimension=item.dimension.key, assessed_at=datetime.utcnow())
+        db.add(row)
+
+    row.input_hash = item.input_hash
+    row.status = assessment["status"]
+    row.error = assessment.get("error")
+    if assessment["status"] == 'failed':
+        db.commit()
+        return
+
+    row.score = assessment.get("score")
+    row.summary = assessment.get("summary")
+    row.gaps = assessment.get("gaps")
+    row.evidence_node_ids = assessment.get("evidence_node_ids")
+    row.model = assessment.get("model")
+    row.input_tokens = assessment.get("input_tokens")
+    row.output_tokens = assessment.get("output_tokens")
+    row.assessed_at = datetime.utcnow()
+    db.commit()
+
+
+def load_refresh_inputs(
+    db: Session,
+    canvas_id: int,
+) -> Tuple[Canvas, List[Node], Dict[str, str], Dict[str, str]] | None:
+    """
+    Load what a refresh needs in one go, so no session is held during assessments.
+
+    Args:
+        db: Database session
+        canvas_id: Canvas ID
+
+    Returns:
+        (canvas, nodes, stored input hash by dimension, summaries by content hash),
+        or None if the canvas is gone
+    """
+    canvas = get_canvas_by_id_sync(db, canvas_id)
+    if canvas is None:
+        return None
+
+    nodes = get_canvas_nodes_sync(db, canvas)
+    stored = {
+        row.dimension: row.input_hash
+        for row in db.query(ScorecardDimension.dimension, ScorecardDimension.input_hash)
+        .filter(ScorecardDimension.canvas_id == canvas_id)
+    }
+    summaries = get_summaries(db, [node.content_hash for node in nodes if needs_summary(node)])
+    return canvas, nodes, stored, summaries
+
+
+@job_handler("scorecard_refresh")
+async def refresh_scorecard(ctx: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Re-assess the dimensions whose relevant nodes changed (job handler).
+
+    Failed dimensions are retried on the next refresh; their stored hash
+    never matches because failures are saved with an empty hash.
+
+    Args:
+        ctx: Job context
+        payload: {"canvas_id": ..., "force": ...}
+
+    Returns:
+        {"assessed": [...], "unchanged": [...]}
+    """
+    canvas_id = payload["canvas_id"]
+
+    async with AsyncSessionLocal() as db:
+        loaded = await db.run_sync(load_refresh_inputs, canvas_id)
+    if loaded is None:
+        return {"assessed": [], "unchanged": []}
+    canvas, nodes, stored, summaries = loaded
+
+    inputs = dimension_inputs(nodes, summaries)
+    stale = [
+        item for item in inputs
+        if payload.get("force") or stored.get(item.dimension.key) != item.input_hash
+    ]
+    stale_keys = {item.dimension.key for item in stale}
+    unchanged = [item.dimension.key for item in inputs if item.dimension.key not in stale_keys]
+    ctx.set_progress(0, len(stale), message="Assessing")
+    logger.info(f"Scorecard refresh for canvas {canvas_id}: {len(stale)} stale, {len(unchanged)} unchanged")
+
+    semaphore = asyncio.Semaphore(settings.scorecard_max_concurrency)
+    done = 0
+
+    async def assess(item: DimensionInput) -> None:
+        nonlocal done
+        async with semaphore:
+            assessment = await assess_dimension(canvas, item, summaries, user_id=ctx.created_by_id)
+
+        if assessment["status"] == 'failed':
+            item.input_hash = ""
+        # Own session per assessment: they finish concurrently
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(store_assessment, canvas_id, item, assessment)
+        done += 1
+        ctx.set_progress(done, len(stale), message=f"Assessed {item.dimension.name}")
+
+    await asyncio.gather(*(assess(item) for item in stale))
+
+    return {"assessed": [item.dimension.key for item in stale], "unchanged": unchanged}
+
+
+def start_scorecard_refresh(
+    db: Session,
+    canvas_id: int,
+    force: bool = False,
+    created_by_id: Optional[int] = None,
+) -> Job:
+    """
+    Queue a scorecard refresh unless one is already queued or running for the canvas.
+
+    A forced refresh upgrades a queued refresh to forced. A running one has
+    already picked the dimensions to assess, so a forced refresh is queued
+    to follow it (once).
+
+    Args:
+        db: Database session
+        canvas_id: Canvas ID
+        force: Re-assess every dimension, changed or not
+        created_by_id: Requesting user
+
+    Returns:
+        Refresh job
+    """
+    job = get_active_job(db, "scorecard_refresh", canvas_id=canvas_id)
+    if job and force and not job.payload.get("force"):
+        upgraded = db.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == 'queued')
+            .values(payload={**job.payload, "force": True})
+        ).rowcount
+        db.commit()
+        if upgraded:
+            db.refresh(job)
+        else:
+            job = get_active_job(db, "scorecard_refresh", canvas_id=canvas_id, force=True)
+
+    job = job or enqueue_job(
+        db,
+        "scorecard_refresh",
+        {"canvas_id": canvas_id, "force": force},
+        created_by_id=created_by_id,
+    )
+    job_workers.notify()
+    return job
+
+
+def get_scorecard(db: Session, canvas_id: int) -> Dict[str, Any]:
+    """
+    Read a canvas's scorecard from stored dimension assessments (one query).
+
+    Args:
+        db: Database session
+        canvas_id: Canvas ID
+
+    Returns:
+        {"dimensions": [...], "score": ..., "max_score": ..., "assessed_at": ...};
+        dimensions never assessed have status 'pending'
+    """
+    rows = {
+        row.dimension: row
+        for row in db.query(ScorecardDimension).filter(ScorecardDimension.canvas_id == canvas_id)
+    }
+
+    dimensions = []
+    for dimension in DIMENSIONS:
+        row = rows.get(dimension.key)
+        dimensions.append({
+            "key": dimension.key,
+            "name": dimension.name,
+            "question": dimension.question,
+            "status": row.status if row else 'pending',
+            "score": row.score if row else None,
+            "summary": row.summary if row else None,
+            "gaps": row.gaps if row else None,
+            "evidence_node_ids": row.evidence_node_ids if row else None,
+            "error": row.error if row else None,
+            "assessed_at": row.assessed_at if row else None,
+        })
+
+    scored = [d["score"] for d in dimensions if d["score"] is not None]
+    return {
+        "canvas_id": canvas_id,
+        "dimensions": dimensions,
+        "score": sum(scored) if scored else None,
+        "max_score": MAX_SCORE * len(DIMENSIONS),
+        "assessed_at": max((d["assessed_at"] for d in dimensions if d["assessed_at"]), default=None),
+    }
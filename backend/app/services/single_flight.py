@@ -0,0 +1,79 @@
+"""
+Single-flight coalescing of identical in-flight model calls.
+
+Concurrent callers with the same request key share one upstream call: the
+first caller starts it, later callers await the same result. Once the call
+finishes the key is released, so this never serves stale results (see
+result_cache for that).
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Per-key coalescing of concurrent async calls"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn, or join an identical call already in flight.
+
+        The shared call runs as its own task, so one caller being cancelled
+        (e.g. a closed browser tab) does not cancel it for the others.
+
+        Args:
+            key: Canonical request key
+            fn: Coroutine factory making the upstream call
+
+        Returns:
+            The shared result (exceptions are shared too)
+        """
+        with self._lock:
+            task = self._in_flight.get(key)
+            if task is None:
+                self.calls += 1
+                task = asyncio.ensure_future(fn())
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._release(key, task))
+            else:
+                self.coalesced += 1
+                logger.info(f"{self.name}: joined in-flight call {key[:12]}")
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            Dict with upstream calls, coalesced (saved) calls and in-flight keys
+        """
+        with self._lock:
+            return {
+                "upstream_calls": self.calls,
+                "coalesced_calls": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
+
+
+llm_single_flight = SingleFlight("llm")
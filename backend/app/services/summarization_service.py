@@ -0,0 +1,163 @@
+"""
+Background summarization of large nodes (ADR-002).
+
+Nodes over settings.node_summary_threshold_chars are summarized in the
+background. Summaries are keyed by the node's content hash, so identical
+content is summarized once and reused by every chat. Context building only
+reads stored summaries and never waits for one to be produced.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, Iterable
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.background import run_in_background
+from app.core.database import AsyncSessionLocal
+from app.models.node import Node, NodeSummary
+from app.services.claude_service import chat_with_claude, render_node_fragment
+from app.services.llm_scheduler import PRIORITY_BACKGROUND
+from app.services.usage_service import UsageContext
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = """Summarize the following deal canvas node for use as context in later sales conversations.
+
+Write structured key points. Preserve names, titles, dates, numbers, products, competitors, requirements and commitments exactly. Drop boilerplate and repetition. Do not add information that is not in the node."""
+
+# Content hashes with a summary in flight (dedupes concurrent edits)
+_pending: set[str] = set()
+
+
+def compute_content_hash(title: str, node_type: str, data: Dict[str, Any] | None) -> str:
+    """
+    Hash the parts of a node that feed AI context.
+
+    Args:
+        title: Node title
+        node_type: Node type
+        data: Node data
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(
+        {"title": title, "node_type": node_type, "data": data or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def needs_summary(node: Node) -> bool:
+    """
+    Check whether a node is large enough to be summarized.
+
+    Args:
+        node: Node object
+
+    Returns:
+        True if the node exceeds the summarization threshold
+    """
+    return (node.content_size or 0) > settings.node_summary_threshold_chars
+
+
+def get_summaries(db: Session, content_hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    Look up stored summaries in one query.
+
+    Args:
+        db: Database session
+        content_hashes: Content hashes to look up
+
+    Returns:
+        Dict of content hash -> summary (missing hashes are omitted)
+    """
+    hashes = {h for h in content_hashes if h}
+    if not hashes:
+        return {}
+
+    rows = (
+        db.query(NodeSummary.content_hash, NodeSummary.summary)
+        .filter(NodeSummary.content_hash.in_(hashes))
+        .all()
+    )
+    return {content_hash: summary for content_hash, summary in rows}
+
+
+def schedule_summary(db: Session, node: Node) -> None:
+    """
+    Start summarizing a node in the background if it needs a summary.
+    Returns immediately; does nothing outside a running event loop.
+
+    Args:
+        db: Database session
+        node: Node object (content_size and content_hash already set)
+    """
+    if not needs_summary(node) or not node.content_hash:
+        return
+
+    content_hash = node.content_hash
+    if content_hash in _pending or get_summaries(db, [content_hash]):
+        return
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        logger.debug(f"No event loop, skipping summary for node {node.id}")
+        return
+
+    text = render_node_fragment({
+        'title': node.title,
+        'node_type': node.node_type,
+        'data': node.data,
+    })
+
+    _pending.add(content_hash)
+    run_in_background(summarize_content(content_hash, text, node.canvas_id))
+
+    logger.info(f"Summary scheduled for node {node.id} ({node.content_size} chars)")
+
+
+async def summarize_content(content_hash: str, text: str, canvas_id: int | None = None) -> None:
+    """
+    Summarize node content and store it under its content hash.
+
+    Args:
+        content_hash: Node content hash
+        text: Rendered node content
+        canvas_id: Canvas the summary is billed to (usage ledger)
+    """
+    try:
+        response = await chat_with_claude(
+            messages=[{'role': 'user', 'content': text}],
+            system_prompt=SUMMARY_INSTRUCTIONS,
+            max_tokens=1024,
+            temperature=0.0,
+            priority=PRIORITY_BACKGROUND,
+            usage_context=UsageContext(operation='node_summary', canvas_id=canvas_id),
+        )
+
+        async with AsyncSessionLocal() as db:
+            try:
+                db.add(NodeSummary(
+                    content_hash=content_hash,
+                    summary=response['content'],
+                    source_size=len(text),
+                    model=response.get('model'),
+                ))
+                await db.commit()
+            except IntegrityError:
+                # Another worker stored the same content first
+                await db.rollback()
+
+        logger.info(f"Summary stored for content {content_hash[:12]} ({len(text)} chars)")
+
+    except Exception as e:
+        # Context falls back to full content; the next edit retries
+        logger.error(f"Failed to summarize content {content_hash[:12]}: {e}")
+    finally:
+        _pending.discard(content_hash)
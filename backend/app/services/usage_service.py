@@ -0,0 +1,296 @@
+"""
+LLM usage ledger and cost rollups.
+
+Every upstream model call is recorded in llm_usage with its tokens,
+latency, cost and attribution (operation, chat type, canvas, user). The
+same write increments the matching llm_usage_daily row, so cost reports
+("cost per deal this quarter") read the small rollup table instead of
+scanning the ledger.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.background import run_in_background
+from app.core.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.models.usage import LLMUsage, LLMUsageDaily
+from app.models.user import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, output, cache read, cache write)
+MODEL_PRICING = {
+    "opus": (15.00, 75.00, 1.50, 18.75),
+    "sonnet": (3.00, 15.00, 0.30, 3.75),
+    "haiku": (1.00, 5.00, 0.10, 1.25),
+}
+DEFAULT_PRICING = MODEL_PRICING["sonnet"]
+
+# Bedrock batch inference is billed at half the on-demand price
+BATCH_DISCOUNT = 0.5
+
+ROLLUP_COUNTERS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+)
+
+
+@dataclass
+class UsageContext:
+    """Who and what a model call is for"""
+
+    operation: str  # 'chat', 'node_summary', 'compaction', 'portfolio', 'scorecard'
+    chat_type: str | None = None
+    canvas_id: int | None = None
+    user_id: int | None = None
+    chat_id: int | None = None
+
+
+def usage_tokens(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Map a model response's usage block to ledger token columns.
+
+    Args:
+        usage: Usage dict from the model response
+
+    Returns:
+        Dict of token counts
+    """
+    return {
+        "input_tokens": usage.get("input_tokens") or 0,
+        "output_tokens": usage.get("output_tokens") or 0,
+        "cache_read_tokens": usage.get("cache_read_input_tokens") or 0,
+        "cache_write_tokens": usage.get("cache_creation_input_tokens") or 0,
+    }
+
+
+def estimate_cost(model: str, tokens: Dict[str, int], batch: bool = False) -> float:
+    """
+    Estimate the USD cost of a call.
+
+    Args:
+        model: Model ID
+        tokens: Token counts (see usage_tokens)
+        batch: Billed at the batch inference discount
+
+    Returns:
+        Cost in USD
+    """
+    model_lower = (model or "").lower()
+    pricing = next(
+        (price for family, price in MODEL_PRICING.items() if family in model_lower),
+        DEFAULT_PRICING,
+    )
+
+    cost = (
+        tokens["input_tokens"] * pricing[0]
+        + tokens["output_tokens"] * pricing[1]
+        + tokens["cache_read_tokens"] * pricing[2]
+        + tokens["cache_write_tokens"] * pricing[3]
+    ) / 1_000_000
+
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+def increment_rollup(db: Session, entry: LLMUsage) -> None:
+    """
+    Add a ledger entry to its daily rollup row (created on first use).
+
+    Args:
+        db: Database session (committed by the caller)
+        entry: Ledger entry
+    """
+    key = {
+        "day": (entry.created_at or datetime.utcnow()).date(),
+        "canvas_id": entry.canvas_id or 0,
+        "user_id": entry.user_id or 0,
+        "model": entry.model,
+    }
+    increments = {
+        LLMUsageDaily.call_count: LLMUsageDaily.call_count + 1,
+        LLMUsageDaily.latency_ms_total: LLMUsageDaily.latency_ms_total + (entry.latency_ms or 0.0),
+        LLMUsageDaily.cost_usd: LLMUsageDaily.cost_usd + entry.cost_usd,
+        LLMUsageDaily.updated_at: datetime.utcnow(),
+    }
+    for counter in ROLLUP_COUNTERS:
+        column = getattr(LLMUsageDaily, counter)
+        increments[column] = column + getattr(entry, counter)
+
+    updated = (
+        db.query(LLMUsageDaily)
+        .filter_by(**key)
+        .update(increments, synchronize_session=False)
+    )
+    if updated:
+        return
+
+    db.add(LLMUsageDaily(
+        **key,
+        call_count=1,
+        latency_ms_total=entry.latency_ms or 0.0,
+        cost_usd=entry.cost_usd,
+        **{counter: getattr(entry, counter) for counter in ROLLUP_COUNTERS},
+    ))
+
+
+def record_usage(
+    context: UsageContext | None,
+    provider: str,
+    model: str | None,
+    usage: Dict[str, Any],
+    latency_ms: float | None = None,
+    ttft_ms: float | None = None,
+    batch: bool = False,
+) -> None:
+    """
+    Record one model call in the ledger and its daily rollup.
+    The write runs as a background task on its own session, so it neither
+    delays the caller nor is lost if the caller is cancelled. Never raises
+    (usage tracking must not fail a chat).
+
+    Args:
+        context: Attribution (None records an unattributed call)
+        provider: Provider name
+        model: Model ID reported by the provider
+        usage: Usage dict from the model response
+        latency_ms: Call duration
+        ttft_ms: Time to first token (streams)
+        batch: Billed at the batch inference discount
+    """
+    context = context or UsageContext(operation="other")
+    model = model or "unknown"
+    tokens = usage_tokens(usage)
+
+    entry_values = dict(
+        model=model,
+        provider=provider,
+        operation=context.operation,
+        chat_type=context.chat_type,
+        canvas_id=context.canvas_id,
+        user_id=context.user_id,
+        chat_id=context.chat_id,
+        latency_ms=latency_ms,
+        ttft_ms=ttft_ms,
+        cost_usd=estimate_cost(model, tokens, batch=batch),
+        created_at=datetime.utcnow(),
+        **tokens,
+    )
+
+    try:
+        run_in_background(store_usage(entry_values))
+    except RuntimeError:
+        logger.error(f"No event loop, LLM usage not recorded ({context.operation})")
+
+
+async def store_usage(entry_values: Dict[str, Any]) -> None:
+    """
+    Write a ledger entry and its rollup increment (own session; never raises).
+
+    Args:
+        entry_values: LLMUsage column values
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.run_sync(write_usage, entry_values)
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to record LLM usage ({entry_values['operation']}): {e}")
+
+
+def write_usage(db: Session, entry_values: Dict[str, Any]) -> None:
+    """
+    Insert a ledger entry and increment its rollup in one transaction.
+
+    Args:
+        db: Database session
+        entry_values: LLMUsage column values
+    """
+    # Second attempt covers a rollup row created concurrently
+    for attempt in range(2):
+        entry = LLMUsage(**entry_values)
+        db.add(entry)
+        increment_rollup(db, entry)
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise
+
+
+def quarter_start(day: date) -> date:
+    """First day of the quarter containing day"""
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+
+def get_cost_report(
+    db: Session,
+    group_by: str = "canvas",
+    start: date | None = None,
+    end: date | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Sum usage and cost from the daily rollups.
+
+    Args:
+        db: Database session
+        group_by: 'canvas', 'user' or 'model'
+        start: First day (default: start of the current quarter)
+        end: Last day, inclusive (default: today, UTC)
+
+    Returns:
+        List of groups ordered by cost, highest first
+    """
+    # Rollup days are UTC dates (see increment_rollup)
+    today = datetime.utcnow().date()
+    start = start or quarter_start(today)
+    end = end or today
+
+    columns = {
+        "canvas": LLMUsageDaily.canvas_id,
+        "user": LLMUsageDaily.user_id,
+        "model": LLMUsageDaily.model,
+    }
+    group_column = columns[group_by]
+
+    totals = [
+        func.sum(LLMUsageDaily.call_count).label("calls"),
+        func.sum(LLMUsageDaily.cost_usd).label("cost_usd"),
+        func.sum(LLMUsageDaily.latency_ms_total).label("latency_ms_total"),
+        *(func.sum(getattr(LLMUsageDaily, c)).label(c) for c in ROLLUP_COUNTERS),
+    ]
+
+    query = db.query(group_column.label("key"), *totals)
+    group_columns = [group_column]
+    if group_by == "canvas":
+        query = query.add_columns(Canvas.name.label("name")).outerjoin(Canvas, Canvas.id == LLMUsageDaily.canvas_id)
+        group_columns.append(Canvas.name)
+    elif group_by == "user":
+        query = query.add_columns(User.email.label("name")).outerjoin(User, User.id == LLMUsageDaily.user_id)
+        group_columns.append(User.email)
+
+    rows = (
+        query.filter(LLMUsageDaily.day >= start, LLMUsageDaily.day <= end)
+        .group_by(*group_columns)
+        .order_by(func.sum(LLMUsageDaily.cost_usd).desc())
+        .all()
+    )
+
+    return [
+        {
+            group_by: row.key or None,
+            "name": getattr(row, "name", None),
+            "calls": row.calls,
+            "cost_usd": round(row.cost_usd or 0.0, 4),
+            "avg_latency_ms": round(row.latency_ms_total / row.calls, 1) if row.calls else None,
+            **{c: getattr(row, c) for c in ROLLUP_COUNTERS},
+        }
+        for row in rows
+    ]
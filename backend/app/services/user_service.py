@@ -1,7 +1,8 @@
 """
 User management service.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User, UserRole
 from app.core.config import settings
 import logging
@@ -9,7 +10,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def get_user_by_email(db: Session, email: str) -> User | None:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """
     Get user by email address.
 
@@ -20,10 +21,11 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     Returns:
         User object or None
     """
-    return db.query(User).filter(User.email == email.lower()).first()
+    result = await db.execute(select(User).where(User.email == email.lower()))
+    return result.scalars().first()
 
 
-def get_user_by_id(db: Session, user_id: int) -> User | None:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
     """
     Get user by ID.
 
@@ -34,11 +36,11 @@ def get_user_by_id(db: Session, user_id: int) -> User | None:
     Returns:
         User object or None
     """
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.get(User, user_id)
 
 
-def create_user(
-    db: Session,
+async def create_user(
+    db: AsyncSession,
     email: str,
     full_name: str | None = None,
     role: UserRole = UserRole.USER,
@@ -68,15 +70,15 @@ def create_user(
         is_active=True,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     logger.info(f"Created user: {email} with role {role}")
     return user
 
 
-def update_user_saml_info(
-    db: Session,
+async def update_user_saml_info(
+    db: AsyncSession,
     user: User,
     saml_name_id: str | None = None,
     saml_session_index: str | None = None,
@@ -98,12 +100,12 @@ def update_user_saml_info(
     if saml_session_index:
         user.saml_session_index = saml_session_index
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
-def bootstrap_admin_if_needed(db: Session, email: str, full_name: str | None = None) -> User:
+async def bootstrap_admin_if_needed(db: AsyncSession, email: str, full_name: str | None = None) -> User:
     """
     Bootstrap the first admin user if this is the bootstrap admin email.
 
@@ -119,26 +121,26 @@ def bootstrap_admin_if_needed(db: Session, email: str, full_name: str | None = N
     is_bootstrap_admin = email.lower() == settings.bootstrap_admin_email.lower()
 
     # Get or create user
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
 
     if user is None:
         # User doesn't exist - create them
         role = UserRole.ADMIN if is_bootstrap_admin else UserRole.USER
-        user = create_user(db, email, full_name, role)
+        user = await create_user(db, email, full_name, role)
 
         if is_bootstrap_admin:
             logger.info(f"Bootstrap admin user created: {email}")
     elif is_bootstrap_admin and user.role != UserRole.ADMIN:
         # User exists but isn't admin - upgrade them
         user.role = UserRole.ADMIN
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         logger.info(f"User upgraded to admin: {email}")
 
     return user
 
 
-def count_users(db: Session) -> int:
+async def count_users(db: AsyncSession) -> int:
     """
     Count total number of users.
 
@@ -148,4 +150,4 @@ def count_users(db: Session) -> int:
     Returns:
         Total user count
     """
-    return db.query(User).count()
+    return await db.scalar(select(func.count()).select_from(User))
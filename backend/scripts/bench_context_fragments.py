@@ -0,0 +1,115 @@
+"""
+Canvas context rendering benchmark.
+
+Times building a canvas's full context at 100, 1k and 10k nodes:
+
+- full:    rendering every node (build_canvas_context, no cache)
+- cold:    the fragment cache on an empty cache
+- warm:    the fragment cache with every fragment cached (a repeat turn)
+- 1 edit:  the fragment cache after one node was edited
+
+Usage (from the backend directory):
+    python scripts/bench_context_fragments.py [--sizes 100 1000 10000] [--repeat 20]
+
+Nodes are generated in memory; no database is needed.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings validate these at import; rendering does not use them
+for name, value in (
+    ("SAML_IDP_METADATA_URL", "https://idp.example.com/metadata"),
+    ("SAML_SP_ENTITY_ID", "bench"),
+    ("BOOTSTRAP_ADMIN_EMAIL", "bench@example.com"),
+):
+    os.environ.setdefault(name, value)
+
+from app.services.claude_service import build_canvas_context  # noqa: E402
+from app.services.context_renderer import FragmentCache, render_canvas_context  # noqa: E402
+from app.services import context_renderer  # noqa: E402
+
+CANVAS = {"name": "Acme renewal", "description": "Benchmark canvas"}
+
+
+def make_nodes(count: int) -> list[dict]:
+    """Nodes with 100-2000 characters of notes each"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    return [
+        {
+            "id": i,
+            "title": f"Node {i}",
+            "node_type": rng.choice(["generic", "person", "meeting", "document"]),
+            "data": {"notes": "x" * rng.randint(100, 2000), "owner": f"owner {i % 17}"},
+            "updated_at": now,
+            "content_hash": f"{i:064x}",
+        }
+        for i in range(count)
+    ]
+
+
+def best_ms(fn, repeat: int) -> float:
+    """Median of repeat runs, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def bench(count: int, repeat: int) -> tuple[float, float, float, float]:
+    nodes = make_nodes(count)
+
+    full = best_ms(lambda: build_canvas_context(CANVAS, nodes), repeat)
+
+    def cold():
+        context_renderer.fragment_cache = FragmentCache(max_entries=count)
+        render_canvas_context(CANVAS, nodes)
+
+    cold_ms = best_ms(cold, repeat)
+
+    context_renderer.fragment_cache = FragmentCache(max_entries=count)
+    render_canvas_context(CANVAS, nodes)
+    warm = best_ms(lambda: render_canvas_context(CANVAS, nodes), repeat)
+
+    edits = iter(range(repeat))
+
+    def one_edit():
+        i = next(edits) % count
+        nodes[i] = {
+            **nodes[i],
+            "updated_at": nodes[i]["updated_at"] + timedelta(seconds=1),
+            "content_hash": f"edit{i}{time.perf_counter_ns()}",
+        }
+        render_canvas_context(CANVAS, nodes)
+
+    edited = best_ms(one_edit, repeat)
+
+    # Every variant must produce the same text
+    assert render_canvas_context(CANVAS, nodes) == build_canvas_context(CANVAS, nodes)
+    return full, cold_ms, warm, edited
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"median of {args.repeat} runs, milliseconds")
+    print(f"{'nodes':>6}  {'full':>8}  {'cold':>8}  {'warm':>8}  {'1 edit':>8}  {'speedup':>7}")
+    for count in args.sizes:
+        full, cold, warm, edited = bench(count, args.repeat)
+        print(f"{count:>6}  {full:>8.2f}  {cold:>8.2f}  {warm:>8.2f}  {edited:>8.2f}  {full / edited:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
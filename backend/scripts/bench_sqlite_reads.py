@@ -0,0 +1,144 @@
+"""
+SQLite read concurrency benchmark.
+
+Compares the old engine setup (one connection shared by every thread, as
+with StaticPool) against the WAL setup in app/core/database.py (one
+read-only connection per thread, same pragmas) at increasing thread
+counts. Reads run canvas-listing style aggregate queries against a
+generated database, so most of the time is spent inside SQLite, which
+releases the GIL.
+
+Usage:
+    python scripts/bench_sqlite_reads.py [--canvases 2000] [--seconds 3]
+
+Standard library only; the database is created in a temp directory.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+QUERY = """
+SELECT c.id, c.name, COUNT(n.id), SUM(LENGTH(n.data))
+FROM canvases c LEFT JOIN nodes n ON n.canvas_id = c.id
+WHERE c.owner_id = ?
+GROUP BY c.id
+"""
+
+
+def apply_pragmas(conn: sqlite3.Connection, wal: bool, read_only: bool = False) -> None:
+    """Same pragmas as app.core.database.apply_sqlite_pragmas"""
+    conn.execute("PRAGMA busy_timeout=5000")
+    if wal:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute(f"PRAGMA mmap_size={256 * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+
+def build_database(path: str, canvases: int, wal: bool) -> None:
+    """Create canvases with ~20 nodes each, spread over 50 owners"""
+    conn = sqlite3.connect(path)
+    apply_pragmas(conn, wal)
+    conn.executescript("""
+        CREATE TABLE canvases (id INTEGER PRIMARY KEY, name TEXT, owner_id INTEGER);
+        CREATE TABLE nodes (id INTEGER PRIMARY KEY, canvas_id INTEGER, title TEXT, data TEXT);
+        CREATE INDEX ix_canvases_owner_id ON canvases (owner_id);
+        CREATE INDEX ix_nodes_canvas_id ON nodes (canvas_id);
+    """)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO canvases (id, name, owner_id) VALUES (?, ?, ?)",
+        [(i, f"Deal {i}", i % 50) for i in range(1, canvases + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO nodes (canvas_id, title, data) VALUES (?, ?, ?)",
+        [
+            (canvas_id, f"Node {j}", "x" * rng.randint(50, 2000))
+            for canvas_id in range(1, canvases + 1)
+            for j in range(20)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(path: str, threads: int, seconds: float, shared: bool) -> float:
+    """
+    Run the read query from several threads for a fixed time.
+
+    Returns:
+        Queries per second
+    """
+    lock = threading.Lock()
+    shared_conn = None
+    if shared:
+        shared_conn = sqlite3.connect(path, check_same_thread=False)
+        apply_pragmas(shared_conn, wal=False)
+
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index: int) -> None:
+        rng = random.Random(index)
+        conn = shared_conn
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            apply_pragmas(conn, wal=True, read_only=True)
+
+        while time.perf_counter() < deadline:
+            owner_id = rng.randrange(50)
+            if shared:
+                # A shared connection can run one statement at a time
+                with lock:
+                    conn.execute(QUERY, (owner_id,)).fetchall()
+            else:
+                conn.execute(QUERY, (owner_id,)).fetchall()
+            counts[index] += 1
+
+        if not shared:
+            conn.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    if shared_conn:
+        shared_conn.close()
+    return sum(counts) / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--canvases", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    thread_counts = sorted({1, 2, 4, 8, cpus})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        wal_path = os.path.join(tmp, "wal.db")
+        build_database(legacy_path, args.canvases, wal=False)
+        build_database(wal_path, args.canvases, wal=True)
+
+        print(f"{cpus} CPUs, {args.canvases} canvases, {args.seconds}s per run")
+        print(f"{'threads':>7}  {'shared conn q/s':>15}  {'WAL pool q/s':>12}  {'speedup':>7}")
+        for threads in thread_counts:
+            shared_qps = run(legacy_path, threads, args.seconds, shared=True)
+            pool_qps = run(wal_path, threads, args.seconds, shared=False)
+            print(f"{threads:>7}  {shared_qps:>15.0f}  {pool_qps:>12.0f}  {pool_qps / shared_qps:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
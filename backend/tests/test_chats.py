@@ -0,0 +1,245 @@
+"""Chat endpoints on the async data layer"""
+import asyncio
+import json
+
+import pytest
+
+from app.core.background import drain_background_tasks
+from app.core.config import settings
+from tests.conftest import add_nodes, stream_then_disconnect
+
+API = settings.api_prefix
+
+
+async def create_chat(client, canvas, **fields) -> dict:
+    response = await client.post(
+        f"{API}/chats/",
+        json={"canvas_id": canvas.id, "name": "Deal chat", "chat_type": "sales_assistant", **fields},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_send_message_saves_both_turns(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat = await create_chat(client, canvas)
+
+    response = await client.post(f"{API}/chats/{chat['id']}/messages", json={"content": "What's the next step?"})
+    assert response.status_code == 200, response.text
+    assert response.json()["role"] == "assistant"
+
+    messages = (await client.get(f"{API}/chats/{chat['id']}/messages")).json()
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+
+    listed = (await client.get(f"{API}/chats/canvas/{canvas.id}")).json()
+    assert [(c["id"], c["message_count"]) for c in listed] == [(chat["id"], 2)]
+
+
+async def test_stream_message_saves_reply(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat = await create_chat(client, canvas)
+
+    async with client.stream(
+        "POST", f"{API}/chats/{chat['id']}/messages/stream", json={"content": "Summarize the deal"}
+    ) as response:
+        assert response.status_code == 200
+        body = "".join([chunk async for chunk in response.aiter_text()])
+
+    assert "event: done" in body
+    await drain_background_tasks(timeout=5)
+
+    messages = (await client.get(f"{API}/chats/{chat['id']}/messages")).json()
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    assert messages[1]["content"]
+
+
+async def test_chat_of_unshared_canvas_is_forbidden(client, db):
+    from app.models.canvas import Canvas
+    from app.models.user import User
+
+    other = User(email="someone-else@example.com")
+    db.add(other)
+    await db.commit()
+    canvas = Canvas(name="Not yours", owner_id=other.id)
+    db.add(canvas)
+    await db.commit()
+
+    response = await client.get(f"{API}/chats/canvas/{canvas.id}")
+    assert response.status_code == 403
+
+
+def sse_events(body: str) -> list[tuple[str, dict]]:
+    """Parse a server-sent event stream into (event, data) pairs"""
+    events = []
+    for raw in body.split("\n\n"):
+        if raw.strip():
+            name = raw.split("\n", 1)[0].removeprefix("event: ")
+            events.append((name, json.loads(raw.split("data: ", 1)[1])))
+    return events
+
+
+@pytest.fixture
+def slow_stream(monkeypatch):
+    """40-token replies at 50 tokens/s, so a stream can be cut off midway"""
+    monkeypatch.setattr(settings, "llm_simulator_tokens_per_second", 50)
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 40)
+
+
+async def test_stream_events(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat = await create_chat(client, canvas)
+
+    response = await client.post(f"{API}/chats/{chat['id']}/messages/stream", json={"content": "Summarize the deal"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+
+    names = [name for name, _ in events]
+    assert names[-1] == "done" and set(names[:-1]) == {"delta"}
+
+    done = events[-1][1]
+    text = "".join(data["text"] for name, data in events if name == "delta")
+    assert done["message"]["content"] == text
+    assert done["usage"]["output_tokens"] > 0
+    assert done["ttft_ms"] is not None
+    assert done["context"]["mode"] == "snapshot"
+
+
+async def test_disconnect_saves_partial_reply(slow_stream, db, user, client, canvas):
+    await add_nodes(db, canvas, 3)
+    chat = await create_chat(client, canvas)
+
+    body = await stream_then_disconnect(
+        user, f"{API}/chats/{chat['id']}/messages/stream", {"content": "Summarize the deal"}
+    )
+    received = "".join(data["text"] for name, data in sse_events(body) if name == "delta")
+    assert "event: done" not in body
+    await drain_background_tasks(timeout=5)
+
+    messages = (await client.get(f"{API}/chats/{chat['id']}/messages")).json()
+    assert [m["role"] for m in messages] == ["user", "assistant"]
+    partial = messages[1]["content"]
+    assert partial.startswith(received)
+    assert len(partial.split()) < 40
+
+
+async def test_upstream_error_saves_partial_reply(monkeypatch, client, db, canvas):
+    from app.services.llm_providers import get_provider
+
+    def failing_stream(request_body):
+        yield {"type": "usage", "usage": {"input_tokens": 100}, "model": "simulated"}
+        yield {"type": "text", "text": "The champion"}
+        yield {"type": "text", "text": " is"}
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(get_provider(), "iter_stream", failing_stream)
+    await add_nodes(db, canvas, 3)
+    chat = await create_chat(client, canvas)
+
+    response = await client.post(f"{API}/chats/{chat['id']}/messages/stream", json={"content": "Who is the champion?"})
+    events = sse_events(response.text)
+    assert [name for name, _ in events] == ["delta", "delta", "error"]
+    assert "connection reset" in events[-1][1]["detail"]
+    await drain_background_tasks(timeout=5)
+
+    messages = (await client.get(f"{API}/chats/{chat['id']}/messages")).json()
+    assert [(m["role"], m["content"]) for m in messages][1:] == [("assistant", "The champion is")]
+
+
+async def add_people(db, canvas, names: list[str]) -> list:
+    from app.models.node import Node
+
+    people = [
+        Node(canvas_id=canvas.id, node_type="person", title=name, data={"role": "Buyer"}, exclude_from_context=0)
+        for name in names
+    ]
+    db.add_all(people)
+    await db.commit()
+    return people
+
+
+async def test_persona_replies_are_interleaved(monkeypatch, client, db, canvas):
+    monkeypatch.setattr(settings, "llm_simulator_tokens_per_second", 400)
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 20)
+    people = await add_people(db, canvas, ["Dana CISO", "Lee CFO", "Sam IT"])
+    node_ids = [person.id for person in people]
+
+    response = await client.post(
+        f"{API}/chats/canvas/{canvas.id}/personas/stream",
+        json={"content": "What would stop you signing?", "node_ids": node_ids},
+    )
+    assert response.status_code == 200, response.text
+    events = sse_events(response.text)
+
+    name, end = events[-1]
+    assert name == "end"
+    chat_ids = end["chat_ids"]
+    assert len(set(chat_ids)) == 3
+
+    # Every persona starts streaming before the first one finishes
+    first_done = next(i for i, (name, _) in enumerate(events) if name == "done")
+    assert {data["node_id"] for name, data in events[:first_done] if name == "delta"} == set(node_ids)
+
+    for chat_id, node_id in zip(chat_ids, node_ids):
+        mine = [(name, data) for name, data in events[:-1] if data["chat_id"] == chat_id]
+        assert {data["node_id"] for _, data in mine} == {node_id}
+        assert [name for name, _ in mine][-1] == "done"
+        text = "".join(data["text"] for name, data in mine if name == "delta")
+        assert mine[-1][1]["message"]["content"] == text
+
+
+async def test_persona_turns_reuse_their_chats(client, db, canvas):
+    people = await add_people(db, canvas, ["Dana CISO", "Lee CFO"])
+    body = {"content": "What would stop you signing?", "node_ids": [person.id for person in people]}
+
+    first = sse_events((await client.post(f"{API}/chats/canvas/{canvas.id}/personas/stream", json=body)).text)
+    second = sse_events((await client.post(f"{API}/chats/canvas/{canvas.id}/personas/stream", json=body)).text)
+    assert first[-1][1]["chat_ids"] == second[-1][1]["chat_ids"]
+
+    for person, chat_id in zip(people, first[-1][1]["chat_ids"]):
+        listed = (await client.get(f"{API}/chats/node/{person.id}")).json()
+        assert [(c["id"], c["chat_type"], c["name"], c["message_count"]) for c in listed] == [
+            (chat_id, "persona", f"{person.title} Persona", 4),
+        ]
+
+
+async def test_personas_are_prepared_concurrently(monkeypatch, client, db, canvas):
+    from app.routers import chats
+
+    build_conversation = chats.build_conversation
+    active = peak = 0
+
+    async def slow_build_conversation(*args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.05)
+            return await build_conversation(*args, **kwargs)
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(chats, "build_conversation", slow_build_conversation)
+    people = await add_people(db, canvas, ["Dana CISO", "Lee CFO", "Sam IT"])
+
+    response = await client.post(
+        f"{API}/chats/canvas/{canvas.id}/personas/stream",
+        json={"content": "What would stop you signing?", "node_ids": [person.id for person in people]},
+    )
+
+    assert sse_events(response.text)[-1][0] == "end"
+    assert peak == 3
+
+
+async def test_persona_turn_requires_person_nodes(client, db, canvas):
+    [note] = await add_nodes(db, canvas, 1)
+    [person] = await add_people(db, canvas, ["Dana CISO"])
+    url = f"{API}/chats/canvas/{canvas.id}/personas/stream"
+
+    response = await client.post(url, json={"content": "Hi", "node_ids": [person.id, note.id]})
+    assert response.status_code == 400
+
+    response = await client.post(url, json={"content": "Hi", "node_ids": []})
+    assert response.status_code == 400
+
+    response = await client.post(url, json={"content": "Hi", "node_ids": [person.id, 10**9]})
+    assert response.status_code == 404
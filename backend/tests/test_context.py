@@ -0,0 +1,87 @@
+"""Chat context: pinned mode and outline, retrieval index freshness"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.models.chat import Chat
+from app.models.node import Node
+from app.services.context_service import get_turn_context
+from app.services.retrieval_index import RetrievalIndex, node_index_data
+from tests.conftest import add_nodes
+
+
+@pytest.fixture
+async def chat(db, canvas):
+    chat = Chat(canvas_id=canvas.id, name="Deal chat", chat_type="sales_assistant")
+    db.add(chat)
+    await db.commit()
+    return chat
+
+
+async def test_retrieval_mode_and_outline_are_pinned(monkeypatch, db, canvas, chat):
+    await add_nodes(db, canvas, 5, size=2000)
+    monkeypatch.setattr(settings, "context_retrieval_min_tokens", 1000)
+
+    first_context, excerpts, info = await db.run_sync(get_turn_context, chat, canvas, "Discussion 3")
+    assert info["mode"] == "retrieval"
+    assert excerpts
+    outline_hash = chat.context_snapshot["outline_hash"]
+
+    # The canvas changes and would no longer qualify for retrieval; the chat keeps its mode and outline
+    await add_nodes(db, canvas, 1)
+    monkeypatch.setattr(settings, "context_retrieval_min_tokens", 10**9)
+
+    context, _, info = await db.run_sync(get_turn_context, chat, canvas, "nothing matches zzzz")
+    assert info["mode"] == "retrieval"
+    assert context == first_context
+    assert chat.context_snapshot["outline_hash"] == outline_hash
+
+
+async def test_snapshot_mode_is_pinned(monkeypatch, db, canvas, chat):
+    await add_nodes(db, canvas, 2)
+
+    first_context, excerpts, info = await db.run_sync(get_turn_context, chat, canvas, "hello")
+    assert info["mode"] == "snapshot"
+    assert excerpts == ""
+
+    await add_nodes(db, canvas, 5, size=2000)
+    monkeypatch.setattr(settings, "context_retrieval_min_tokens", 10)
+
+    context, excerpts, info = await db.run_sync(get_turn_context, chat, canvas, "Discussion 3")
+    assert info["mode"] == "snapshot"
+    assert (context, excerpts) == (first_context, "")
+
+
+async def test_index_picks_up_changes_made_elsewhere(db, canvas):
+    """Edits that bypass this process's hooks (another worker) are caught up on the next lookup"""
+    index = RetrievalIndex(max_canvases=8)
+    nodes = await add_nodes(db, canvas, 3)
+
+    assert await db.run_sync(lambda s: index.get(s, canvas.id).search("pangolin", 3)) == []
+
+    later = datetime.utcnow() + timedelta(seconds=1)
+    await db.execute(
+        update(Node).where(Node.id == nodes[0].id).values(data={"notes": "pangolin pricing"}, updated_at=later)
+    )
+    await db.commit()
+    hits = await db.run_sync(lambda s: index.get(s, canvas.id).search("pangolin", 3))
+    assert [hit.node_id for hit in hits] == [nodes[0].id]
+
+    await db.execute(delete(Node).where(Node.id == nodes[0].id))
+    await db.commit()
+    assert await db.run_sync(lambda s: index.get(s, canvas.id).search("pangolin", 3)) == []
+
+
+async def test_older_copy_does_not_replace_newer_node(db, canvas):
+    """A load that read a node before its update cannot overwrite the update"""
+    index = RetrievalIndex(max_canvases=8)
+    [node] = await add_nodes(db, canvas, 1)
+    canvas_index = await db.run_sync(lambda s: index.get(s, canvas.id))
+
+    newer = dict(node_index_data(node), data={"notes": "pangolin"}, updated_at=node.updated_at + timedelta(seconds=1))
+    canvas_index.add_node(newer)
+    canvas_index.add_node(node_index_data(node))
+
+    assert [hit.node_id for hit in canvas_index.search("pangolin", 3)] == [node.id]
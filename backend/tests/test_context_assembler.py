@@ -0,0 +1,149 @@
+"""Token-budgeted context: overflow order, truncation, excluded nodes, speed"""
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.services.claude_service import render_canvas_header
+from app.services.context_assembler import MIN_TRUNCATED_TOKENS, assemble_canvas_context
+from app.services.context_renderer import estimate_tokens, render_fragments
+
+CANVAS = {'name': "Acme renewal", 'description': "Renewal deal"}
+HEADER_TOKENS = estimate_tokens(render_canvas_header(CANVAS))
+
+
+def node_data(title: str, notes: str, node_type: str = 'generic', age_days: int = 1, **fields) -> dict:
+    return {
+        'id': str(uuid.uuid4()),
+        'title': title,
+        'node_type': node_type,
+        'data': {'notes': notes},
+        'updated_at': datetime.utcnow() - timedelta(days=age_days),
+        'content_hash': uuid.uuid4().hex,
+        **fields,
+    }
+
+
+def cost(node: dict) -> int:
+    return render_fragments([node])[0].tokens
+
+
+def filler(words: int) -> str:
+    return " ".join(["status update"] * (words // 2))
+
+
+def deal_nodes() -> list:
+    """Three similar-sized nodes, ranked: pricing > person > stale note"""
+    return [
+        node_data("Stale note", filler(800), age_days=365),
+        node_data("Champion", filler(800), node_type='person'),
+        node_data("Pricing", "pricing " + filler(800)),
+    ]
+
+
+def test_everything_fits():
+    nodes = deal_nodes()
+
+    context = assemble_canvas_context(CANVAS, nodes, query="pricing", budget_tokens=100_000)
+
+    assert context.included_node_ids == [n['id'] for n in nodes]
+    assert context.truncated == [] and context.dropped == []
+    assert context.token_count <= context.budget_tokens
+
+
+def test_overflow_keeps_highest_ranked_nodes_in_canvas_order():
+    stale, champion, pricing = nodes = deal_nodes()
+    budget = HEADER_TOKENS + cost(champion) + cost(pricing) + MIN_TRUNCATED_TOKENS // 2
+
+    context = assemble_canvas_context(CANVAS, nodes, query="pricing", budget_tokens=budget)
+
+    assert context.included_node_ids == [champion['id'], pricing['id']]
+    assert context.truncated == []
+    assert context.dropped == [{'id': stale['id'], 'title': "Stale note", 'tokens': cost(stale)}]
+    assert "Stale note" not in context.text
+    assert context.token_count <= budget
+
+
+def test_relevance_outranks_node_type():
+    stale, champion, pricing = nodes = deal_nodes()
+    budget = HEADER_TOKENS + cost(pricing) + MIN_TRUNCATED_TOKENS // 2
+
+    context = assemble_canvas_context(CANVAS, nodes, query="what about pricing?", budget_tokens=budget)
+    assert context.included_node_ids == [pricing['id']]
+
+    # Without a query the person node wins
+    context = assemble_canvas_context(CANVAS, nodes, budget_tokens=budget)
+    assert context.included_node_ids == [champion['id']]
+
+
+def test_first_node_that_does_not_fit_is_truncated():
+    stale, champion, pricing = nodes = deal_nodes()
+    spare = MIN_TRUNCATED_TOKENS * 2
+    budget = HEADER_TOKENS + cost(pricing) + spare
+
+    context = assemble_canvas_context(CANVAS, nodes, query="pricing", budget_tokens=budget)
+
+    assert context.included_node_ids == [champion['id'], pricing['id']]
+    [truncated] = context.truncated
+    assert truncated['id'] == champion['id']
+    assert truncated['tokens'] == cost(champion)
+    assert 0 < truncated['kept_tokens'] <= spare
+    assert "*(truncated)*" in context.text
+    assert [n['id'] for n in context.dropped] == [stale['id']]
+    assert context.token_count <= budget
+
+
+def test_smaller_lower_ranked_node_fills_the_gap():
+    stale, champion, pricing = deal_nodes()
+    small = node_data("Small note", "short", age_days=365)
+    nodes = [stale, champion, pricing, small]
+    budget = HEADER_TOKENS + cost(pricing) + MIN_TRUNCATED_TOKENS // 2
+    assert cost(small) < MIN_TRUNCATED_TOKENS // 2
+
+    context = assemble_canvas_context(CANVAS, nodes, query="pricing", budget_tokens=budget)
+
+    assert context.included_node_ids == [pricing['id'], small['id']]
+    assert {n['id'] for n in context.dropped} == {stale['id'], champion['id']}
+    assert context.token_count <= budget
+
+
+def test_excluded_nodes_are_never_included_or_reported():
+    stale, champion, pricing = deal_nodes()
+    secret = node_data("Secret pricing", "pricing pricing pricing", exclude_from_context=True)
+    nodes = [secret, stale, champion, pricing]
+
+    for budget in (100_000, HEADER_TOKENS + cost(pricing) + MIN_TRUNCATED_TOKENS // 2):
+        context = assemble_canvas_context(CANVAS, nodes, query="pricing", budget_tokens=budget)
+
+        assert secret['id'] not in context.included_node_ids
+        assert secret['id'] not in [n['id'] for n in context.truncated + context.dropped]
+        assert "Secret pricing" not in context.text
+
+
+def test_assembly_of_large_canvas_is_fast():
+    """A warm 2,000-node canvas over budget assembles in under 10 ms"""
+    rng = random.Random(1)
+    words = "pricing security champion budget procurement legal renewal risk timeline competitor".split()
+    nodes = [
+        node_data(
+            f"Node {i}",
+            " ".join(rng.choice(words) for _ in range(rng.randint(20, 300))),
+            node_type=rng.choice(['generic', 'person', 'meeting', 'document']),
+            age_days=rng.randint(0, 90),
+        )
+        for i in range(2000)
+    ]
+    query = "who owns the budget and pricing?"
+
+    # Warm the fragment cache; later turns only re-render edited nodes
+    context = assemble_canvas_context(CANVAS, nodes, query=query, budget_tokens=50_000)
+    assert context.dropped
+
+    timings = []
+    for _ in range(15):
+        start = time.perf_counter()
+        assemble_canvas_context(CANVAS, nodes, query=query, budget_tokens=50_000)
+        timings.append(time.perf_counter() - start)
+
+    assert statistics.median(timings) < 0.010
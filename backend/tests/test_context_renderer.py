@@ -0,0 +1,113 @@
+"""Incremental context rendering: per-node fragments, invalidated on edit"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services import context_renderer
+from app.services.claude_service import build_canvas_context
+from app.services.context_renderer import FragmentCache, render_canvas_context
+from app.services.context_service import build_canvas_context_for_chat
+
+API = settings.api_prefix
+
+
+@pytest.fixture
+def rendered(monkeypatch) -> list:
+    """Ids of the nodes rendered (cache misses), in order"""
+    calls = []
+    render = context_renderer.render_node_fragment
+
+    def spy(node):
+        calls.append(node['id'])
+        return render(node)
+
+    monkeypatch.setattr(context_renderer, "render_node_fragment", spy)
+    return calls
+
+
+def node_data(i: int, updated_at: datetime, **fields) -> dict:
+    return {
+        'id': i,
+        'title': f"Node {i}",
+        'node_type': 'generic',
+        'data': {'notes': f"Notes for node {i}"},
+        'updated_at': updated_at,
+        **fields,
+    }
+
+
+def test_cached_render_matches_full_render(monkeypatch):
+    monkeypatch.setattr(context_renderer, "fragment_cache", FragmentCache(max_entries=100))
+    now = datetime.utcnow()
+    canvas = {'name': "Acme", 'description': "Renewal"}
+    nodes = [node_data(i, now) for i in range(10)]
+    nodes[3]['exclude_from_context'] = 1
+
+    assert render_canvas_context(canvas, nodes) == build_canvas_context(canvas, nodes)
+    assert render_canvas_context(canvas, nodes) == build_canvas_context(canvas, nodes)
+    assert render_canvas_context(canvas, []) == build_canvas_context(canvas, [])
+
+
+def test_only_changed_nodes_are_rerendered(monkeypatch, rendered):
+    cache = FragmentCache(max_entries=100)
+    monkeypatch.setattr(context_renderer, "fragment_cache", cache)
+    now = datetime.utcnow()
+    nodes = [node_data(i, now) for i in range(5)]
+
+    context_renderer.render_fragments(nodes)
+    assert rendered == [0, 1, 2, 3, 4]
+
+    nodes[2] = node_data(2, now + timedelta(seconds=1), title="Renamed")
+    nodes[4] = {**nodes[4], 'summary': "Short summary"}
+    rendered.clear()
+    fragments = context_renderer.render_fragments(nodes)
+
+    assert rendered == [2, 4]
+    assert fragments[2].text.startswith("### Renamed")
+    assert cache.stats()["hits"] == 3
+
+
+def test_cache_is_bounded():
+    cache = FragmentCache(max_entries=3)
+    now = datetime.utcnow()
+    for i in range(5):
+        cache.get(node_data(i, now))
+
+    assert cache.stats()["entries"] == 3
+    # The oldest entries went first
+    cache.get(node_data(4, now))
+    assert cache.stats()["hits"] == 1
+    cache.get(node_data(0, now))
+    assert cache.stats()["misses"] == 6
+
+
+async def test_node_edit_rerenders_only_that_node(rendered, client, db, canvas):
+    node_ids = []
+    for i in range(5):
+        response = await client.post(f"{API}/nodes/", json={
+            "canvas_id": canvas.id,
+            "node_type": "generic",
+            "title": f"Stakeholder {i}",
+            "position_x": 0,
+            "position_y": 0,
+            "data": {"notes": f"Notes {i}"},
+        })
+        assert response.status_code == 201, response.text
+        node_ids.append(response.json()["id"])
+
+    await db.run_sync(build_canvas_context_for_chat, canvas)
+    assert sorted(rendered) == node_ids
+
+    response = await client.put(f"{API}/nodes/{node_ids[1]}", json={"data": {"notes": "Signed the MSA"}})
+    assert response.status_code == 200, response.text
+    # Moving a node does not touch its content
+    response = await client.put(f"{API}/nodes/{node_ids[3]}", json={"position_x": 40})
+    assert response.status_code == 200, response.text
+
+    rendered.clear()
+    db.expire_all()
+    assembled = await db.run_sync(build_canvas_context_for_chat, canvas)
+
+    assert rendered == [node_ids[1]]
+    assert "Signed the MSA" in assembled.text
@@ -0,0 +1,115 @@
+"""Rolling compaction: trigger threshold, verbatim window, summary reuse"""
+import pytest
+
+from app.core.config import settings
+from app.models.chat import Chat, ChatMessage
+from app.services import conversation_service
+from app.services.conversation_service import build_conversation
+
+KEEP_TURNS = 2
+BATCH_TURNS = 1
+# Compaction starts once the unsummarized history exceeds this many messages
+LIMIT = (KEEP_TURNS + BATCH_TURNS) * 2
+
+
+@pytest.fixture(autouse=True)
+def small_window(monkeypatch):
+    monkeypatch.setattr(settings, "chat_compaction_enabled", True)
+    monkeypatch.setattr(settings, "chat_keep_recent_turns", KEEP_TURNS)
+    monkeypatch.setattr(settings, "chat_compaction_batch_turns", BATCH_TURNS)
+
+
+@pytest.fixture
+def summaries(monkeypatch) -> list:
+    """Prompts sent to the summarizer; each call returns "summary <n>" """
+    prompts = []
+
+    async def fake_chat_with_claude(messages, **kwargs):
+        prompts.append(messages[-1]['content'])
+        return {'content': f"summary {len(prompts)}"}
+
+    monkeypatch.setattr(conversation_service, "chat_with_claude", fake_chat_with_claude)
+    return prompts
+
+
+@pytest.fixture
+async def chat(db, canvas):
+    chat = Chat(canvas_id=canvas.id, name="Deal chat", chat_type="sales_assistant")
+    db.add(chat)
+    await db.commit()
+    return chat
+
+
+async def say(db, chat, count: int, start: int = 0) -> None:
+    """Add alternating user/assistant messages "m<start>".."""
+    for i in range(start, start + count):
+        db.add(ChatMessage(chat_id=chat.id, role='user' if i % 2 == 0 else 'assistant', content=f"m{i}"))
+        await db.commit()
+
+
+async def test_no_compaction_up_to_the_threshold(db, chat, summaries):
+    await say(db, chat, LIMIT - 1)
+
+    messages, summary = await build_conversation(db, chat)
+
+    assert [m['content'] for m in messages] == [f"m{i}" for i in range(LIMIT - 1)]
+    assert summary is None
+    assert summaries == []
+
+
+async def test_compaction_keeps_recent_turns_verbatim(db, chat, summaries):
+    await say(db, chat, LIMIT + 1)
+
+    messages, summary = await build_conversation(db, chat)
+
+    # The verbatim window starts on a user turn: m4 (user) .. m6 (user)
+    assert [m['content'] for m in messages] == ["m4", "m5", "m6"]
+    assert messages[0]['role'] == 'user'
+    assert summary == "summary 1"
+
+    [prompt] = summaries
+    assert "(none yet)" in prompt
+    assert all(f"{role}: m{i}" in prompt for i, role in enumerate(["USER", "ASSISTANT"] * 2))
+    assert "m4" not in prompt
+
+    await db.refresh(chat)
+    assert chat.history_summary == "summary 1"
+    folded = await db.get(ChatMessage, chat.summarized_through_id)
+    assert folded.content == "m3"
+
+
+async def test_stored_summary_is_reused_until_the_next_batch(db, chat, summaries):
+    await say(db, chat, LIMIT + 1)
+    await build_conversation(db, chat)
+
+    # Later turns reuse the stored summary without another summarizer call
+    await say(db, chat, 2, start=LIMIT + 1)
+    messages, summary = await build_conversation(db, chat)
+    assert [m['content'] for m in messages] == ["m4", "m5", "m6", "m7", "m8"]
+    assert summary == "summary 1"
+    assert len(summaries) == 1
+
+    # Once another batch ages out, the old summary is extended, not rebuilt
+    await say(db, chat, 2, start=LIMIT + 3)
+    messages, summary = await build_conversation(db, chat)
+    assert summary == "summary 2"
+    assert [m['content'] for m in messages] == ["m8", "m9", "m10"]
+    assert "summary 1" in summaries[1]
+    assert "m0" not in summaries[1]
+
+
+async def test_failed_compaction_still_caps_history(db, chat, monkeypatch):
+    async def failing_chat_with_claude(messages, **kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(conversation_service, "chat_with_claude", failing_chat_with_claude)
+    await say(db, chat, LIMIT + 3)
+
+    messages, summary = await build_conversation(db, chat)
+
+    assert len(messages) <= LIMIT
+    assert messages[0]['role'] == 'user'
+    assert messages[-1]['content'] == f"m{LIMIT + 2}"
+    assert summary is None
+    await db.refresh(chat)
+    assert chat.summarized_through_id is None
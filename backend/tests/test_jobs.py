@@ -0,0 +1,106 @@
+"""Background jobs run on the async engine"""
+import asyncio
+
+from sqlalchemy import delete, func, select
+
+from app.core.database import AsyncSessionLocal
+from app.services import canvas_service  # noqa: F401  (registers the delete_canvas handler)
+from app.models.canvas import Canvas
+from app.models.chat import Chat, ChatMessage
+from app.models.node import Node
+from app.services.job_service import JobWorkerPool, enqueue_job, get_job
+from tests.conftest import add_nodes
+
+
+async def wait_for_job(job_id: int, timeout: float = 10) -> dict:
+    """Poll a job until it completes or fails"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        async with AsyncSessionLocal() as db:
+            job = await db.run_sync(get_job, job_id)
+        if job.status in ('complete', 'failed'):
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job {job_id} still {job.status}"
+        await asyncio.sleep(0.05)
+
+
+async def test_delete_canvas_job_deletes_everything(db, user, canvas):
+    await add_nodes(db, canvas, 7)
+    chat = Chat(canvas_id=canvas.id, name="Deal chat", chat_type="sales_assistant")
+    db.add(chat)
+    await db.commit()
+    db.add_all([ChatMessage(chat_id=chat.id, role="user", content=f"m{i}") for i in range(5)])
+    await db.commit()
+
+    job = await db.run_sync(enqueue_job, "delete_canvas", {"canvas_id": canvas.id})
+
+    workers = JobWorkerPool()
+    workers.start(1)
+    try:
+        workers.notify()
+        job = await wait_for_job(job.id)
+    finally:
+        await workers.stop()
+
+    assert job.status == 'complete', job.error
+    async with AsyncSessionLocal() as check:
+        assert await check.get(Canvas, canvas.id) is None
+        assert await check.scalar(select(func.count(Node.id)).where(Node.canvas_id == canvas.id)) == 0
+        assert await check.scalar(select(func.count(Chat.id)).where(Chat.canvas_id == canvas.id)) == 0
+    assert job.result["deleted_rows"] == 7 + 1 + 5 + 1
+
+
+async def test_scorecard_refresh_job_stores_dimensions(db, user, canvas):
+    from app.services.scorecard_service import DIMENSIONS, get_scorecard
+
+    await add_nodes(db, canvas, 3)
+    job = await db.run_sync(enqueue_job, "scorecard_refresh", {"canvas_id": canvas.id, "force": True})
+
+    workers = JobWorkerPool()
+    workers.start(1)
+    try:
+        workers.notify()
+        job = await wait_for_job(job.id)
+    finally:
+        await workers.stop()
+
+    assert job.status == 'complete', job.error
+    async with AsyncSessionLocal() as check:
+        scorecard = await check.run_sync(get_scorecard, canvas.id)
+    assert len(scorecard["dimensions"]) == len(DIMENSIONS)
+    assert all(d["status"] != 'pending' for d in scorecard["dimensions"])
+
+
+async def test_active_job_readable_by_users_it_is_returned_to(client, db, user, canvas):
+    from app.core.config import settings
+    from app.models.user import User, UserRole
+
+    other = User(email=f"other-{user.id}@example.com")
+    manager = User(email=f"manager-{user.id}@example.com", role=UserRole.SALES_MANAGER)
+    db.add_all([other, manager])
+    await db.commit()
+
+    # Another user's refresh of this user's canvas: starting one returns it
+    from app.models.job import Job
+
+    refresh = await db.run_sync(
+        enqueue_job, "scorecard_refresh", {"canvas_id": canvas.id, "force": False}, created_by_id=other.id
+    )
+    started = await client.post(f"{settings.api_prefix}/canvases/{canvas.id}/scorecard/refresh")
+    assert started.json()["id"] == refresh.id
+    assert (await client.get(f"{settings.api_prefix}/jobs/{refresh.id}")).status_code == 200
+
+    # A portfolio run is for managers only; a plain user cannot read it
+    run = await db.run_sync(enqueue_job, "portfolio_whats_next", {"provider": "bedrock"}, created_by_id=manager.id)
+    assert (await client.get(f"{settings.api_prefix}/jobs/{run.id}")).status_code == 403
+
+    # A refresh of someone else's unshared canvas stays private
+    theirs = Canvas(name="Theirs", owner_id=other.id)
+    db.add(theirs)
+    await db.commit()
+    private = await db.run_sync(enqueue_job, "scorecard_refresh", {"canvas_id": theirs.id}, created_by_id=other.id)
+    assert (await client.get(f"{settings.api_prefix}/jobs/{private.id}")).status_code == 403
+
+    # No worker runs these; leave no active jobs for later tests
+    await db.execute(delete(Job).where(Job.id.in_([refresh.id, run.id, private.id])))
+    await db.commit()
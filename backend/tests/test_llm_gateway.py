@@ -0,0 +1,35 @@
+"""LLM gateway: blocking provider calls on the dedicated executor"""
+import time
+
+import pytest
+
+from app.services import llm_gateway
+
+
+async def test_run_returns_result():
+    assert await llm_gateway.run(lambda x: x * 2, 21, timeout=5) == 42
+
+
+async def test_run_times_out_but_keeps_tracking_worker():
+    with pytest.raises(llm_gateway.LLMTimeoutError) as raised:
+        await llm_gateway.run(time.sleep, 0.3, timeout=0.05)
+
+    await raised.value.worker
+
+
+async def test_stream_yields_items_in_order():
+    items = [item async for item in llm_gateway.stream(lambda: iter(range(5)), timeout=5)]
+    assert items == [0, 1, 2, 3, 4]
+
+
+async def test_stream_factory_error_reaches_consumer():
+    def factory():
+        raise ConnectionError("upstream refused")
+
+    started = time.perf_counter()
+    with pytest.raises(ConnectionError, match="upstream refused"):
+        async for _ in llm_gateway.stream(factory, timeout=30):
+            pass
+
+    # Raised right away, not after the stall timeout
+    assert time.perf_counter() - started < 5
@@ -0,0 +1,208 @@
+"""LLM scheduler: AIMD limit, priorities, per-user fairness, throttling retries"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_scheduler as scheduler_module
+from app.services.claude_service import chat_with_claude
+from app.services.llm_gateway import LLMThrottledError
+from app.services.llm_scheduler import (
+    DECREASE_COOLDOWN_SECONDS,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    LLMScheduler,
+)
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def backoffs(monkeypatch) -> list:
+    """Jitter ranges drawn for retries; the draw is always 0 so tests don't wait"""
+    ranges = []
+
+    def uniform(low, high):
+        ranges.append((low, high))
+        return 0.0
+
+    monkeypatch.setattr(scheduler_module, "random", SimpleNamespace(uniform=uniform))
+    return ranges
+
+
+def provider(responses: list):
+    """Fake provider call: raises or returns the next scripted response"""
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    call.calls = calls
+    return call
+
+
+async def test_limit_halves_on_throttle_and_grows_back(clock, backoffs):
+    scheduler = LLMScheduler(min_limit=1, max_limit=8)
+
+    # Halved on the throttle, then +1/limit for the retry's success
+    assert await scheduler.run(provider([Throttled(), "ok"])) == "ok"
+    assert scheduler.limit == 4.0 + 1 / 4.0
+
+    # A burst of throttles within the cooldown counts as one decrease
+    limit = scheduler.limit
+    await scheduler.run(provider([Throttled(), Throttled(), "ok"]))
+    assert scheduler.limit == limit + 1 / limit
+
+    clock.now += DECREASE_COOLDOWN_SECONDS
+    limit = scheduler.limit / 2
+    await scheduler.run(provider([Throttled(), "ok"]))
+    assert scheduler.limit == limit + 1 / limit
+
+    # Additive increase: about +1 per `limit` successes, capped at the max
+    for _ in range(100):
+        await scheduler.run(provider(["ok"]))
+    assert scheduler.limit == 8.0
+
+
+async def test_limit_never_drops_below_min(clock):
+    scheduler = LLMScheduler(min_limit=2, max_limit=16)
+
+    for _ in range(5):
+        clock.now += DECREASE_COOLDOWN_SECONDS
+        scheduler.on_throttle()
+
+    assert scheduler.limit == 2.0
+    assert scheduler.stats()["throttles"] == 5
+
+
+async def test_throttled_calls_retry_with_jittered_backoff(monkeypatch, clock, backoffs):
+    monkeypatch.setattr(settings, "llm_retry_base_seconds", 0.5)
+    scheduler = LLMScheduler(min_limit=1, max_limit=4)
+    call = provider([Throttled(), Throttled(), "ok"])
+
+    assert await scheduler.run(call) == "ok"
+
+    assert len(call.calls) == 3
+    # Full jitter: uniform between 0 and a doubling ceiling
+    assert backoffs == [(0, 0.5), (0, 1.0)]
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.in_flight == 0
+
+
+async def test_throttling_past_the_retries_raises(monkeypatch, clock, backoffs):
+    monkeypatch.setattr(settings, "llm_max_retries", 2)
+    scheduler = LLMScheduler(min_limit=1, max_limit=4)
+    call = provider([Throttled() for _ in range(3)])
+
+    with pytest.raises(LLMThrottledError) as raised:
+        await scheduler.run(call)
+
+    assert len(call.calls) == 3
+    assert raised.value.retry_after >= 1
+    assert scheduler.in_flight == 0
+
+
+async def test_other_errors_are_not_retried(clock, backoffs):
+    scheduler = LLMScheduler(min_limit=1, max_limit=4)
+    call = provider([ValueError("bad request"), "ok"])
+
+    with pytest.raises(ValueError):
+        await scheduler.run(call)
+
+    assert len(call.calls) == 1
+    assert scheduler.limit == 4.0
+    assert backoffs == []
+
+
+async def run_queued(scheduler: LLMScheduler, calls: list[tuple[str, int, str]]) -> list[str]:
+    """
+    Hold the only slot, queue the calls, then release it.
+
+    Args:
+        calls: (name, priority, user key) in arrival order
+
+    Returns:
+        Names in the order they were served
+    """
+    served = []
+    release = asyncio.Event()
+
+    async def blocker():
+        await release.wait()
+
+    async def named(name):
+        served.append(name)
+
+    holder = asyncio.create_task(scheduler.run(blocker))
+    await asyncio.sleep(0)
+    tasks = []
+    for name, priority, user_key in calls:
+        tasks.append(asyncio.create_task(scheduler.run(lambda name=name: named(name), priority, user_key)))
+        await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return served
+
+
+async def test_interactive_calls_are_served_before_batch(clock):
+    scheduler = LLMScheduler(min_limit=1, max_limit=1)
+
+    served = await run_queued(scheduler, [
+        ("report 1", PRIORITY_BATCH, "reports"),
+        ("report 2", PRIORITY_BATCH, "reports"),
+        ("chat", PRIORITY_INTERACTIVE, "alice"),
+    ])
+
+    assert served == ["chat", "report 1", "report 2"]
+
+
+async def test_users_are_served_round_robin(clock):
+    scheduler = LLMScheduler(min_limit=1, max_limit=1)
+
+    served = await run_queued(scheduler, [
+        ("alice 1", PRIORITY_INTERACTIVE, "alice"),
+        ("alice 2", PRIORITY_INTERACTIVE, "alice"),
+        ("alice 3", PRIORITY_INTERACTIVE, "alice"),
+        ("bob 1", PRIORITY_INTERACTIVE, "bob"),
+        ("carol 1", PRIORITY_INTERACTIVE, "carol"),
+    ])
+
+    assert served == ["alice 1", "bob 1", "carol 1", "alice 2", "alice 3"]
+
+
+async def test_simulated_throttling_surfaces_as_throttled_error(monkeypatch, backoffs):
+    monkeypatch.setattr(settings, "llm_simulator_throttle_rate", 1.0)
+    monkeypatch.setattr(settings, "llm_max_retries", 1)
+    # The shared scheduler's limit shrinks here; restore it for later tests
+    shared = scheduler_module.llm_scheduler
+    monkeypatch.setattr(shared, "limit", shared.limit)
+    monkeypatch.setattr(shared, "_last_decrease", shared._last_decrease)
+    throttles = shared.throttles
+
+    with pytest.raises(LLMThrottledError):
+        await chat_with_claude([{'role': 'user', 'content': "Who is the champion?"}])
+
+    assert shared.throttles == throttles + 2
@@ -0,0 +1,98 @@
+"""
+/nodes latency with chat streams in flight.
+
+Model calls run on the LLM gateway's threads and chat turns release their
+database connection before calling the model, so 20 concurrent streams
+must not hold up canvas reads and writes.
+"""
+import asyncio
+import gc
+import statistics
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.llm_scheduler import llm_scheduler
+from tests.conftest import add_nodes
+
+API = settings.api_prefix
+
+STREAMS = 20
+SAMPLES = 100
+
+
+def p99(latencies: list[float]) -> float:
+    return statistics.quantiles(latencies, n=100)[98]
+
+
+async def node_latencies(client, canvas) -> list[float]:
+    """Time SAMPLES canvas node reads, one after another"""
+    latencies = []
+    for _ in range(SAMPLES):
+        started = time.perf_counter()
+        response = await client.get(f"{API}/nodes/canvas/{canvas.id}")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return latencies
+
+
+@pytest.fixture
+def frozen_heap():
+    """
+    Keep the test session's heap out of full collections while timing:
+    a single gen-2 pass over it costs 100+ ms and lands in one sample.
+    """
+    gc.collect()
+    gc.freeze()
+    yield
+    gc.unfreeze()
+
+
+async def test_nodes_p99_unchanged_with_chats_in_flight(monkeypatch, frozen_heap, client, db, canvas):
+    # Streams last ~4s each: 200 ms to the first token, then 10 tokens/s
+    monkeypatch.setattr(settings, "llm_simulator_ttft_ms", 200)
+    monkeypatch.setattr(settings, "llm_simulator_tokens_per_second", 10)
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 40)
+    await add_nodes(db, canvas, 50)
+
+    chat_ids = []
+    for i in range(STREAMS):
+        response = await client.post(
+            f"{API}/chats/",
+            json={"canvas_id": canvas.id, "name": f"Chat {i}", "chat_type": "sales_assistant"},
+        )
+        chat_ids.append(response.json()["id"])
+
+    await node_latencies(client, canvas)  # warm up
+    baseline = await node_latencies(client, canvas)
+
+    async def chat(chat_id: int) -> str:
+        # ASGITransport hands over the body once the stream ends; the server
+        # side runs the whole stream while this request is pending
+        response = await client.post(
+            f"{API}/chats/{chat_id}/messages/stream", json={"content": "Where does the deal stand?"}
+        )
+        return response.text
+
+    streams = [asyncio.create_task(chat(chat_id)) for chat_id in chat_ids]
+    # Measure once every turn is past its database work and streaming
+    deadline = time.monotonic() + 30
+    while llm_scheduler.in_flight < STREAMS:
+        assert time.monotonic() < deadline, f"only {llm_scheduler.in_flight} streams started"
+        await asyncio.sleep(0.01)
+
+    loaded = await node_latencies(client, canvas)
+    in_flight = sum(not stream.done() for stream in streams)
+    bodies = await asyncio.gather(*streams)
+
+    assert in_flight == STREAMS, "streams finished before the measurement"
+    assert all("event: done" in body for body in bodies)
+
+    print(
+        f"\n/nodes p99: {p99(baseline) * 1000:.1f} ms idle, "
+        f"{p99(loaded) * 1000:.1f} ms with {STREAMS} chats in flight"
+    )
+    # Generous bound for shared CI machines; a blocked loop or exhausted
+    # connection pool shows up as seconds, not milliseconds
+    assert p99(loaded) <= max(3 * p99(baseline), p99(baseline) + 0.05)
@@ -0,0 +1,113 @@
+"""Portfolio runs: batched planning, per-canvas results, provider-aware skipping"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.services.job_service import JobWorkerPool, get_job
+from app.services.portfolio_service import get_portfolio_results, plan_portfolio_run, start_portfolio_run
+from tests.conftest import add_nodes
+
+
+@pytest.fixture
+async def portfolio(db, user):
+    """Five open canvases, planned two at a time"""
+    canvases = [Canvas(name=f"Deal {i}", owner_id=user.id) for i in range(5)]
+    db.add_all(canvases)
+    await db.commit()
+    for canvas in canvases:
+        await add_nodes(db, canvas, 2)
+    return canvases
+
+
+@pytest.fixture(autouse=True)
+def small_plan_batches(monkeypatch):
+    monkeypatch.setattr(settings, "portfolio_plan_batch_size", 2)
+
+
+async def run_to_completion(provider: str) -> dict:
+    async with AsyncSessionLocal() as db:
+        job = await db.run_sync(start_portfolio_run, provider=provider)
+
+    workers = JobWorkerPool()
+    workers.start(1)
+    try:
+        workers.notify()
+        for _ in range(200):
+            async with AsyncSessionLocal() as db:
+                job = await db.run_sync(get_job, job.id)
+            if job.status in ('complete', 'failed'):
+                return job
+            await asyncio.sleep(0.05)
+    finally:
+        await workers.stop()
+    raise AssertionError(f"portfolio run still {job.status}")
+
+
+async def planned(provider: str) -> tuple[set, int]:
+    canvas_ids, skipped = set(), 0
+    async for jobs, batch_skipped in plan_portfolio_run(provider):
+        canvas_ids.update(job.canvas_id for job in jobs)
+        skipped += batch_skipped
+    return canvas_ids, skipped
+
+
+async def test_fake_provider_needs_debug(db):
+    with pytest.raises(ValueError, match="debug"):
+        await db.run_sync(start_portfolio_run, provider='fake')
+
+
+async def test_fake_run_stores_each_canvas_and_does_not_satisfy_real_runs(monkeypatch, portfolio):
+    monkeypatch.setattr(settings, "debug", True)
+    ids = {canvas.id for canvas in portfolio}
+
+    job = await run_to_completion('fake')
+    assert job.status == 'complete', job.error
+    assert job.progress["completed"] >= len(ids)
+
+    async with AsyncSessionLocal() as db:
+        results = await db.run_sync(get_portfolio_results)
+    stored = {r["canvas_id"]: r for r in results if r["canvas_id"] in ids}
+    assert set(stored) == ids
+    assert {r["model"] for r in stored.values()} == {"fake"}
+
+    # Unchanged canvases are skipped by the next fake run, but a real run re-analyzes them
+    fake_ids, _ = await planned('fake')
+    assert not fake_ids & ids
+    real_ids, _ = await planned('bedrock')
+    assert ids <= real_ids
+
+
+async def test_online_run_stores_every_canvas(portfolio):
+    ids = {canvas.id for canvas in portfolio}
+
+    job = await run_to_completion('bedrock')
+    assert job.status == 'complete', job.error
+
+    async with AsyncSessionLocal() as db:
+        results = await db.run_sync(get_portfolio_results)
+    stored = {r["canvas_id"]: r for r in results if r["canvas_id"] in ids}
+    assert set(stored) == ids
+    assert all(r["status"] == 'complete' and r["content"] for r in stored.values())
+
+    planned_ids, _ = await planned('bedrock')
+    assert not planned_ids & ids
+
+
+async def test_results_are_keyed_by_the_serving_provider(monkeypatch, portfolio):
+    from app.services.portfolio_service import portfolio_context_hash
+
+    job = await run_to_completion('bedrock')
+    assert job.status == 'complete', job.error
+    ids = {canvas.id for canvas in portfolio}
+
+    # Online results came from the simulator, so batch (Bedrock) runs redo them
+    assert portfolio_context_hash("context", 'bedrock') != portfolio_context_hash("context", 'bedrock_batch')
+    planned_ids, _ = await planned('bedrock_batch')
+    assert ids <= planned_ids
+
+    # Once online calls go to Bedrock too, either provider's results satisfy the other
+    monkeypatch.setattr(settings, "llm_provider", "bedrock")
+    assert portfolio_context_hash("context", 'bedrock') == portfolio_context_hash("context", 'bedrock_batch')
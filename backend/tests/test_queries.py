@@ -0,0 +1,167 @@
+"""
+Context and listing queries, through the API and services.
+
+Run against SQLite by default and against PostgreSQL with TEST_DATABASE_URL
+(see conftest); both must return the same results.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event, select
+
+from app.core.config import settings
+from app.core.database import async_engine, async_read_engine
+from app.models.canvas import Canvas, CanvasShare
+from app.models.node import Node
+from app.models.user import User, UserRole
+from app.services.canvas_service import list_accessible_canvases
+from app.services.context_service import build_canvas_outline, should_use_retrieval
+from app.models.chat import Chat
+
+API = settings.api_prefix
+
+
+@contextmanager
+def count_statements():
+    """Count the statements sent to the async engines (writer and read pool)"""
+    statements = []
+    engines = [e.sync_engine for e in (async_engine, async_read_engine) if e is not None]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def create_node(client, canvas, title: str, notes: str) -> dict:
+    response = await client.post(
+        f"{API}/nodes/",
+        json={
+            "canvas_id": canvas.id,
+            "node_type": "generic",
+            "title": title,
+            "position_x": 0,
+            "position_y": 0,
+            "data": {"notes": notes},
+        },
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_excluded_nodes_leave_context_queries(monkeypatch, client, db, canvas):
+    kept = await create_node(client, canvas, "Champion", "Dana backs the deal " * 50)
+    excluded = await create_node(client, canvas, "Scratch", "private notes " * 500)
+    assert kept["exclude_from_context"] is False
+
+    response = await client.put(f"{API}/nodes/{excluded['id']}", json={"exclude_from_context": True})
+    assert response.status_code == 200, response.text
+    assert response.json()["exclude_from_context"] is True
+
+    chat = Chat(canvas_id=canvas.id, name="Deal chat", chat_type="sales_assistant")
+    db.add(chat)
+    await db.commit()
+
+    outline = await db.run_sync(build_canvas_outline, canvas)
+    assert "Champion" in outline
+    assert "Scratch" not in outline
+
+    # Only the kept node's size counts toward the retrieval threshold
+    kept_tokens = kept["content_size"] // 4
+    monkeypatch.setattr(settings, "context_retrieval_min_tokens", kept_tokens - 1)
+    assert await db.run_sync(should_use_retrieval, chat, canvas) is True
+    monkeypatch.setattr(settings, "context_retrieval_min_tokens", kept_tokens + 1)
+    assert await db.run_sync(should_use_retrieval, chat, canvas) is False
+
+    stored = await db.scalar(select(Node.exclude_from_context).where(Node.id == excluded["id"]))
+    assert stored == 1
+
+
+async def test_canvas_listing(db, user):
+    owner = User(email=f"owner-{user.id}@example.com")
+    manager = User(email=f"manager-{user.id}@example.com", role=UserRole.SALES_MANAGER)
+    db.add_all([owner, manager])
+    await db.commit()
+
+    mine = Canvas(name="Mine", owner_id=user.id)
+    shared_read = Canvas(name="Shared read", owner_id=owner.id)
+    shared_write = Canvas(name="Shared write", owner_id=owner.id)
+    hidden = Canvas(name="Hidden", owner_id=owner.id)
+    archived = Canvas(name="Archived", owner_id=user.id, is_archived=True)
+    db.add_all([mine, shared_read, shared_write, hidden, archived])
+    await db.commit()
+    db.add_all([
+        CanvasShare(canvas_id=shared_read.id, user_id=user.id, can_write=False),
+        CanvasShare(canvas_id=shared_write.id, user_id=user.id, can_write=True),
+        CanvasShare(canvas_id=shared_write.id, user_id=manager.id, can_write=True),
+        Node(canvas_id=mine.id, node_type="generic", title="A", data={}),
+        Node(canvas_id=mine.id, node_type="generic", title="B", data={}),
+    ])
+    await db.commit()
+
+    listed = {
+        canvas.name: (owner_email, node_count, can_write)
+        for canvas, owner_email, node_count, can_write in await list_accessible_canvases(db, user)
+    }
+    assert listed == {
+        "Mine": (user.email, 2, True),
+        "Shared read": (owner.email, 0, False),
+        "Shared write": (owner.email, 0, True),
+    }
+
+    with_archived = await list_accessible_canvases(db, user, include_archived=True)
+    assert "Archived" in {canvas.name for canvas, *_ in with_archived}
+
+    # Managers see every canvas; they can write their own and write-shared ones
+    managed = {
+        canvas.name: can_write
+        for canvas, _, _, can_write in await list_accessible_canvases(db, manager)
+        if canvas.owner_id in (user.id, owner.id)
+    }
+    assert managed == {"Mine": False, "Shared read": False, "Shared write": True, "Hidden": False}
+
+
+async def test_canvas_listing_statement_count_does_not_grow(client, db, user):
+    owner = User(email=f"owner-{user.id}@example.com")
+    manager = User(email=f"manager-{user.id}@example.com", role=UserRole.SALES_MANAGER)
+    db.add_all([owner, manager])
+    await db.commit()
+
+    async def add_canvases(count: int) -> None:
+        for i in range(count):
+            mine = Canvas(name=f"Mine {i}", owner_id=user.id)
+            shared = Canvas(name=f"Shared {i}", owner_id=owner.id)
+            db.add_all([mine, shared])
+            await db.commit()
+            db.add_all([
+                CanvasShare(canvas_id=shared.id, user_id=user.id, can_write=i % 2 == 0),
+                Node(canvas_id=mine.id, node_type="generic", title="A", data={}),
+                Node(canvas_id=shared.id, node_type="generic", title="B", data={}),
+            ])
+            await db.commit()
+
+    async def statements_per_listing() -> tuple[int, int, int, int]:
+        with count_statements() as service:
+            listed = await list_accessible_canvases(db, user)
+        with count_statements() as managed:
+            await list_accessible_canvases(db, manager)
+        with count_statements() as api:
+            response = await client.get(f"{API}/canvases/")
+        assert response.status_code == 200
+        assert len(response.json()) == len(listed)
+        return len(listed), len(service), len(managed), len(api)
+
+    await add_canvases(1)
+    listed, *one = await statements_per_listing()
+    assert listed == 2
+    assert one[:2] == [1, 1]
+
+    await add_canvases(24)
+    listed, *many = await statements_per_listing()
+    assert listed == 50
+    assert many == one
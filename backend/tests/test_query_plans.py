@@ -0,0 +1,62 @@
+"""
+Hot queries must be served by indexes.
+
+Runs the plan for the lookups made on almost every request and fails if
+any of them scans a whole table or sorts without an index. On PostgreSQL
+the planner prefers sequential scans on tiny tables, so scans and sorts
+are disabled first: it only picks one when no index can serve the query.
+"""
+from typing import List, Tuple
+
+import pytest
+
+from app.core.database import engine
+
+# (description, SQL) for the per-request lookups in the services and routers
+HOT_QUERIES: List[Tuple[str, str]] = [
+    ("canvas nodes", "SELECT * FROM nodes WHERE canvas_id = 1"),
+    ("owned canvases", "SELECT * FROM canvases WHERE owner_id = 1 AND is_archived = false"),
+    (
+        "shared canvases",
+        "SELECT canvases.* FROM canvases JOIN canvas_shares ON canvases.id = canvas_shares.canvas_id "
+        "WHERE canvas_shares.user_id = 1 AND canvases.is_archived = false",
+    ),
+    ("share check", "SELECT id FROM canvas_shares WHERE canvas_id = 1 AND user_id = 1 LIMIT 1"),
+    ("canvas shares", "SELECT * FROM canvas_shares WHERE canvas_id = 1"),
+    ("deal chats", "SELECT * FROM chats WHERE canvas_id = 1 AND node_id IS NULL"),
+    ("node chats", "SELECT * FROM chats WHERE node_id = 1"),
+    (
+        "chat history",
+        "SELECT * FROM chat_messages WHERE chat_id = 1 AND id > 0 ORDER BY created_at, id",
+    ),
+    ("user by email", "SELECT * FROM users WHERE email = 'a@example.com'"),
+]
+
+
+def bad_steps(plan: List[str]) -> List[str]:
+    """Plan steps that read a whole table or sort without an index"""
+    if engine.dialect.name == "postgresql":
+        # An Incremental Sort is fine: the index supplies the leading sort key
+        # and only rows that tie on it are sorted (SQLite indexes carry the
+        # rowid, so there it needs no sort at all)
+        return [step for step in plan if "Seq Scan" in step or step.lstrip(" ->").startswith("Sort  (")]
+    return [step for step in plan if step.startswith("SCAN ") or "TEMP B-TREE" in step]
+
+
+def query_plan(conn, sql: str) -> List[str]:
+    """Plan steps for a query, one per line"""
+    if engine.dialect.name == "postgresql":
+        return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+@pytest.mark.parametrize("name, sql", HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+def test_hot_query_uses_index(name, sql):
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            conn.exec_driver_sql("SET enable_sort = off")
+        plan = query_plan(conn, sql)
+        conn.rollback()
+
+    assert not bad_steps(plan), f"{name} is not served by an index:\n" + "\n".join(plan)
@@ -0,0 +1,119 @@
+"""Per-user token buckets: 429 with Retry-After, caller keys, refill"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import RateLimitMiddleware
+from app.services.jwt_service import create_access_token
+
+API = settings.api_prefix
+CRUD_LIMIT = 3  # per minute: one token every 20 s
+LLM_LIMIT = 2  # per minute: one token every 30 s
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def limited_app(monkeypatch, clock):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_redis_url", None)
+    monkeypatch.setattr(settings, "api_rate_limit", CRUD_LIMIT)
+    monkeypatch.setattr(settings, "llm_rate_limit", LLM_LIMIT)
+
+    async def ok(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return RateLimitMiddleware(ok)
+
+
+def make_client(app, user_id: int | None = None, ip: str = "10.0.0.1") -> httpx.AsyncClient:
+    headers = {}
+    if user_id is not None:
+        headers["Authorization"] = f"Bearer {create_access_token({'sub': str(user_id)})}"
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=(ip, 1234)),
+        base_url="http://test",
+        headers=headers,
+    )
+
+
+async def statuses(client, count: int, method: str = "GET", path: str = "/canvases/") -> list[int]:
+    return [(await client.request(method, f"{API}{path}")).status_code for _ in range(count)]
+
+
+async def test_over_limit_gets_429_with_retry_after(limited_app, clock):
+    async with make_client(limited_app, user_id=1) as client:
+        assert await statuses(client, CRUD_LIMIT) == [200] * CRUD_LIMIT
+
+        response = await client.get(f"{API}/canvases/")
+        assert response.status_code == 429
+        assert response.json() == {"detail": "Rate limit exceeded"}
+        assert response.headers["retry-after"] == "20"
+        assert response.headers["x-ratelimit-limit"] == str(CRUD_LIMIT)
+
+        # Half a token has refilled: the wait shrinks accordingly
+        clock.now += 10
+        response = await client.get(f"{API}/canvases/")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "10"
+
+
+async def test_buckets_refill_over_time(limited_app, clock):
+    async with make_client(limited_app, user_id=1) as client:
+        assert await statuses(client, CRUD_LIMIT + 1) == [200] * CRUD_LIMIT + [429]
+
+        clock.now += 20
+        assert await statuses(client, 2) == [200, 429]
+
+        # Refill is capped at the bucket size
+        clock.now += 3600
+        assert await statuses(client, CRUD_LIMIT + 1) == [200] * CRUD_LIMIT + [429]
+
+
+async def test_authenticated_callers_are_keyed_by_user(limited_app, clock):
+    async with make_client(limited_app, user_id=1, ip="10.0.0.1") as first, \
+            make_client(limited_app, user_id=1, ip="10.0.0.2") as same_user, \
+            make_client(limited_app, user_id=2, ip="10.0.0.1") as other_user:
+        assert await statuses(first, CRUD_LIMIT) == [200] * CRUD_LIMIT
+
+        # Another IP does not reset the user's bucket; another user on the same IP has their own
+        assert await statuses(same_user, 1) == [429]
+        assert await statuses(other_user, CRUD_LIMIT) == [200] * CRUD_LIMIT
+
+
+async def test_anonymous_callers_are_keyed_by_ip(limited_app, clock):
+    async with make_client(limited_app, ip="10.0.0.1") as first, \
+            make_client(limited_app, ip="10.0.0.2") as second, \
+            make_client(limited_app, user_id=1, ip="10.0.0.1") as signed_in:
+        assert await statuses(first, CRUD_LIMIT + 1) == [200] * CRUD_LIMIT + [429]
+
+        assert await statuses(second, 1) == [200]
+        assert await statuses(signed_in, 1) == [200]
+
+
+async def test_llm_routes_have_their_own_bucket(limited_app, clock):
+    async with make_client(limited_app, user_id=1) as client:
+        assert await statuses(client, LLM_LIMIT + 1, "POST", "/chats/7/messages/stream") == [200] * LLM_LIMIT + [429]
+        response = await client.post(f"{API}/chats/7/messages")
+        assert response.headers["retry-after"] == "30"
+
+        # CRUD requests are unaffected, and the health check is never limited
+        assert await statuses(client, CRUD_LIMIT) == [200] * CRUD_LIMIT
+        assert await statuses(client, 5, path="/health") == [200] * 5
@@ -0,0 +1,147 @@
+"""
+SQLite read pool: routed reads return the same results as the single
+writer connection they replaced, and the benchmark's two setups agree.
+"""
+import importlib.util
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    async_read_engine,
+    engine,
+    read_engine,
+)
+from app.models.canvas import Canvas, CanvasShare
+from app.models.node import Node
+from app.models.user import User
+from app.services.canvas_service import list_accessible_canvases
+from app.services.node_service import get_canvas_nodes_sync
+from tests.conftest import add_nodes
+
+requires_read_pool = pytest.mark.skipif(read_engine is None, reason="read pool is only used for file SQLite")
+
+
+def load_bench():
+    path = Path(__file__).resolve().parent.parent / "scripts" / "bench_sqlite_reads.py"
+    spec = importlib.util.spec_from_file_location("bench_sqlite_reads", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_benchmark_setups_return_the_same_rows(tmp_path):
+    bench = load_bench()
+    legacy_path, wal_path = os.fspath(tmp_path / "legacy.db"), os.fspath(tmp_path / "wal.db")
+    bench.build_database(legacy_path, 200, wal=False)
+    bench.build_database(wal_path, 200, wal=True)
+
+    legacy = sqlite3.connect(legacy_path)
+    bench.apply_pragmas(legacy, wal=False)
+    reader = sqlite3.connect(wal_path)
+    bench.apply_pragmas(reader, wal=True, read_only=True)
+    try:
+        for owner_id in range(50):
+            rows = legacy.execute(bench.QUERY, (owner_id,)).fetchall()
+            assert rows
+            assert reader.execute(bench.QUERY, (owner_id,)).fetchall() == rows
+    finally:
+        legacy.close()
+        reader.close()
+
+
+@contextmanager
+def statements_on(target_engine):
+    """Collect the statements run on an engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(target_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(target_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+async def shared_deal(db, user, canvas):
+    """Canvases owned by and shared with user, with nodes"""
+    other = User(email=f"other-{user.id}@example.com")
+    db.add(other)
+    await db.commit()
+    shared = Canvas(name="Globex pilot", owner_id=other.id)
+    archived = Canvas(name="Old deal", owner_id=user.id, is_archived=True)
+    db.add_all([shared, archived])
+    await db.commit()
+    db.add(CanvasShare(canvas_id=shared.id, user_id=user.id, can_write=False))
+    await db.commit()
+    await add_nodes(db, canvas, 5)
+    await add_nodes(db, shared, 3)
+    return canvas, shared
+
+
+@requires_read_pool
+async def test_routed_async_reads_match_the_writer(user, shared_deal):
+    def listing(rows):
+        return [(canvas.id, canvas.name, email, count, can_write) for canvas, email, count, can_write in rows]
+
+    with statements_on(async_read_engine.sync_engine) as reads:
+        async with AsyncSession(async_engine) as writer_only:
+            expected = listing(await list_accessible_canvases(writer_only, user, include_archived=True))
+        assert len(expected) == 3
+        assert not reads
+
+        async with AsyncSessionLocal() as routed:
+            assert listing(await list_accessible_canvases(routed, user, include_archived=True)) == expected
+        assert reads
+
+
+@requires_read_pool
+async def test_routed_sync_reads_match_the_writer(shared_deal):
+    canvas, _ = shared_deal
+
+    def nodes(session):
+        return [(n.id, n.title, n.data) for n in get_canvas_nodes_sync(session, session.get(Canvas, canvas.id))]
+
+    with statements_on(read_engine) as reads:
+        with Session(engine) as writer_only:
+            expected = nodes(writer_only)
+        assert len(expected) == 5
+        assert not reads
+
+        with SessionLocal() as routed:
+            assert nodes(routed) == expected
+        assert reads
+
+
+@requires_read_pool
+async def test_routed_transaction_reads_its_own_writes(canvas):
+    def node_count(session):
+        return session.scalar(select(func.count(Node.id)).where(Node.canvas_id == canvas.id))
+
+    with SessionLocal() as routed:
+        assert node_count(routed) == 0
+
+        routed.add(Node(canvas_id=canvas.id, node_type="generic", title="Draft", data={}, exclude_from_context=0))
+        routed.flush()
+        # Uncommitted: the writing transaction reads it on the writer, as before
+        with statements_on(read_engine) as reads:
+            assert node_count(routed) == 1
+        assert not reads
+        routed.commit()
+
+        # Committed: the next transaction reads it back from the read pool
+        with statements_on(read_engine) as reads:
+            assert node_count(routed) == 1
+        assert reads
@@ -0,0 +1,177 @@
+"""Scorecard refresh: per-dimension invalidation, failures, summaries, forcing"""
+import json
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.models.job import Job
+from app.models.node import Node, NodeSummary
+from app.services import scorecard_service
+from app.services.job_service import JobContext
+from app.services.scorecard_service import get_scorecard, refresh_scorecard, start_scorecard_refresh
+from app.services.summarization_service import compute_content_hash
+
+API = settings.api_prefix
+
+
+@pytest.fixture
+def assessed(monkeypatch) -> dict:
+    """
+    Fake model for scorecard assessments: records the dimensions assessed
+    (name -> system prompt) and fails those listed in assessed["fail"].
+    """
+    calls = {"fail": set(), "prompts": {}}
+
+    async def fake_chat_with_claude(messages, system_prompt, **kwargs):
+        name = messages[0]['content'].split("\n")[0].removeprefix("Dimension: ")
+        calls["prompts"][name] = "".join(block['text'] for block in system_prompt)
+        if name in calls["fail"]:
+            raise RuntimeError("model unavailable")
+        return {
+            'content': json.dumps({"score": 2, "summary": f"{name} looks fine", "gaps": []}),
+            'usage': {'input_tokens': 10, 'output_tokens': 5},
+            'model': "fake",
+        }
+
+    monkeypatch.setattr(scorecard_service, "chat_with_claude", fake_chat_with_claude)
+    return calls
+
+
+async def refresh(canvas, assessed: dict, force: bool = False) -> set[str]:
+    """Run a refresh and return the dimensions it assessed with a model call"""
+    assessed["prompts"].clear()
+    payload = {"canvas_id": canvas.id, "force": force}
+    result = await refresh_scorecard(JobContext(Job(job_type="scorecard_refresh", payload=payload, attempts=1)), payload)
+    return set(result["assessed"])
+
+
+async def create_node(client, canvas, node_type: str, title: str, notes: str) -> int:
+    response = await client.post(f"{API}/nodes/", json={
+        "canvas_id": canvas.id, "node_type": node_type, "title": title,
+        "position_x": 0, "position_y": 0, "data": {"notes": notes},
+    })
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture
+async def deal(client, canvas) -> dict:
+    """A person, a competitor and a meeting"""
+    return {
+        "person": await create_node(client, canvas, "person", "Dana Reyes", "Head of IT"),
+        "competitor": await create_node(client, canvas, "competitor", "Varonis", "Incumbent DLP vendor"),
+        "meeting": await create_node(client, canvas, "meeting", "Discovery call", "Walked through the audit findings"),
+    }
+
+
+async def scorecard(db, canvas) -> dict:
+    return {d["key"]: d for d in (await db.run_sync(get_scorecard, canvas.id))["dimensions"]}
+
+
+async def test_editing_a_node_reassesses_only_its_dimensions(assessed, client, db, canvas, deal):
+    assert await refresh(canvas, assessed) == set(scorecard_service.DIMENSIONS_BY_KEY)
+    # Paper Process has no relevant nodes: scored 0 without a model call
+    assert set(assessed["prompts"]) == {d.name for d in scorecard_service.DIMENSIONS} - {"Paper Process"}
+
+    assert await refresh(canvas, assessed) == set()
+    assert assessed["prompts"] == {}
+
+    await client.put(f"{API}/nodes/{deal['competitor']}", json={"data": {"notes": "Incumbent DLP, renewal in Q3"}})
+    assert await refresh(canvas, assessed) == {"decision_criteria", "competition"}
+    assert set(assessed["prompts"]) == {"Decision Criteria", "Competition"}
+
+    await client.put(f"{API}/nodes/{deal['person']}", json={"data": {"notes": "Head of IT, our champion"}})
+    assert await refresh(canvas, assessed) == {"economic_buyer", "champion"}
+
+    # Mentioning a keyword makes a node relevant to another dimension
+    await client.put(f"{API}/nodes/{deal['meeting']}", json={"data": {"notes": "Legal wants the MSA redlines"}})
+    assert await refresh(canvas, assessed) == {"metrics", "decision_process", "identify_pain", "paper_process"}
+
+    # Moving a node does not change what any dimension depends on
+    await client.put(f"{API}/nodes/{deal['meeting']}", json={"position_x": 500, "position_y": 80})
+    assert await refresh(canvas, assessed) == set()
+
+    # Forcing re-assesses everything
+    assert await refresh(canvas, assessed, force=True) == set(scorecard_service.DIMENSIONS_BY_KEY)
+
+
+async def test_failed_assessment_keeps_last_good_score(assessed, client, db, canvas, deal):
+    await refresh(canvas, assessed)
+    before = (await scorecard(db, canvas))["competition"]
+    assert (before["status"], before["score"]) == ("complete", 2)
+
+    assessed["fail"] = {"Competition"}
+    await client.put(f"{API}/nodes/{deal['competitor']}", json={"data": {"notes": "Incumbent DLP, renewal in Q3"}})
+    await refresh(canvas, assessed)
+
+    failed = (await scorecard(db, canvas))["competition"]
+    assert failed["status"] == "failed"
+    assert "model unavailable" in failed["error"]
+    assert (failed["score"], failed["summary"], failed["evidence_node_ids"]) == (
+        before["score"], before["summary"], before["evidence_node_ids"],
+    )
+    assert failed["assessed_at"] == before["assessed_at"]
+
+    # Retried on the next refresh; success clears the error
+    assessed["fail"] = set()
+    assert await refresh(canvas, assessed) == {"competition"}
+    recovered = (await scorecard(db, canvas))["competition"]
+    assert (recovered["status"], recovered["error"]) == ("complete", None)
+
+
+async def test_first_assessment_failing_has_no_score(assessed, db, canvas, deal):
+    assessed["fail"] = {"Champion"}
+    await refresh(canvas, assessed)
+
+    champion = (await scorecard(db, canvas))["champion"]
+    assert (champion["status"], champion["score"]) == ("failed", None)
+    assert "model unavailable" in champion["error"]
+
+
+async def test_stored_summary_reassesses_dependent_dimensions(assessed, db, canvas):
+    notes = "Walked through the audit findings. " + "x" * settings.node_summary_threshold_chars
+    data = {"notes": notes}
+    content_hash = compute_content_hash("Discovery call", "meeting", data)
+    db.add(Node(
+        canvas_id=canvas.id, node_type="meeting", title="Discovery call", data=data,
+        content_size=len(notes), content_hash=content_hash, exclude_from_context=0,
+    ))
+    await db.commit()
+
+    await refresh(canvas, assessed)
+    assert "xxxxxxxx" in assessed["prompts"]["Metrics"]
+
+    # Same content, but its summary is now available: the meeting's dimensions are stale
+    db.add(NodeSummary(content_hash=content_hash, summary="Audit found exposed PII", source_size=len(notes)))
+    await db.commit()
+
+    assert await refresh(canvas, assessed) == {"metrics", "decision_process", "identify_pain"}
+    assert "Audit found exposed PII" in assessed["prompts"]["Metrics"]
+    assert "xxxxxxxx" not in assessed["prompts"]["Metrics"]
+
+
+async def test_force_applies_to_an_active_refresh(db, user, canvas):
+    try:
+        queued = await db.run_sync(start_scorecard_refresh, canvas.id, created_by_id=user.id)
+        assert queued.payload == {"canvas_id": canvas.id, "force": False}
+
+        # Not started yet: upgraded in place
+        forced = await db.run_sync(start_scorecard_refresh, canvas.id, force=True)
+        assert forced.id == queued.id
+        assert forced.payload["force"] is True
+
+        # Already running: a forced refresh is queued to follow it, once
+        await db.execute(update(Job).where(Job.id == queued.id).values(payload={"canvas_id": canvas.id, "force": False}, status='running'))
+        await db.commit()
+
+        follow_up = await db.run_sync(start_scorecard_refresh, canvas.id, force=True)
+        assert follow_up.id != queued.id
+        assert (follow_up.status, follow_up.payload["force"]) == ('queued', True)
+        assert (await db.run_sync(start_scorecard_refresh, canvas.id, force=True)).id == follow_up.id
+
+        # An unforced request just gets the running refresh back
+        assert (await db.run_sync(start_scorecard_refresh, canvas.id)).id == queued.id
+    finally:
+        await db.execute(delete(Job).where(Job.job_type == "scorecard_refresh"))
+        await db.commit()
@@ -0,0 +1,42 @@
+"""
+Canvas sharing.
+"""
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.canvas import CanvasShare
+from app.models.user import User
+from app.services import canvas_service
+
+
+async def test_concurrent_share_updates_existing(monkeypatch, db, canvas):
+    recipient = User(email=f"recipient-{canvas.id}@example.com")
+    db.add(recipient)
+    await db.commit()
+
+    get_canvas_share = canvas_service.get_canvas_share
+
+    async def shared_meanwhile(session, canvas_id, user_id):
+        # Another request shares the canvas between our check and our insert
+        monkeypatch.setattr(canvas_service, "get_canvas_share", get_canvas_share)
+        async with AsyncSessionLocal() as other:
+            other.add(CanvasShare(canvas_id=canvas_id, user_id=user_id, can_write=False))
+            await other.commit()
+        return None
+
+    monkeypatch.setattr(canvas_service, "get_canvas_share", shared_meanwhile)
+
+    share = await canvas_service.share_canvas(db, canvas, recipient, can_write=True)
+
+    assert share.can_write is True
+    # The caller's objects are usable after the rolled-back insert
+    assert canvas.name == "Acme renewal"
+    assert recipient.email.startswith("recipient-")
+
+    count = await db.scalar(
+        select(func.count()).select_from(CanvasShare).where(
+            CanvasShare.canvas_id == canvas.id,
+            CanvasShare.user_id == recipient.id,
+        )
+    )
+    assert count == 1
@@ -0,0 +1,115 @@
+"""Simulated provider: deterministic replies, stream events, usage, injected errors"""
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.llm_providers.simulated import SIMULATED_MODEL, SimulatedError, SimulatedProvider
+from app.services.llm_scheduler import is_throttling_error
+
+
+def request(content: str = "Who is the champion?", max_tokens: int = 4096) -> dict:
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": content}],
+    }
+
+
+def test_replies_depend_only_on_the_request():
+    first, second = SimulatedProvider(), SimulatedProvider()
+
+    reply = first.invoke(request())
+    assert second.invoke(request()) == reply
+    assert first.invoke(request()) == reply
+    assert first.invoke(request("Who signs?"))["content"] != reply["content"]
+
+
+def test_usage_reflects_request_and_reply(monkeypatch):
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 30)
+    provider = SimulatedProvider()
+
+    reply = provider.invoke(request())
+    assert reply["model"] == SIMULATED_MODEL
+    assert reply["stop_reason"] == "end_turn"
+    assert reply["usage"]["output_tokens"] == len(reply["content"][0]["text"].split()) == 30
+
+    longer = provider.invoke(request("Who is the champion? " * 20))
+    assert longer["usage"]["input_tokens"] > reply["usage"]["input_tokens"]
+
+    # Reply length is capped by max_tokens
+    assert provider.invoke(request(max_tokens=5))["usage"]["output_tokens"] == 5
+
+
+def test_stream_matches_invoke(monkeypatch):
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 30)
+    provider = SimulatedProvider()
+    reply = provider.invoke(request())
+
+    events = list(provider.iter_stream(request()))
+
+    # Input usage first (billed even if the stream is cut off), then text, then done
+    assert events[0] == {
+        "type": "usage",
+        "usage": {"input_tokens": reply["usage"]["input_tokens"], "output_tokens": 0},
+        "model": SIMULATED_MODEL,
+    }
+    assert {e["type"] for e in events[1:-1]} == {"text"}
+    assert "".join(e["text"] for e in events[1:-1]) == reply["content"][0]["text"]
+    assert events[-1] == {
+        "type": "done",
+        "usage": reply["usage"],
+        "stop_reason": "end_turn",
+        "model": SIMULATED_MODEL,
+    }
+
+
+def test_latency_follows_settings(monkeypatch):
+    monkeypatch.setattr(settings, "llm_simulator_ttft_ms", 50)
+    monkeypatch.setattr(settings, "llm_simulator_tokens_per_second", 1000)
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 50)
+    provider = SimulatedProvider()
+
+    started = time.perf_counter()
+    events = provider.iter_stream(request())
+    next(events)
+    assert time.perf_counter() - started >= 0.05
+
+    started = time.perf_counter()
+    provider.invoke(request())
+    assert time.perf_counter() - started >= 0.05 + 50 / 1000
+
+
+@pytest.mark.parametrize("setting, status_code, throttling", [
+    ("llm_simulator_throttle_rate", 429, True),
+    ("llm_simulator_error_rate", 500, False),
+])
+def test_injected_errors(monkeypatch, setting, status_code, throttling):
+    monkeypatch.setattr(settings, setting, 1.0)
+    provider = SimulatedProvider()
+
+    with pytest.raises(SimulatedError) as raised:
+        provider.invoke(request())
+    assert raised.value.status_code == status_code
+    assert is_throttling_error(raised.value) is throttling
+
+    with pytest.raises(SimulatedError):
+        list(provider.iter_stream(request()))
+
+
+def test_injected_errors_follow_the_seed(monkeypatch):
+    monkeypatch.setattr(settings, "llm_simulator_throttle_rate", 0.5)
+
+    def outcomes(provider: SimulatedProvider) -> list[bool]:
+        results = []
+        for _ in range(20):
+            try:
+                provider.invoke(request(max_tokens=1))
+                results.append(True)
+            except SimulatedError:
+                results.append(False)
+        return results
+
+    first = outcomes(SimulatedProvider())
+    assert outcomes(SimulatedProvider()) == first
+    assert True in first and False in first
@@ -0,0 +1,106 @@
+"""Single-flight: identical concurrent model calls share one upstream call"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.claude_service import chat_with_claude
+from app.services.llm_providers import get_provider
+from app.services.single_flight import SingleFlight
+
+
+@pytest.fixture
+def upstream(monkeypatch) -> list:
+    """Request bodies the provider received; each call takes 50 ms"""
+    provider = get_provider()
+    invoke = provider.invoke
+    calls = []
+
+    def counting_invoke(request_body):
+        calls.append(request_body)
+        time.sleep(0.05)
+        return invoke(request_body)
+
+    monkeypatch.setattr(provider, "invoke", counting_invoke)
+    return calls
+
+
+async def test_identical_concurrent_calls_make_one_provider_call(upstream):
+    messages = [{'role': 'user', 'content': "Who is the champion?"}]
+
+    results = await asyncio.gather(*(chat_with_claude(messages) for _ in range(10)))
+
+    assert len(upstream) == 1
+    assert all(result == results[0] for result in results)
+
+
+async def test_different_requests_are_not_coalesced(upstream):
+    await asyncio.gather(
+        chat_with_claude([{'role': 'user', 'content': "Who is the champion?"}]),
+        chat_with_claude([{'role': 'user', 'content': "Who signs?"}]),
+        chat_with_claude([{'role': 'user', 'content': "Who signs?"}], temperature=0.0),
+    )
+    assert len(upstream) == 3
+
+
+async def test_key_is_released_once_the_call_finishes(upstream):
+    messages = [{'role': 'user', 'content': "Who is the champion?"}]
+
+    await chat_with_claude(messages)
+    await chat_with_claude(messages)
+
+    assert len(upstream) == 2
+
+
+async def test_exception_reaches_every_waiter():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(*(flight.do("key", failing) for _ in range(5)), return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(r, ValueError) and str(r) == "upstream failed" for r in results)
+    assert flight.stats() == {"upstream_calls": 1, "coalesced_calls": 4, "in_flight": 0}
+
+
+async def test_provider_error_reaches_every_caller(monkeypatch):
+    calls = []
+
+    def failing_invoke(request_body):
+        calls.append(request_body)
+        time.sleep(0.05)
+        raise ConnectionError("upstream refused")
+
+    monkeypatch.setattr(get_provider(), "invoke", failing_invoke)
+    messages = [{'role': 'user', 'content': "Who is the champion?"}]
+
+    results = await asyncio.gather(*(chat_with_claude(messages) for _ in range(5)), return_exceptions=True)
+
+    assert len(calls) == 1
+    assert all("upstream refused" in str(r) for r in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(flight.do("key", slow))
+    second = asyncio.create_task(flight.do("key", slow))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == "result"
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,87 @@
+"""
+The server writes through one writer: the async engine.
+
+Sync ORM code runs on it through AsyncSession.run_sync, so a write that
+waits for another one waits on an awaited pool checkout (or row lock), never
+on a blocking SQLite busy-timeout inside the event loop.
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal
+from app.models.usage import LLMUsage, LLMUsageDaily
+from app.services.usage_service import store_usage
+
+
+def usage_values(canvas_id: int, user_id: int) -> dict:
+    return dict(
+        model="test-model",
+        provider="simulated",
+        operation="chat",
+        chat_type=None,
+        canvas_id=canvas_id,
+        user_id=user_id,
+        chat_id=None,
+        latency_ms=100.0,
+        ttft_ms=None,
+        cost_usd=0.01,
+        created_at=datetime.utcnow(),
+        input_tokens=10,
+        output_tokens=5,
+        cache_read_tokens=0,
+        cache_write_tokens=0,
+    )
+
+
+async def test_write_waits_for_open_transaction_without_blocking_loop(user, canvas):
+    """A usage write queued behind an uncommitted write completes once it commits"""
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    try:
+        async with AsyncSessionLocal() as first:
+            # Open write transaction: flushed, not committed
+            first.add(LLMUsage(**usage_values(canvas.id, user.id)))
+            await first.flush()
+
+            started = time.monotonic()
+            second = asyncio.create_task(store_usage(usage_values(canvas.id, user.id)))
+            await asyncio.sleep(0.5)
+
+            # The loop kept running while the second write waited
+            assert ticks >= 20
+            assert time.monotonic() - started < 1.0
+
+            await first.commit()
+
+        await asyncio.wait_for(second, timeout=5)
+    finally:
+        ticker.cancel()
+
+    async with AsyncSessionLocal() as db:
+        entries = await db.scalar(select(func.count(LLMUsage.id)).where(LLMUsage.canvas_id == canvas.id))
+        rollup = await db.scalar(select(LLMUsageDaily).where(LLMUsageDaily.canvas_id == canvas.id))
+
+    # Both ledger entries landed; the queued write also made the rollup row
+    assert entries == 2
+    assert rollup.call_count == 1
+
+
+async def test_concurrent_usage_writes_all_land(user, canvas):
+    """Concurrent writers to the same rollup row neither fail nor lose increments"""
+    await asyncio.gather(*(store_usage(usage_values(canvas.id, user.id)) for _ in range(10)))
+
+    async with AsyncSessionLocal() as db:
+        rollup = await db.scalar(select(LLMUsageDaily).where(LLMUsageDaily.canvas_id == canvas.id))
+
+    assert rollup.call_count == 10
+    assert rollup.input_tokens == 100
@@ -0,0 +1,166 @@
+"""LLM usage ledger: daily rollups, cost reports, cut-off streams"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.background import drain_background_tasks
+from app.core.config import settings
+from app.models.canvas import Canvas
+from app.models.usage import LLMUsage, LLMUsageDaily
+from app.models.user import User, UserRole
+from app.services.usage_service import write_usage
+from tests.conftest import add_nodes, stream_then_disconnect
+
+API = settings.api_prefix
+MODEL = "claude-sonnet-test"  # $3 per million input tokens
+
+
+def ledger_values(day: date, canvas_id: int | None, user_id: int | None, input_tokens: int = 1_000_000) -> dict:
+    return dict(
+        model=MODEL,
+        provider="simulated",
+        operation="chat",
+        chat_type="sales_assistant",
+        canvas_id=canvas_id,
+        user_id=user_id,
+        chat_id=None,
+        latency_ms=100.0,
+        ttft_ms=None,
+        cost_usd=input_tokens * 3.00 / 1_000_000,
+        created_at=datetime.combine(day, datetime.min.time()),
+        input_tokens=input_tokens,
+        output_tokens=0,
+        cache_read_tokens=0,
+        cache_write_tokens=0,
+    )
+
+
+async def rollups(db, day: date) -> list[LLMUsageDaily]:
+    result = await db.execute(select(LLMUsageDaily).where(LLMUsageDaily.day == day))
+    return list(result.scalars())
+
+
+@pytest.fixture
+async def admin(db, user):
+    user.role = UserRole.ADMIN
+    await db.commit()
+    return user
+
+
+async def test_costs_aggregate_by_canvas_user_and_day(admin, client, db, canvas):
+    other_user = User(email="second-rep@example.com")
+    other_canvas = Canvas(name="Globex pilot", owner_id=admin.id)
+    db.add_all([other_user, other_canvas])
+    await db.commit()
+
+    for values in [
+        ledger_values(date(2020, 1, 10), canvas.id, admin.id),
+        ledger_values(date(2020, 1, 10), canvas.id, admin.id),
+        ledger_values(date(2020, 1, 11), canvas.id, other_user.id),
+        ledger_values(date(2020, 1, 12), other_canvas.id, admin.id, input_tokens=4_000_000),
+        ledger_values(date(2020, 2, 1), canvas.id, admin.id),  # outside the range
+    ]:
+        await db.run_sync(write_usage, values)
+
+    async def report(group_by: str, start: str = "2020-01-01", end: str = "2020-01-31") -> dict:
+        response = await client.get(
+            f"{API}/admin/llm/costs", params={"group_by": group_by, "start": start, "end": end}
+        )
+        assert response.status_code == 200, response.text
+        return {group[group_by]: (group["name"], group["calls"], group["cost_usd"]) for group in response.json()["groups"]}
+
+    assert await report("canvas") == {
+        other_canvas.id: ("Globex pilot", 1, 12.0),
+        canvas.id: ("Acme renewal", 3, 9.0),
+    }
+    assert await report("user") == {
+        admin.id: (admin.email, 3, 18.0),
+        other_user.id: ("second-rep@example.com", 1, 3.0),
+    }
+    assert await report("canvas", start="2020-01-10", end="2020-01-10") == {
+        canvas.id: ("Acme renewal", 2, 6.0),
+    }
+
+    groups = (await client.get(f"{API}/admin/llm/costs", params={
+        "group_by": "model", "start": "2020-01-01", "end": "2020-02-29",
+    })).json()["groups"]
+    assert [(g["model"], g["calls"], g["input_tokens"]) for g in groups] == [(MODEL, 5, 8_000_000)]
+
+
+async def test_costs_require_admin(client):
+    response = await client.get(f"{API}/admin/llm/costs")
+    assert response.status_code == 403
+
+
+async def test_rollup_row_is_upserted(db, canvas, user):
+    day = date(2020, 3, 2)
+
+    await db.run_sync(write_usage, ledger_values(day, canvas.id, user.id, input_tokens=100))
+    await db.run_sync(write_usage, ledger_values(day, canvas.id, user.id, input_tokens=50))
+    await db.run_sync(write_usage, ledger_values(day, None, user.id, input_tokens=10))
+
+    rows = {row.canvas_id: row for row in await rollups(db, day)}
+    assert set(rows) == {canvas.id, 0}
+    assert (rows[canvas.id].call_count, rows[canvas.id].input_tokens) == (2, 150)
+    assert rows[canvas.id].latency_ms_total == 200.0
+    assert (rows[0].call_count, rows[0].input_tokens) == (1, 10)
+
+
+async def test_rollup_created_concurrently_is_retried_as_update(db, canvas, user):
+    """Another writer creates the day's rollup row first: the insert conflicts and is retried"""
+    day = date(2020, 3, 3)
+    values = ledger_values(day, canvas.id, user.id, input_tokens=100)
+
+    def write_racing_another_writer(session):
+        commit = session.commit
+
+        def first_commit():
+            session.commit = commit
+            session.rollback()
+            session.add(LLMUsageDaily(
+                day=day, canvas_id=canvas.id, user_id=user.id, model=MODEL,
+                call_count=5, input_tokens=500, latency_ms_total=0.0, cost_usd=0.0,
+            ))
+            commit()
+            raise IntegrityError("INSERT INTO llm_usage_daily", {}, Exception("duplicate key"))
+
+        session.commit = first_commit
+        write_usage(session, values)
+
+    await db.run_sync(write_racing_another_writer)
+
+    [row] = await rollups(db, day)
+    assert (row.call_count, row.input_tokens) == (6, 600)
+    entries = (await db.execute(select(LLMUsage).where(LLMUsage.created_at == values['created_at']))).scalars().all()
+    assert len(entries) == 1
+
+
+@pytest.fixture
+def slow_stream(monkeypatch):
+    """40-token replies at 50 tokens/s, so a stream can be cut off midway"""
+    monkeypatch.setattr(settings, "llm_simulator_tokens_per_second", 50)
+    monkeypatch.setattr(settings, "llm_simulator_output_tokens", 40)
+
+
+async def test_cut_off_stream_is_recorded(slow_stream, db, user, client, canvas):
+    await add_nodes(db, canvas, 3)
+    response = await client.post(
+        f"{API}/chats/", json={"canvas_id": canvas.id, "name": "Deal chat", "chat_type": "sales_assistant"}
+    )
+    chat_id = response.json()["id"]
+
+    body = await stream_then_disconnect(user, f"{API}/chats/{chat_id}/messages/stream", {"content": "Summarize the deal"})
+    assert "event: done" not in body
+    await drain_background_tasks(timeout=5)
+
+    [entry] = (await db.execute(select(LLMUsage).where(LLMUsage.chat_id == chat_id))).scalars().all()
+    assert (entry.operation, entry.canvas_id, entry.user_id) == ("chat", canvas.id, user.id)
+    # Input was billed when the stream started, even though no final usage arrived
+    assert entry.input_tokens > 0
+    assert entry.ttft_ms is not None
+
+    [row] = [r for r in await rollups(db, entry.created_at.date()) if r.canvas_id == canvas.id]
+    assert row.call_count == 1
+    assert row.input_tokens == entry.input_tokens
@@ -0,0 +1,110 @@
+"""
+"What's Next" result cache: repeats on an unchanged canvas are served from
+the cache, anything that changes the analysis inputs is a miss.
+"""
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.node import Node
+from app.services import result_cache
+from app.services.result_cache import ResultCache, whats_next_cache
+from tests.conftest import add_nodes
+
+API = settings.api_prefix
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    whats_next_cache.clear()
+    yield
+    whats_next_cache.clear()
+
+
+async def create_whats_next_chat(client, canvas) -> int:
+    response = await client.post(
+        f"{API}/chats/",
+        json={"canvas_id": canvas.id, "name": "Next steps", "chat_type": "whats_next"},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def ask(client, chat_id: int, content: str = "What's next?", **fields) -> dict:
+    """Stream a turn and return the done event's payload"""
+    async with client.stream(
+        "POST", f"{API}/chats/{chat_id}/messages/stream", json={"content": content, **fields}
+    ) as response:
+        assert response.status_code == 200
+        body = "".join([chunk async for chunk in response.aiter_text()])
+
+    for raw in body.split("\n\n"):
+        if raw.startswith("event: done"):
+            return json.loads(raw.split("data: ", 1)[1])
+    raise AssertionError(f"no done event in {body!r}")
+
+
+async def test_repeat_in_same_chat_is_a_hit(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat_id = await create_whats_next_chat(client, canvas)
+
+    first = await ask(client, chat_id)
+    second = await ask(client, chat_id)
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["message"]["content"] == first["message"]["content"]
+
+
+async def test_repeat_in_new_chat_is_a_hit(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    first = await ask(client, await create_whats_next_chat(client, canvas))
+    second = await ask(client, await create_whats_next_chat(client, canvas))
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+
+
+async def test_changed_canvas_or_prompt_is_a_miss(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat_id = await create_whats_next_chat(client, canvas)
+    await ask(client, chat_id)
+
+    assert (await ask(client, chat_id, "What are the risks?"))["cached"] is False
+
+    db.add(Node(canvas_id=canvas.id, node_type="generic", title="New stakeholder", data={"notes": "CFO joined"}))
+    await db.commit()
+    response = await client.post(f"{API}/chats/{chat_id}/refresh-context")
+    assert response.status_code == 200
+
+    assert (await ask(client, chat_id))["cached"] is False
+    assert (await ask(client, chat_id))["cached"] is True
+
+
+async def test_force_refresh_bypasses_and_replaces_entry(client, db, canvas):
+    await add_nodes(db, canvas, 3)
+    chat_id = await create_whats_next_chat(client, canvas)
+    await ask(client, chat_id)
+
+    forced = await ask(client, chat_id, force_refresh=True)
+    assert forced["cached"] is False
+
+    # The fresh result replaced the cached one
+    again = await ask(client, chat_id)
+    assert again["cached"] is True
+    assert again["message"]["content"] == forced["message"]["content"]
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultCache("test", max_entries=10, ttl_seconds=60)
+
+    cache.set("key", {"content": "analysis"})
+    now[0] += 59
+    assert cache.get("key") == {"content": "analysis"}
+
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
@@ -14,6 +14,7 @@ const ChatPanel: React.FC<ChatPanelProps> = ({ canvasId, onClose }) => {
   const [inputValue, setInputValue] = useState('');
   const [loading, setLoading] = useState(false);
   const [sending, setSending] = useState(false);
+  const [forceRefresh, setForceRefresh] = useState(false);
   const [showNewChatModal, setShowNewChatModal] = useState(false);
 
   useEffect(() => {
@@ -62,25 +63,56 @@ const ChatPanel: React.FC<ChatPanelProps> = ({ canvasId, onClose }) => {
     };
     setMessages(prev => [...prev, tempUserMessage]);
 
+    // Placeholder assistant message that fills in as tokens stream
+    const streamingMessage: Message = {
+      role: 'assistant',
+      content: '',
+      created_at: new Date().toISOString(),
+    };
+    setMessages(prev => [...prev, streamingMessage]);
+
+    let streamedText = '';
+
     try {
-      const response = await chatService.sendMessage(selectedChat.id, {
-        content: userMessage,
-      });
+      const response = await chatService.streamMessage(
+        selectedChat.id,
+        {
+          content: userMessage,
+          force_refresh: selectedChat.chat_type === 'whats_next' && forceRefresh,
+        },
+        {
+          onDelta: (text) => {
+            streamedText += text;
+            setMessages(prev => {
+              const last = prev[prev.length - 1];
+              return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+            });
+          },
+        },
+      );
 
-      // Replace temp message and add assistant response
-      setMessages(prev => {
-        const withoutTemp = prev.slice(0, -1);
-        return [...withoutTemp, tempUserMessage, response];
-      });
+      // Replace streamed placeholder with the saved assistant response
+      setMessages(prev => [...prev.slice(0, -1), response]);
+      setForceRefresh(false);
 
       // Reload chat list to update message count
       loadChats();
     } catch (error) {
       console.error('Failed to send message:', error);
-      // Remove optimistic message on error
-      setMessages(prev => prev.slice(0, -1));
-      setInputValue(userMessage); // Restore input
-      alert('Failed to send message. Please try again.');
+      if (streamedText) {
+        // The server saved the message and the partial reply; keep both
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, content: streamedText, interrupted: true }];
+        });
+        loadChats();
+        alert('The response was interrupted. The partial reply has been kept.');
+      } else {
+        // Remove optimistic messages on error
+        setMessages(prev => prev.slice(0, -2));
+        setInputValue(userMessage); // Restore input
+        alert('Failed to send message. Please try again.');
+      }
     } finally {
       setSending(false);
     }
@@ -200,6 +232,11 @@ const ChatPanel: React.FC<ChatPanelProps> = ({ canvasId, onClose }) => {
                           {msg.token_count} tokens
                         </div>
                       )}
+                      {msg.interrupted && (
+                        <div className="message-meta message-interrupted">
+                          Response interrupted
+                        </div>
+                      )}
                     </div>
                   ))
                 )}
@@ -228,6 +265,17 @@ const ChatPanel: React.FC<ChatPanelProps> = ({ canvasId, onClose }) => {
                   rows={3}
                   disabled={sending}
                 />
+                {selectedChat.chat_type === 'whats_next' && (
+                  <label className="force-refresh-toggle" title="Ignore the cached analysis for this canvas">
+                    <input
+                      type="checkbox"
+                      checked={forceRefresh}
+                      onChange={(e) => setForceRefresh(e.target.checked)}
+                      disabled={sending}
+                    />
+                    Fresh analysis
+                  </label>
+                )}
                 <button
                   type="submit"
                   className="btn btn-primary btn-send"
@@ -1,4 +1,5 @@
 import api from './api'
+import { jobService } from './jobService'
 
 export interface Canvas {
   id: number
@@ -57,9 +58,10 @@ export const canvasService = {
     return response.data
   },
 
-  // Delete canvas
+  // Delete canvas (runs as a background job; resolves once it is done)
   async deleteCanvas(id: number) {
-    await api.delete(`/canvases/${id}`)
+    const response = await api.delete(`/canvases/${id}`)
+    await jobService.waitForJob(response.data.id)
   },
 
   // Archive canvas
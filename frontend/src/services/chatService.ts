@@ -14,6 +14,7 @@ export interface Message {
   content: string;
   created_at: string;
   token_count?: number;
+  interrupted?: boolean; // Stream cut off; the server kept the partial reply
 }
 
 export interface CreateChatRequest {
@@ -26,6 +27,11 @@ export interface CreateChatRequest {
 export interface SendMessageRequest {
   content: string;
   include_canvas_context?: boolean;
+  force_refresh?: boolean;
+}
+
+export interface StreamHandlers {
+  onDelta: (text: string) => void;
 }
 
 export const chatService = {
@@ -59,6 +65,62 @@ export const chatService = {
     return response.data;
   },
 
+  // Send a message and stream the response (server-sent events)
+  streamMessage: async (
+    chatId: number,
+    data: SendMessageRequest,
+    handlers: StreamHandlers,
+  ): Promise<Message> => {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${api.defaults.baseURL}/chats/${chatId}/messages/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(data),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to send message: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const payload = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] ?? '{}');
+
+        if (eventName === 'delta') {
+          handlers.onDelta(payload.text);
+        } else if (eventName === 'done') {
+          return payload.message;
+        } else if (eventName === 'error') {
+          throw new Error(payload.detail);
+        }
+      }
+    }
+
+    throw new Error('Stream ended unexpectedly');
+  },
+
+  // Rebuild a chat's context snapshot from the current canvas
+  refreshContext: async (chatId: number): Promise<void> => {
+    await api.post(`/chats/${chatId}/refresh-context`);
+  },
+
   // Delete a chat
   deleteChat: async (chatId: number): Promise<void> => {
     await api.delete(`/chats/${chatId}`);
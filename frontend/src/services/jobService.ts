@@ -0,0 +1,33 @@
+import api from './api'
+
+export interface Job {
+  id: number
+  job_type: string
+  status: 'queued' | 'running' | 'complete' | 'failed'
+  attempts: number
+  max_attempts: number
+  progress?: Record<string, any>
+  result?: Record<string, any>
+  error?: string
+  created_at: string
+  started_at?: string
+  finished_at?: string
+}
+
+export const jobService = {
+  // Get job status
+  async getJob(id: number): Promise<Job> {
+    const response = await api.get(`/jobs/${id}`)
+    return response.data
+  },
+
+  // Poll until the job completes; rejects if it fails
+  async waitForJob(id: number, intervalMs: number = 1000): Promise<Job> {
+    for (;;) {
+      const job = await this.getJob(id)
+      if (job.status === 'complete') return job
+      if (job.status === 'failed') throw new Error(job.error || 'Job failed')
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+  },
+}